@@ -1,222 +1,368 @@
 import asyncio
-import random
-import time
+import contextlib
+from app.clock import clock
 import matplotlib.pyplot as plt
 from .logger import logger as context_logger
-from .metrics import metrics
+from .metrics import export, exposition, metrics
 from .services import service
-from .services.auth_service import auth_service
-from app.store.database.postgres import postgres
-from app.store.database.redis import redis
-from app.store import cluster
-from app.balance_loader import nginx
-from app.broker import rabbitmq
 from .models import models
+from app.topology import builder
+from app.rng import streams
+from app.load_generator import load_generator, profiles
+from app.network import resilience
 
 
 class Application:
-    def __init__(self):
+    def __init__(
+            self,
+            clock: clock.Clock = clock.default_clock,
+            load_profile: profiles.ArrivalProfile | None = None,
+            max_active_users: int = 10000,
+            keep_requests: bool = False,
+            pool_requests: bool = False,
+            plot: bool = True,
+            seed: int | None = None,
+            topology: dict | str | None = None,
+            balancer_weights: list[int] | None = None,
+            balancer_strategy: str | None = None,
+            payment_count: int | None = None,
+            data_count: int | None = None,
+            public_count: int | None = None,
+            base_latency_scale: float = 1.0,
+            fail_prob: float | None = None,
+            replication_delay: float | None = None,
+            replication_mode: str | None = None,
+            read_routing: str | None = None,
+            max_replica_lag: float | None = None,
+            read_your_writes: bool | None = None,
+            cache_capacity: int | None = None,
+            cache_eviction: str | None = None,
+            popularity_skew: float = 0.0,
+            db_pool_size: int | None = None,
+            db_acquire_timeout: float | None = None,
+            workers: int | None = None,
+            queue_size: int | None = None,
+            shedding: str | None = None,
+            keep_alive: bool | None = None,
+            multiplexing: bool | None = None,
+            deadline: float | None = None,
+            max_retries: int | None = None,
+            retry_budget: float | None = None,
+            hedge: bool | None = None,
+            outlier_detection: bool | None = None,
+            broker_batch_size: int | None = None,
+            broker_queue_size: int | None = None,
+            broker_overflow: str | None = None,
+            broker_consumers: int | None = None,
+            broker_prefetch: int | None = None,
+            broker_log: str | None = None,
+            metrics_port: int | None = None,
+            results_dir: str | None = None,
+            results_format: str = "auto",
+            snapshot_interval: float = 1.0,
+            report: list[str] | None = None):
         self.duration = 50
-        self.metrics_collector = metrics.MetricsCollector()
-        self.load_balancer = nginx.Nginx()
-        self.broker = rabbitmq.RabbitMQ(
-            "RabbitMQ", metrics_collector=self.metrics_collector)
-
-        auth_cluster = cluster.DBCluster(
-            name="AuthCluster",
-            master=redis.Redis(
-                name="AuthRedisMaster",
-                metrics_collector=self.metrics_collector),
-            replicas=[
-                redis.Redis(
-                    name="AuthRedisReplica1",
-                    metrics_collector=self.metrics_collector),
-                redis.Redis(
-                    name="AuthRedisReplica2",
-                    metrics_collector=self.metrics_collector),
-            ])
-
-        self.auth_service = auth_service.AuthService(
-            name="AuthService",
-            db_cluster=auth_cluster,
-            base_latency=0.05,
-            metrics_collector=self.metrics_collector
-        )
-
-        notification_cluster = cluster.DBCluster(
-            name="NotificationCluster",
-            master=postgres.PostgresDB(
-                name="NotifMaster",
-                metrics_collector=self.metrics_collector),
-            replicas=[
-                postgres.PostgresDB(
-                    name="NotifReplica1",
-                    metrics_collector=self.metrics_collector)])
-
-        self.notification_service = service.Service(
-            name="NotificationService",
-            db_cluster=notification_cluster,
-            base_latency=0.05,
-            broker=self.broker,
-            metrics_collector=self.metrics_collector
-        )
-
-        self.load_balancer.add_instances(
-            "NotificationService", [
-                self.notification_service], [1])
-
-        payment_instances = [
-            service.Service(
-                name=f"PaymentService-{i}",
-                db_cluster=cluster.DBCluster(
-                    name=f"PaymentCluster-{i}",
-                    master=postgres.PostgresDB(
-                        name=f"PaymentMaster-{i}",
-                        metrics_collector=self.metrics_collector),
-                    replicas=[
-                        postgres.PostgresDB(
-                            name=f"PaymentReplica-{i}-1",
-                            metrics_collector=self.metrics_collector),
-                        postgres.PostgresDB(
-                            name=f"PaymentReplica-{i}-2",
-                            metrics_collector=self.metrics_collector)]),
-                base_latency=0.1,
-                requires_auth=True,
-                broker=self.broker,
-                metrics_collector=self.metrics_collector) for i in range(3)]
-
-        data_instances = [
-            service.Service(
-                name=f"DataService-{i}",
-                db_cluster=cluster.DBCluster(
-                    name=f"DataCluster-{i}",
-                    master=postgres.PostgresDB(
-                        name=f"DataMaster-{i}",
-                        metrics_collector=self.metrics_collector),
-                    replicas=[
-                        postgres.PostgresDB(
-                            name=f"DataReplica-{i}-1",
-                            metrics_collector=self.metrics_collector)]),
-                cache=redis.Redis(
-                    name=f"CacheRedis-{i}",
-                    metrics_collector=self.metrics_collector),
-                base_latency=0.07,
-                requires_auth=True,
-                broker=self.broker,
-                metrics_collector=self.metrics_collector) for i in range(2)]
-
-        public_instances = [
-            service.Service(
-                name=f"PublicInfoService-{i}",
-                db_cluster=cluster.DBCluster(
-                    name=f"PublicCluster-{i}",
-                    master=postgres.PostgresDB(
-                        name=f"PublicMaster-{i}",
-                        metrics_collector=self.metrics_collector),
-                    replicas=[
-                        postgres.PostgresDB(
-                            name=f"PublicReplica-{i}-1",
-                            metrics_collector=self.metrics_collector)]),
-                base_latency=0.03,
-                requires_auth=False,
-                metrics_collector=self.metrics_collector) for i in range(2)]
-
-        weights = [7, 3]
-        self.load_balancer.add_instances(
-            "PaymentService", payment_instances, weights)
-        self.load_balancer.add_instances(
-            "DataService", data_instances, weights)
-        self.load_balancer.add_instances(
-            "PublicInfoService", public_instances, weights)
-
-        self.services = [self.auth_service, self.notification_service] + \
-            payment_instances + data_instances + public_instances
-
-        self.resources = []
-        for s in self.services:
-            if s.db_cluster:
-                self.resources.append(s.db_cluster.master)
-                self.resources.extend(s.db_cluster.replicas)
-            if s.cache:
-                self.resources.append(s.cache)
+        self.plot = plot
+        self.metrics_port = metrics_port
+        self.results_dir = results_dir
+        self.results_format = results_format
+        self.snapshot_interval = snapshot_interval
+        self.report = report or []
+        self.clock = clock
+        self.streams = streams.StreamFactory(seed)
+        self.rng = self.streams.stream("Application")
+        self.load_profile = load_profile or profiles.Poisson(rps=5)
+        self.max_active_users = max_active_users
+        self.popularity_skew = popularity_skew
+        self.request_pool = models.RequestPool() if pool_requests else None
+        self.metrics_collector = metrics.MetricsCollector(
+            clock=self.clock, keep_requests=keep_requests)
+
+        if not isinstance(topology, dict):
+            topology = builder.load_topology(topology)
+        instance_counts = {
+            group: count for group, count in (
+                ("PaymentService", payment_count),
+                ("DataService", data_count),
+                ("PublicInfoService", public_count)) if count is not None}
+        topology = builder.apply_overrides(
+            topology,
+            balancer_weights=balancer_weights,
+            balancer_strategy=balancer_strategy,
+            instance_counts=instance_counts,
+            base_latency_scale=base_latency_scale,
+            fail_prob=fail_prob,
+            replication_delay=replication_delay,
+            replication_mode=replication_mode,
+            read_routing=read_routing,
+            max_replica_lag=max_replica_lag,
+            read_your_writes=read_your_writes,
+            cache_capacity=cache_capacity,
+            cache_eviction=cache_eviction,
+            db_pool_size=db_pool_size,
+            db_acquire_timeout=db_acquire_timeout,
+            workers=workers,
+            queue_size=queue_size,
+            shedding=shedding,
+            keep_alive=keep_alive,
+            multiplexing=multiplexing,
+            deadline=deadline,
+            max_retries=max_retries,
+            retry_budget=retry_budget,
+            hedge=hedge,
+            outlier_detection=outlier_detection,
+            broker_batch_size=broker_batch_size,
+            broker_queue_size=broker_queue_size,
+            broker_overflow=broker_overflow,
+            broker_consumers=broker_consumers,
+            broker_prefetch=broker_prefetch,
+            broker_log=broker_log)
+
+        built = builder.TopologyBuilder(
+            self.metrics_collector,
+            clock=self.clock,
+            streams=self.streams).build(topology)
+        self.load_balancer = built.load_balancer
+        self.broker = built.broker
+        self.auth_service = built.auth_service
+        self.services = built.services
+        self.resources = built.resources
+        self.routes = built.routes
+        self.client_connections = built.client_connections
+        self.route_policies = built.route_policies
 
     async def generate_requests(self):
         """Генерация запросов"""
-        users = []
-        user_id = 0
-        start_time = time.time()
+        generator = load_generator.LoadGenerator(
+            profile=self.load_profile,
+            user_flow=self.user_flow,
+            clock=self.clock,
+            max_active_users=self.max_active_users,
+            popularity_skew=self.popularity_skew,
+            rng=self.streams.stream("LoadGenerator"))
+        await generator.run(self.duration)
+
+    async def user_flow(self, user: models.User):
+        """Сценарий виртуального пользователя: авторизация и запрос к сервису"""
         logger = context_logger.get_logger()
-
-        while time.time() - start_time < self.duration:
-            if random.random() <= 0.5 and users:
-                user = random.choice(users)
-            else:
-                user = models.User(user_id)
-                users.append(user)
-            auth_req = models.Request(
-                user, "AuthService", models.HTTPMethod.POST)
-            try:
+        auth_req = self.new_request(user, "AuthService", models.HTTPMethod.POST)
+        try:
+            async with self.client_connection(auth_req):
                 await self.auth_service.handle(auth_req)
-                auth_req.success = True
-            except Exception:
-                auth_req.success = False
-            finally:
-                auth_req.end_time = time.time()
-                self.metrics_collector.record(auth_req)
-
-            service_name = random.choice(
-                ["PaymentService", "DataService", "PublicInfoService"])
-            try:
-                service_instance = self.load_balancer.get_instance(
-                    service_name)
-            except Exception as e:
-                logger.error(str(e))
-
-            method = models.HTTPMethod.GET if random.random() <= 0.5 else models.HTTPMethod.POST
-            req = models.Request(user, service_instance.name, method)
-            asyncio.create_task(self.process_request(req, service_instance))
-            user_id += 1
-            await asyncio.sleep(random.uniform(0.05, 0.2))
-        logger.info("Генерация запросов завершена")
+            auth_req.success = True
+        except Exception:
+            auth_req.success = False
+        finally:
+            auth_req.end_time = self.clock.now()
+            self.metrics_collector.record(auth_req)
+            self.release_request(auth_req)
+
+        service_name = self.rng.choice(self.routes)
+        method = models.HTTPMethod.GET if self.rng.random() <= 0.5 else models.HTTPMethod.POST
+        if service_name in self.route_policies:
+            await self.call_route(user, service_name, method)
+            return
+
+        try:
+            service_instance = self.load_balancer.get_instance(service_name)
+        except Exception as e:
+            logger.error("%s", e)
+            return
+
+        req = self.new_request(user, service_instance.name, method)
+        error = await self.process_request(req, service_instance)
+        if not isinstance(error, PermissionError):
+            self.load_balancer.report(
+                service_name, service_instance, req.duration, req.success)
+        self.release_request(req)
+
+    def new_request(
+            self,
+            user: models.User,
+            service_name: str,
+            method: models.HTTPMethod) -> models.Request:
+        if self.request_pool is not None:
+            return self.request_pool.acquire(
+                user, service_name, method, self.clock)
+        return models.Request(user, service_name, method, self.clock)
+
+    def client_connection(self, request: models.Request):
+        """Keep-alive соединение пользователя с Nginx"""
+        if self.client_connections is None:
+            return contextlib.nullcontext()
+        return self.client_connections.connection(request, key=request.user.id)
+
+    def release_request(self, request: models.Request):
+        """Возврат запроса в пул после записи метрик"""
+        if self.request_pool is not None:
+            self.request_pool.release(request)
 
     async def process_request(
             self,
             request: models.Request,
             service: service.Service):
         """Обработка запросов"""
+        try:
+            return await self.execute(request, service)
+        finally:
+            self.metrics_collector.record(request)
+
+    async def execute(
+            self,
+            request: models.Request,
+            service: service.Service) -> Exception | None:
+        """Одна попытка обработки запроса инстансом, без записи в метрики.
+
+        Возвращает ошибку попытки или None при успехе.
+        """
         logger = context_logger.get_logger()
         self.metrics_collector.record_load_start(service.name)
         try:
-            await service.handle(request)
+            async with self.client_connection(request):
+                await service.handle(request)
             request.success = True
 
         except Exception as e:
             request.success = False
-            logger.debug(f"❌ Ошибка при {request.service_name}: {e}")
+            logger.debug("❌ Ошибка при %s: %s", request.service_name, e)
+            return e
         finally:
-            request.end_time = time.time()
+            request.end_time = self.clock.now()
             self.metrics_collector.record_load_end(service.name)
-            self.metrics_collector.record(request)
 
-    async def consume_notifications(self):
+    async def call_route(
+            self,
+            user: models.User,
+            service_name: str,
+            method: models.HTTPMethod):
+        """Запрос к маршруту по его политике: дедлайн, повторы и хеджирование.
+
+        В метрики попадает один итоговый запрос со временем от первой
+        попытки; попытки учитываются в статистике маршрута.
+        """
+        policy = self.route_policies[service_name]
+        start = self.clock.now()
+        policy.budget.deposit()
+        self.metrics_collector.record_route_event(service_name, "requests")
+        attempts: list[models.Request] = []
+        result = None
+        retry = 0
+        try:
+            async with asyncio.timeout(policy.deadline):
+                while True:
+                    result, error = await self.hedged_attempt(
+                        user, service_name, method, policy, attempts)
+                    if result is not None and result.success:
+                        break
+                    # Отказ в авторизации повтором не исправить
+                    if retry >= policy.max_retries or isinstance(error, PermissionError):
+                        break
+                    if not policy.budget.withdraw():
+                        self.metrics_collector.record_route_event(
+                            service_name, "budget_exhausted")
+                        break
+                    retry += 1
+                    self.metrics_collector.record_route_event(service_name, "retries")
+                    await asyncio.sleep(policy.backoff_delay(retry))
+        except TimeoutError:
+            self.metrics_collector.record_route_event(service_name, "deadline_exceeded")
+
+        if result is None or not result.success:
+            if not attempts:
+                attempts.append(self.new_request(user, service_name, method))
+            result = attempts[-1]
+            result.success = False
+            result.end_time = self.clock.now()
+        result.start_time = start
+        self.metrics_collector.record(result)
+        for request in attempts:
+            self.release_request(request)
+
+    async def hedged_attempt(
+            self,
+            user: models.User,
+            service_name: str,
+            method: models.HTTPMethod,
+            policy: resilience.RoutePolicy,
+            attempts: list[models.Request]
+    ) -> tuple[models.Request | None, Exception | None]:
+        """Попытка с копией на другой инстанс, если ответ задерживается"""
+        delay = policy.hedge_delay()
+        if delay is None:
+            return await self.attempt(user, service_name, method, policy, attempts)
+        primary = asyncio.create_task(
+            self.attempt(user, service_name, method, policy, attempts))
+        tasks = {primary}
+        hedge = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and attempts and policy.budget.withdraw():
+                self.metrics_collector.record_route_event(service_name, "hedges")
+                hedge = asyncio.create_task(self.attempt(
+                    user, service_name, method, policy, attempts,
+                    exclude=attempts[-1].service_name))
+                tasks.add(hedge)
+            result = (None, None)
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    request, error = task.result()
+                    if request is not None and request.success:
+                        if task is hedge:
+                            self.metrics_collector.record_route_event(
+                                service_name, "hedge_wins")
+                        return request, None
+                    if request is not None or result[0] is None:
+                        result = (request, error)
+            return result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def attempt(
+            self,
+            user: models.User,
+            service_name: str,
+            method: models.HTTPMethod,
+            policy: resilience.RoutePolicy,
+            attempts: list[models.Request],
+            exclude: str | None = None
+    ) -> tuple[models.Request | None, Exception | None]:
+        """Одна попытка на инстанс, выбранный балансировщиком"""
         logger = context_logger.get_logger()
-        while True:
-            try:
-                msg, delay = await self.broker.consume("messages")
-                logger.info(
-                    f"🔔 Уведомление: user={
-                        msg['user_id']} delay={
-                        delay:.3f}s, service={
-                        msg["service"]}")
-            except BaseException:
-                pass
-            await asyncio.sleep(0.05)
+        try:
+            service_instance = self.load_balancer.get_instance(service_name, exclude)
+        except Exception as e:
+            logger.debug("%s", e)
+            return None, e
+        request = self.new_request(user, service_instance.name, method)
+        attempts.append(request)
+        self.metrics_collector.record_route_event(service_name, "attempts")
+        error = await self.execute(request, service_instance)
+        # Отказ в авторизации не говорит о здоровье инстанса
+        if not isinstance(error, PermissionError):
+            self.load_balancer.report(
+                service_name, service_instance, request.duration, request.success)
+        if request.success:
+            policy.observe(request.duration)
+        return request, error
+
+    async def notify(self, msg: models.Message, delay: float):
+        """Обработка уведомления потребителем брокера"""
+        logger = context_logger.get_logger()
+        logger.info(
+            "🔔 Уведомление: user=%s delay=%.3fs, service=%s",
+            msg.payload["user_id"], delay, msg.payload["service"])
 
     async def run(self):
         """Запуск приложения"""
         logger = context_logger.get_logger()
-        run_coroutine = asyncio.current_task()
-        run_coroutine.add_done_callback(lambda _: self.visualize())
+        if self.plot:
+            run_coroutine = asyncio.current_task()
+            run_coroutine.add_done_callback(lambda _: self.visualize())
         for r in self.resources:
             asyncio.create_task(r.simulate_failure())
         for s in self.services:
@@ -225,22 +371,121 @@ class Application:
             if hasattr(s, "db_cluster") and s.db_cluster:
                 asyncio.create_task(s.db_cluster.monitor_master(interval=5.0))
 
-        consume_task = asyncio.create_task(self.consume_notifications())
+        metrics_server = None
+        if self.metrics_port is not None:
+            metrics_server = exposition.MetricsServer(
+                exposition.OpenMetricsRenderer(
+                    self.metrics_collector,
+                    clusters=list(dict.fromkeys(
+                        s.db_cluster for s in self.services
+                        if getattr(s, "db_cluster", None))),
+                    broker=self.broker),
+                port=self.metrics_port)
+            await metrics_server.start()
+
+        exporter = None
+        if self.results_dir is not None:
+            exporter = export.RunExporter(
+                self.results_dir,
+                self.metrics_collector,
+                file_format=self.results_format,
+                interval=self.snapshot_interval,
+                clock=self.clock)
+            exporter.start()
+
+        consumers = self.broker.subscribe("messages", self.notify)
         await self.generate_requests()
         logger.info("✅ Симуляция завершена")
+        # Итоги идут через дочерний логгер: фильтр событий логгера
+        # simulation их не прореживает
+        summary_logger = logger.getChild("summary")
         summary = self.metrics_collector.get_service_summary()
-        logger.info("📊 Итоги по сервисам:")
+        summary_logger.info("📊 Итоги по сервисам:")
         for name, stats in summary.items():
-            logger.info(
-                f"{name}: OK={stats['success']} ERR={stats['error']} "
-                f"RT={stats['avg_response']:.3f}s "
-                f"DB={stats['avg_db']:.3f}s CACHE={stats['avg_cache']:.3f}s "
-                f"TCP={stats['avg_tcp']:.3f}s TLS={stats['avg_tls']:.3f}s"
-            )
-        consume_task.cancel()
+            summary_logger.info(
+                "%s: OK=%d ERR=%d RT=%.3fs DB=%.3fs CACHE=%.3fs TCP=%.3fs TLS=%.3fs",
+                name, stats["success"], stats["error"], stats["avg_response"],
+                stats["avg_db"], stats["avg_cache"], stats["avg_tcp"], stats["avg_tls"])
+        for name, stats in self.metrics_collector.get_route_stats().items():
+            summary_logger.info(
+                "%s: усиление повторами x%.2f, хеджей=%d (выиграно %.1f%%), "
+                "дедлайн превышен=%d",
+                name, stats["retry_amplification"], stats["hedges"],
+                100 * stats["hedge_win_rate"], stats["deadline_exceeded"])
+        for name, stats in self.metrics_collector.get_outlier_stats().items():
+            summary_logger.info("%s: исключался из балансировки %d раз", name, stats["eject"])
+        for name, stats in self.metrics_collector.get_connection_stats().items():
+            summary_logger.info(
+                "%s: переиспользовано соединений %.1f%%, TLS resumption %.1f%%",
+                name, 100 * stats["reuse_ratio"], 100 * stats["resumption_ratio"])
+        for name, stats in self.metrics_collector.get_commit_stats().items():
+            summary_logger.info(
+                "%s: group commit %.2f записей на сброс, таймаутов подтверждения=%d",
+                name, stats["avg_group"], stats["ack_timeouts"])
+        for name, stats in self.metrics_collector.get_replication_stats().items():
+            summary_logger.info(
+                "%s: отставание avg=%.3fs p99=%.3fs, до %d записей, пакет %.1f записей",
+                name, stats["avg_lag"], stats["p99_lag"], stats["max_lsn_lag"],
+                stats["avg_batch"])
+        for name, stats in self.metrics_collector.get_read_stats().items():
+            summary_logger.info(
+                "%s: чтений с реплик %.1f%%, устаревших %d (%.1f%%)",
+                name, 100 * stats["offload_ratio"], stats["stale"],
+                100 * stats["stale_ratio"])
+        for name, stats in self.metrics_collector.get_cache_stats().items():
+            summary_logger.info(
+                "%s: hit ratio=%.1f%% вытеснено=%d истекло=%d",
+                name, 100 * stats["hit_ratio"], stats["evictions"], stats["expired"])
+        for name, stats in self.metrics_collector.get_pool_stats().items():
+            summary_logger.info(
+                "%s: пул занят на %.1f%%, ожидание avg=%.3fs p99=%.3fs, таймаутов=%d",
+                name, 100 * stats["utilization"], stats["avg_wait"], stats["p99_wait"],
+                stats["timeouts"])
+        for name, stats in self.metrics_collector.get_admission_stats().items():
+            summary_logger.info(
+                "%s: ожидание в очереди avg=%.3fs p99=%.3fs, отброшено=%d",
+                name, stats["avg_wait"], stats["p99_wait"], stats["shed"])
+        broker_stats = self.metrics_collector.get_broker_stats()
+        summary_logger.info(
+            "%s: доставка avg=%.3fs p99=%.3fs, пакет %.1f сообщений, очередь до %d, "
+            "отброшено=%d",
+            self.broker.name, broker_stats["avg_delivery"], broker_stats["p99_delivery"],
+            broker_stats["avg_batch"], broker_stats["max_queue_size"],
+            broker_stats["messages_dropped"])
+        for consumer in consumers:
+            consumer.cancel()
+        self.broker.close()
+        if metrics_server is not None:
+            metrics_server.close()
+        if exporter is not None:
+            exporter.close()
+            logger.info("💾 Результаты сохранены в %s (%s)", self.results_dir, exporter.format)
+        if self.report:
+            self.save_report(self.report)
+
+    async def replay_notifications(self):
+        """Повтор сохранённого потока уведомлений (брокер с persistence)"""
+        logger = context_logger.get_logger()
+        count = await self.broker.replay("messages", self.notify)
+        logger.info("🔁 Повторено уведомлений: %d", count)
 
     def visualize(self):
-        """Визуализация всех метрик"""
+        """Показ графиков метрик на экране"""
+        self.figure()
+        plt.show()
+
+    def save_report(self, paths: list[str]):
+        """Сохранение графиков метрик в файлы (формат — по расширению:
+        .png, .svg, .pdf); экран не нужен"""
+        logger = context_logger.get_logger()
+        fig = self.figure()
+        for path in paths:
+            fig.savefig(path)
+            logger.info("🖼️ Отчёт сохранён: %s", path)
+        plt.close(fig)
+
+    def figure(self) -> plt.Figure:
+        """Графики всех метрик на одной фигуре"""
         times, rps, errors = self.metrics_collector.get_rps_series()
         lat_stats = self.metrics_collector.get_latency_stats()
         tcp_tls = self.metrics_collector.get_tcp_tls_avg()
@@ -248,16 +493,24 @@ class Application:
         avg_load = self.metrics_collector.get_avg_load()
         infra = self.metrics_collector.infrastructure
 
-        plt.figure(figsize=(14, 12))
+        fig = plt.figure(figsize=(14, 12))
 
         plt.subplot(4, 2, 1)
         plt.plot(times, rps, label="RPS")
         plt.plot(times, errors, label="Ошибки", color="red")
+        for time, _, _, event in self.metrics_collector.outlier_events:
+            plt.axvline(
+                time,
+                color="black" if event == "eject" else "green",
+                linestyle="--" if event == "eject" else ":",
+                linewidth=0.5,
+                alpha=0.5)
         plt.title("Запросы и ошибки во времени")
         plt.legend()
 
         plt.subplot(4, 2, 2)
-        plt.hist(self.metrics_collector.response_times, bins=20, alpha=0.7)
+        values, counts = self.metrics_collector.response_times.buckets()
+        plt.hist(values, bins=20, weights=counts, alpha=0.7)
         plt.title(
             f"Latency avg={lat_stats['avg']:.3f}s | "
             f"p95={lat_stats['p95']:.3f}s | p99={lat_stats['p99']:.3f}s"
@@ -267,7 +520,9 @@ class Application:
         plt.bar(["TCP avg", "TLS avg"],
                 [tcp_tls["tcp_avg"], tcp_tls["tls_avg"]],
                 color=["blue", "orange"])
-        plt.title("Среднее время TCP / TLS соединений")
+        plt.title(
+            f"Среднее время TCP / TLS соединений "
+            f"(переиспользовано {tcp_tls['reuse_ratio']:.0%})")
 
         plt.subplot(4, 2, 4)
         if avg_load:
@@ -298,16 +553,19 @@ class Application:
                 va='center')
 
         plt.subplot(4, 2, 6)
-        if self.metrics_collector.broker_metrics["latencies"]:
+        if self.metrics_collector.broker_metrics["delivery_latencies"].count:
+            values, counts = self.metrics_collector.broker_metrics[
+                "delivery_latencies"].buckets()
             plt.hist(
-                self.metrics_collector.broker_metrics["latencies"],
+                values,
                 bins=20,
+                weights=counts,
                 alpha=0.7,
                 color="purple")
             plt.title(
                 f"Брокер сообщений — задержки доставки "
-                f"(avg={broker_stats['avg_latency']:.3f}s, "
-                f"p95={broker_stats['p95_latency']:.3f}s)"
+                f"(avg={broker_stats['avg_delivery']:.3f}s, "
+                f"p95={broker_stats['p95_delivery']:.3f}s)"
             )
             plt.xlabel("Задержка (сек)")
             plt.ylabel("Сообщений")
@@ -346,4 +604,4 @@ class Application:
                 va='center')
 
         plt.tight_layout()
-        plt.show()
+        return fig
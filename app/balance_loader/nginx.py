@@ -1,11 +1,28 @@
-import random
-from itertools import cycle
 from app.services import service
+from app.clock import clock
+from app.metrics import metrics
+from app.rng import streams
+from . import outlier, strategies
 
 
 class Nginx:
-    def __init__(self):
+    def __init__(
+            self,
+            rng: streams.RandomStream | None = None,
+            strategy: str = "weighted",
+            metrics_collector: metrics.MetricsCollector | None = None,
+            outlier_detection: dict | None = None,
+            clock: clock.Clock = clock.default_clock):
+        if strategy not in strategies.STRATEGIES:
+            raise ValueError(f"Неизвестная стратегия балансировки: {strategy}")
+        self.rng = rng or streams.default_factory.stream("Nginx")
+        self.strategy = strategy
+        self.metrics_collector = metrics_collector
+        self.outlier_detection = outlier_detection
+        self.clock = clock
         self.instances: dict[str, list[tuple[service.Service, int]]] = {}
+        self.groups: dict[str, strategies.Strategy] = {}
+        self.detectors: dict[str, outlier.OutlierDetector] = {}
 
     def add_instances(self,
                       service_name: str,
@@ -14,22 +31,51 @@ class Nginx:
         """Добавление инстанса сервиса"""
         if not weights:
             weights = [1] * len(service_instances)
-        self.instances[service_name] = list(
-            zip(service_instances, cycle(weights)))
+        if len(weights) != len(service_instances):
+            raise ValueError(
+                f"Для {service_name} задано {len(weights)} весов "
+                f"на {len(service_instances)} инстансов")
+        self.instances[service_name] = list(zip(service_instances, weights))
+        group = strategies.STRATEGIES[self.strategy](
+            service_instances, list(weights), self.rng, self.metrics_collector)
+        self.groups[service_name] = group
+        for instance in service_instances:
+            instance.availability_listeners.append(group.on_availability)
+        if self.outlier_detection is not None:
+            self.detectors[service_name] = outlier.OutlierDetector(
+                service_name,
+                service_instances,
+                group,
+                self.metrics_collector,
+                clock=self.clock,
+                **self.outlier_detection)
 
-    def get_instance(self, service_name: str) -> service.Service:
-        """Получение инстанса сервиса"""
-        available = [
-            (instance, weight) for instance, weight in self.instances.get(
-                service_name, []) if instance.available]
-        if not available:
+    def get_instance(
+            self,
+            service_name: str,
+            exclude: str | None = None) -> service.Service:
+        """Получение инстанса сервиса; exclude — имя инстанса, которого
+        следует избегать, пока доступны другие"""
+        group = self.groups.get(service_name)
+        detector = self.detectors.get(service_name)
+        if detector is not None:
+            detector.refresh(self.clock.now())
+            if group is not None and not group.has_available():
+                detector.refresh(self.clock.now(), panic=True)
+        if group is None or not group.has_available():
             raise Exception(f"Все экземпляры {service_name} недоступны")
+        return group.select_excluding(exclude)
 
-        total_weight = sum(w for _, w in available)
-        r = random.uniform(0, total_weight)
-        upto = 0
-        for s, w in available:
-            if upto + w >= r:
-                return s
-            upto += w
-        return available[-1][0]
+    def report(
+            self,
+            service_name: str,
+            instance: service.Service,
+            latency: float,
+            success: bool = True):
+        """Обратная связь о результате и задержке ответа инстанса"""
+        group = self.groups.get(service_name)
+        if group is not None and success:
+            group.on_result(instance, latency)
+        detector = self.detectors.get(service_name)
+        if detector is not None:
+            detector.record(instance, success)
@@ -0,0 +1,177 @@
+from app.clock import clock
+from app.metrics import metrics
+from app.services import service
+from . import strategies
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Автомат closed/open/half-open одного инстанса.
+
+    Срабатывает по серии подряд идущих ошибок или по доле ошибок за
+    скользящее окно из window секундных корзин (при не менее min_requests
+    запросах в окне).
+    """
+
+    def __init__(
+            self,
+            consecutive_failures: int = 5,
+            error_rate: float = 0.5,
+            min_requests: int = 10,
+            window: int = 10):
+        self.consecutive_failures = consecutive_failures
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.state = CLOSED
+        self.consecutive = 0
+        self.ejections = 0
+        self.open_until = 0.0
+        # Момент последнего перехода в closed
+        self.closed_at = 0.0
+        self.seconds = [-1] * window
+        self.totals = [0] * window
+        self.errors = [0] * window
+
+    def record(self, now: float, success: bool):
+        second = int(now)
+        i = second % self.window
+        if self.seconds[i] != second:
+            self.seconds[i] = second
+            self.totals[i] = 0
+            self.errors[i] = 0
+        self.totals[i] += 1
+        if success:
+            self.consecutive = 0
+        else:
+            self.errors[i] += 1
+            self.consecutive += 1
+
+    def tripped(self, now: float) -> bool:
+        if self.consecutive >= self.consecutive_failures:
+            return True
+        oldest = int(now) - self.window
+        total = errors = 0
+        for second, count, failed in zip(self.seconds, self.totals, self.errors):
+            if second > oldest:
+                total += count
+                errors += failed
+        return total >= self.min_requests and errors >= self.error_rate * total
+
+    def reset(self):
+        self.consecutive = 0
+        self.seconds = [-1] * self.window
+
+
+class OutlierDetector:
+    """Исключение инстансов группы из балансировки, как outlier detection в Envoy.
+
+    Сработавший автомат исключает инстанс на base_ejection_time, умноженное
+    на число его исключений (но не больше max_ejection_time), если исключённых
+    не станет больше max_ejection_percent группы. По истечении срока инстанс
+    возвращается в ротацию в состоянии half-open с долей half_open_weight
+    своего веса: первый успешный ответ закрывает автомат и возвращает
+    полный вес, первая ошибка исключает инстанс снова. Множитель
+    исключений, как в Envoy, уменьшается на единицу за каждые
+    decay_interval секунд, проведённых инстансом в состоянии closed.
+    """
+
+    def __init__(
+            self,
+            group: str,
+            instances: list[service.Service],
+            strategy: strategies.Strategy,
+            metrics_collector: metrics.MetricsCollector | None = None,
+            clock: clock.Clock = clock.default_clock,
+            consecutive_failures: int = 5,
+            error_rate: float = 0.5,
+            min_requests: int = 10,
+            window: int = 10,
+            base_ejection_time: float = 5.0,
+            max_ejection_time: float = 60.0,
+            max_ejection_percent: float = 50.0,
+            half_open_weight: float = 0.1,
+            decay_interval: float = 10.0):
+        self.group = group
+        self.strategy = strategy
+        self.metrics_collector = metrics_collector
+        self.clock = clock
+        self.base_ejection_time = base_ejection_time
+        self.max_ejection_time = max_ejection_time
+        self.half_open_weight = half_open_weight
+        self.decay_interval = decay_interval
+        self.max_ejected = (
+            max(1, int(len(instances) * max_ejection_percent / 100))
+            if max_ejection_percent > 0 else 0)
+        self.breakers = {
+            id(instance): CircuitBreaker(
+                consecutive_failures, error_rate, min_requests, window)
+            for instance in instances}
+        self.ejected: dict[int, service.Service] = {}
+
+    def refresh(self, now: float, panic: bool = False):
+        """Возврат в ротацию инстансов, у которых истёк срок исключения.
+
+        В режиме panic (в группе не осталось доступных инстансов)
+        возвращаются все исключённые.
+        """
+        for key, instance in list(self.ejected.items()):
+            breaker = self.breakers[key]
+            if panic or breaker.open_until <= now:
+                breaker.state = HALF_OPEN
+                del self.ejected[key]
+                self.strategy.set_probing(instance, self.half_open_weight)
+                self.strategy.set_ejected(instance, False)
+                self._event(instance, "restore", now)
+
+    def record(self, instance: service.Service, success: bool):
+        """Учёт результата запроса к инстансу"""
+        now = self.clock.now()
+        self.refresh(now)
+        breaker = self.breakers[id(instance)]
+        if breaker.state == OPEN:
+            # Ответ на запрос, отправленный до исключения
+            return
+        if breaker.state == HALF_OPEN:
+            if success:
+                breaker.state = CLOSED
+                breaker.closed_at = now
+                breaker.reset()
+                self.strategy.set_probing(instance, None)
+            elif self._can_eject(instance):
+                self._eject(instance, breaker, now)
+            return
+        breaker.record(now, success)
+        if (not success
+                and breaker.tripped(now)
+                and self._can_eject(instance)):
+            self._eject(instance, breaker, now)
+
+    def _can_eject(self, instance: service.Service) -> bool:
+        """Лимит исключённых не превышен и в группе останется живой инстанс"""
+        if len(self.ejected) >= self.max_ejected:
+            return False
+        tree = self.strategy.tree
+        own = tree.weights[self.strategy.index[id(instance)]]
+        return tree.total - own > 0
+
+    def _eject(self, instance: service.Service, breaker: CircuitBreaker, now: float):
+        if breaker.state == CLOSED and breaker.ejections:
+            healthy = int((now - breaker.closed_at) // self.decay_interval)
+            breaker.ejections = max(0, breaker.ejections - healthy)
+        breaker.ejections += 1
+        breaker.state = OPEN
+        breaker.open_until = now + min(
+            self.max_ejection_time, self.base_ejection_time * breaker.ejections)
+        breaker.reset()
+        self.ejected[id(instance)] = instance
+        self.strategy.set_ejected(instance, True)
+        self._event(instance, "eject", now)
+
+    def _event(self, instance: service.Service, event: str, now: float):
+        if self.metrics_collector is not None:
+            self.metrics_collector.record_outlier_event(
+                self.group, instance.name, event, now)
@@ -0,0 +1,203 @@
+from app.metrics import metrics
+from app.rng import streams
+from app.services import service
+
+
+class WeightTree:
+    """Дерево Фенвика над весами инстансов.
+
+    Изменение веса и выбор инстанса по случайной точке в сумме весов
+    выполняются за O(log n).
+    """
+
+    def __init__(self, weights: list[float]):
+        self.size = len(weights)
+        self.weights = [0.0] * self.size
+        self.tree = [0.0] * (self.size + 1)
+        self.total = 0.0
+        for i, weight in enumerate(weights):
+            self.set(i, weight)
+
+    def set(self, index: int, weight: float):
+        delta = weight - self.weights[index]
+        if not delta:
+            return
+        self.weights[index] = weight
+        self.total += delta
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def find(self, point: float) -> int:
+        """Индекс инстанса, на отрезок которого попадает point из [0, total)"""
+        index = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = index + step
+            if nxt <= self.size and self.tree[nxt] <= point:
+                index = nxt
+                point -= self.tree[nxt]
+            step >>= 1
+        return min(index, self.size - 1)
+
+
+class Strategy:
+    """Стратегия выбора инстанса внутри группы одного сервиса"""
+
+    def __init__(
+            self,
+            instances: list[service.Service],
+            weights: list[int],
+            rng: streams.RandomStream,
+            metrics_collector: metrics.MetricsCollector | None = None):
+        self.instances = instances
+        self.weights = weights
+        self.rng = rng
+        self.metrics_collector = metrics_collector
+        self.index = {id(instance): i for i, instance in enumerate(instances)}
+        self.names = {instance.name: i for i, instance in enumerate(instances)}
+        self.ejected: set[int] = set()
+        # Доля веса инстансов, получающих пробный трафик
+        self.probing: dict[int, float] = {}
+        self.tree = WeightTree([
+            weight if instance.available else 0
+            for instance, weight in zip(instances, weights)])
+
+    def on_availability(self, instance: service.Service):
+        """Инкрементальное обновление при смене доступности инстанса"""
+        i = self.index[id(instance)]
+        usable = instance.available and id(instance) not in self.ejected
+        share = self.probing.get(id(instance), 1.0)
+        self.tree.set(i, self.weights[i] * share if usable else 0)
+
+    def set_ejected(self, instance: service.Service, ejected: bool):
+        """Исключение инстанса из выбора детектором выбросов"""
+        if ejected:
+            self.ejected.add(id(instance))
+        else:
+            self.ejected.discard(id(instance))
+        self.on_availability(instance)
+
+    def set_probing(self, instance: service.Service, share: float | None):
+        """Пробный трафик на инстанс: доля share его веса (None — полный вес)"""
+        if share is None:
+            self.probing.pop(id(instance), None)
+        else:
+            self.probing[id(instance)] = share
+        self.on_availability(instance)
+
+    def on_result(self, instance: service.Service, latency: float):
+        """Обратная связь о завершённом запросе"""
+
+    def has_available(self) -> bool:
+        return self.tree.total > 0
+
+    def weighted_random(self) -> service.Service:
+        return self.instances[self.tree.find(self.rng.random() * self.tree.total)]
+
+    def select(self) -> service.Service:
+        raise NotImplementedError
+
+    def select_excluding(self, exclude: str | None) -> service.Service:
+        """Выбор инстанса с именем, отличным от exclude, если такой доступен.
+
+        Вес исключённого инстанса на время выбора обнуляется, поэтому
+        подходит любая стратегия.
+        """
+        i = self.names.get(exclude)
+        weight = self.tree.weights[i] if i is not None else 0
+        if not weight or weight >= self.tree.total:
+            return self.select()
+        self.tree.set(i, 0)
+        try:
+            return self.select()
+        finally:
+            self.tree.set(i, weight)
+
+    def outstanding(self, instance: service.Service) -> int:
+        if self.metrics_collector is None:
+            return 0
+        stats = self.metrics_collector.load_stats.get(instance.name)
+        return stats["active"] if stats else 0
+
+
+class WeightedRandom(Strategy):
+    """Случайный выбор пропорционально весам за O(log n)"""
+
+    def select(self):
+        return self.weighted_random()
+
+
+class SmoothWeightedRoundRobin(Strategy):
+    """Плавный взвешенный round-robin, как в nginx"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.current = [0.0] * len(self.instances)
+
+    def select(self):
+        best = None
+        for i, weight in enumerate(self.tree.weights):
+            if not weight:
+                continue
+            self.current[i] += weight
+            if best is None or self.current[i] > self.current[best]:
+                best = i
+        self.current[best] -= self.tree.total
+        return self.instances[best]
+
+
+class LeastOutstanding(Strategy):
+    """Инстанс с наименьшим числом запросов в обработке (с учётом веса)"""
+
+    def select(self):
+        best = None
+        best_score = 0.0
+        for i, weight in enumerate(self.tree.weights):
+            if not weight:
+                continue
+            score = (self.outstanding(self.instances[i]) + 1) / weight
+            if best is None or score < best_score:
+                best, best_score = i, score
+        return self.instances[best]
+
+
+class PowerOfTwoChoices(Strategy):
+    """Из двух взвешенно-случайных инстансов выбирается менее загруженный"""
+
+    def cost(self, instance: service.Service) -> float:
+        return self.outstanding(instance)
+
+    def select(self):
+        first = self.weighted_random()
+        second = self.weighted_random()
+        return first if self.cost(first) <= self.cost(second) else second
+
+
+class EwmaLatency(PowerOfTwoChoices):
+    """Выбор по экспоненциально сглаженной задержке и текущей нагрузке"""
+
+    def __init__(self, *args, alpha: float = 0.2, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.alpha = alpha
+        self.ewma: dict[int, float] = {}
+
+    def on_result(self, instance, latency):
+        key = id(instance)
+        previous = self.ewma.get(key)
+        self.ewma[key] = latency if previous is None else (
+            previous + self.alpha * (latency - previous))
+
+    def cost(self, instance):
+        # Непрогретые инстансы считаются быстрыми, чтобы получить пробный трафик
+        return self.ewma.get(id(instance), 0.0) * (self.outstanding(instance) + 1)
+
+
+STRATEGIES = {
+    "weighted": WeightedRandom,
+    "swrr": SmoothWeightedRoundRobin,
+    "least_outstanding": LeastOutstanding,
+    "p2c": PowerOfTwoChoices,
+    "ewma": EwmaLatency,
+}
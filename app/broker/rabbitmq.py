@@ -1,56 +1,220 @@
 import asyncio
-import random
-import time
+import os
+from collections import deque
+from typing import Awaitable, Callable
+from app.clock import clock
+from app.logger import logger as context_logger
 from app.models import models
 from app.metrics import metrics
+from app.rng import streams
+from .segment_log import SegmentedLog
+from .topics import DurableTopic, MemoryTopic
+
+OVERFLOW_POLICIES = ("backpressure", "drop_head", "reject_publish")
+
+
+class PublishRejected(Exception):
+    """Брокер не подтвердил публикацию (nack)"""
 
 
 class RabbitMQ:
-    """Имитация брокера сообщений с метриками."""
+    """Имитация брокера сообщений с метриками.
+
+    Публикации копятся в буфере и отправляются пакетами до batch_size
+    сообщений (пакет ждёт заполнения не дольше linger) по channels
+    каналам параллельно; издатель получает подтверждение (publisher
+    confirm) после помещения сообщения в очередь. Очереди ограничены
+    queue_size сообщениями, при переполнении:
+
+    - backpressure — канал ждёт места в очереди, задерживая подтверждения;
+    - drop_head — вытесняется самое старое сообщение очереди;
+    - reject_publish — новое сообщение отклоняется (nack).
+
+    Подписчик обслуживается пулом из consumers потребителей, каждый
+    забирает за одно обращение к брокеру до prefetch сообщений.
+
+    При заданном persistence очереди хранятся в сегментированных журналах
+    на диске в каталоге persistence["path"] (по подкаталогу на тему):
+    подтверждение публикации приходит после записи пакета в журнал,
+    смещения потребителей фиксируются, и сообщения переживают перезапуск.
+    Остальные ключи persistence — параметры SegmentedLog и write_latency.
+    """
 
     def __init__(
             self,
             name: str,
             metrics_collector: metrics.MetricsCollector,
-            base_latency=0.02):
+            base_latency=0.02,
+            fail_prob: float = 0.02,
+            queue_size: int = 10000,
+            overflow: str = "backpressure",
+            batch_size: int = 50,
+            linger: float = 0.005,
+            channels: int = 4,
+            consumers: int = 4,
+            prefetch: int = 10,
+            persistence: dict | None = None,
+            clock: clock.Clock = clock.default_clock,
+            rng: streams.RandomStream | None = None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Неизвестная политика переполнения: {overflow}")
         self.name = name
         self.metrics = metrics_collector
-        self.queues = {}
+        self.queues: dict[str, MemoryTopic | DurableTopic] = {}
         self.base_latency = base_latency
+        self.fail_prob = fail_prob
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.linger = linger
+        self.channels = channels
+        self.consumers = consumers
+        self.prefetch = prefetch
+        self.persistence = persistence
+        self.clock = clock
+        self.rng = rng or streams.default_factory.stream(name)
+        self.outbox: deque[tuple[models.Message, asyncio.Future]] = deque()
+        self.outbox_signal: asyncio.Event | None = None
+        self.channel_tasks: list[asyncio.Task] = []
 
-    async def publish(self, msg: models.Message):
-        start = time.time()
-        await asyncio.sleep(random.uniform(self.base_latency, self.base_latency * 2))
+    def round_trip(self) -> float:
+        return self.rng.uniform(self.base_latency, self.base_latency * 2)
 
-        if random.random() < 0.02:
-            self.metrics.record_broker_event(success=False)
-            raise Exception(f"Broker publish error to {msg.topic}")
+    def queue(self, topic: str) -> MemoryTopic | DurableTopic:
+        if topic not in self.queues:
+            if self.persistence is None:
+                self.queues[topic] = MemoryTopic(self.queue_size)
+            else:
+                options = dict(self.persistence)
+                path = os.path.join(options.pop("path"), topic)
+                write_latency = options.pop("write_latency", 0.002)
+                self.queues[topic] = DurableTopic(
+                    topic,
+                    SegmentedLog(path, **options),
+                    self.queue_size,
+                    write_latency=write_latency,
+                    metrics_collector=self.metrics,
+                    clock=self.clock)
+        return self.queues[topic]
 
-        if msg.topic not in self.queues:
-            self.queues[msg.topic] = asyncio.Queue()
+    async def publish(self, msg: models.Message):
+        """Публикация с ожиданием подтверждения брокера"""
+        if not self.channel_tasks:
+            self.outbox_signal = asyncio.Event()
+            self.channel_tasks = [
+                asyncio.create_task(self.channel()) for _ in range(self.channels)]
+        start = self.clock.now()
+        future = asyncio.get_running_loop().create_future()
+        self.outbox.append((msg, future))
+        self.outbox_signal.set()
+        try:
+            await future
+        except Exception:
+            self.metrics.record_broker_event(success=False)
+            raise
+        self.metrics.record_broker_event(success=True, latency=self.clock.now() - start)
 
-        msg.payload["timestamp"] = time.time()
-        await self.queues[msg.topic].put(msg.payload)
+    async def channel(self):
+        """Канал издателя: отправка пакетов из буфера и подтверждения"""
+        while True:
+            if not self.outbox:
+                self.outbox_signal.clear()
+                await self.outbox_signal.wait()
+                continue
+            if len(self.outbox) < self.batch_size and self.linger:
+                await asyncio.sleep(self.linger)
+            batch = [
+                self.outbox.popleft()
+                for _ in range(min(self.batch_size, len(self.outbox)))]
+            if not batch:
+                continue
+            self.metrics.record_broker_batch(len(batch))
+            await asyncio.sleep(self.round_trip())
+            errors = []
+            for msg, _ in batch:
+                if self.rng.random() < self.fail_prob:
+                    errors.append(PublishRejected(f"Broker publish error to {msg.topic}"))
+                else:
+                    errors.append(await self.enqueue(msg))
+            # Подтверждения — только после записи пакета в очереди
+            for topic in {msg.topic for msg, _ in batch}:
+                await self.queue(topic).flush()
+            for (_, future), error in zip(batch, errors):
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
 
-        end = time.time()
-        latency = end - start
-        self.metrics.record_broker_event(success=True, latency=latency)
-        # self.metrics.record_broker_queue_size(msg.topic, self.queues[msg.topic].qsize())
+    async def enqueue(self, msg: models.Message) -> Exception | None:
+        """Помещение сообщения в очередь темы по политике переполнения"""
+        queue = self.queue(msg.topic)
+        if queue.full():
+            if self.overflow == "reject_publish":
+                self.metrics.record_broker_drop(msg.topic)
+                return PublishRejected(f"Очередь {msg.topic} заполнена")
+            if self.overflow == "drop_head":
+                queue.drop_head()
+                self.metrics.record_broker_drop(msg.topic)
+        msg.enqueued = self.clock.now()
+        await queue.put(msg)
+        self.metrics.record_broker_queue_size(msg.topic, queue.qsize())
+        return None
 
-    async def consume(self, topic: str):
-        """Получение сообщения из очереди с измерением задержки доставки."""
-        if topic not in self.queues:
-            return None, 0
+    def subscribe(
+            self,
+            topic: str,
+            handler: Callable[[models.Message, float], Awaitable[None]]
+    ) -> list[asyncio.Task]:
+        """Запуск пула потребителей темы; handler получает сообщение и
+        задержку доставки от публикации"""
+        return [
+            asyncio.create_task(self.consume(topic, handler))
+            for _ in range(self.consumers)]
 
-        try:
-            msg = await asyncio.wait_for(self.queues[topic].get(), timeout=1)
+    async def consume(
+            self,
+            topic: str,
+            handler: Callable[[models.Message, float], Awaitable[None]]):
+        """Потребитель: забирает до prefetch сообщений и подтверждает их после обработки"""
+        logger = context_logger.get_logger()
+        queue = self.queue(topic)
+        while True:
+            batch, token = await queue.get(self.prefetch)
+            self.metrics.record_broker_queue_size(topic, queue.qsize())
+            await asyncio.sleep(self.round_trip())
+            try:
+                for msg in batch:
+                    delay = self.clock.now() - msg.timestamp
+                    self.metrics.record_broker_delivery(delay)
+                    try:
+                        await handler(msg, delay)
+                    except Exception as e:
+                        logger.error("Ошибка обработки сообщения %s: %s", topic, e)
+            finally:
+                queue.done(token)
 
-            self.queues[topic].task_done()
-            # self.metrics.record_broker_queue_size(topic, self.queues[topic].qsize())
+    async def replay(
+            self,
+            topic: str,
+            handler: Callable[[models.Message, float], Awaitable[None]]) -> int:
+        """Повторная подача сохранённого журнала темы обработчику.
 
-            delay = time.time() - msg["timestamp"]
-            # self.metrics.record_broker_event(success=True, latency=delay)
+        Задержка, передаваемая handler, — время от публикации до записи
+        сообщения в журнал в исходном прогоне. Смещение потребителей не
+        меняется. Возвращает число сообщений.
+        """
+        queue = self.queue(topic)
+        if not isinstance(queue, DurableTopic):
+            raise ValueError("Повтор доступен только для брокера с persistence")
+        count = 0
+        for msg in queue.replay():
+            await handler(msg, msg.enqueued - msg.timestamp)
+            count += 1
+        return count
 
-            return msg, delay
-        except asyncio.TimeoutError:
-            return None, 0
+    def close(self):
+        """Сброс журналов на диск"""
+        for queue in self.queues.values():
+            queue.close()
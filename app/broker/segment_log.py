@@ -0,0 +1,321 @@
+import bisect
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from array import array
+from typing import Any
+
+FSYNC_POLICIES = ("batch", "interval", "never")
+
+# offset, время публикации, время постановки в очередь, длина данных, crc32 данных
+RECORD_HEADER = struct.Struct("<QddII")
+SEGMENT_SUFFIX = ".log"
+
+
+class Segment:
+    """Файл журнала с записями, начиная с base_offset.
+
+    Запись дописывается в конец одним write на пакет, чтение идёт через
+    mmap: заголовки разбираются прямо в отображённой памяти, без
+    системных вызовов read. Индекс offset → позиция хранится в памяти и
+    восстанавливается сканированием файла при открытии.
+    """
+
+    def __init__(self, directory: str, base_offset: int):
+        self.base_offset = base_offset
+        self.path = os.path.join(directory, f"{base_offset:020d}{SEGMENT_SUFFIX}")
+        self.offsets = array("Q")
+        self.positions = array("Q")
+        self.size = 0
+        self.writer = None
+        self.reader = None
+        self.map: mmap.mmap | None = None
+        if os.path.exists(self.path):
+            self._recover()
+
+    def _recover(self):
+        """Восстановление индекса; недописанный хвост файла отрезается"""
+        with open(self.path, "rb") as f:
+            data = f.read()
+        position = 0
+        while position + RECORD_HEADER.size <= len(data):
+            offset, _, _, length, crc = RECORD_HEADER.unpack_from(data, position)
+            end = position + RECORD_HEADER.size + length
+            if end > len(data) or zlib.crc32(
+                    data[position + RECORD_HEADER.size:end]) != crc:
+                break
+            self.offsets.append(offset)
+            self.positions.append(position)
+            position = end
+        if position < len(data):
+            with open(self.path, "r+b") as f:
+                f.truncate(position)
+        self.size = position
+
+    @property
+    def next_offset(self) -> int:
+        return self.offsets[-1] + 1 if self.offsets else self.base_offset
+
+    def _encode(self, records: list[tuple[int, float, float, bytes]]) -> bytes:
+        """Сериализация записей с добавлением их в индекс"""
+        chunks = []
+        for offset, timestamp, enqueued, data in records:
+            self.offsets.append(offset)
+            self.positions.append(self.size)
+            chunks.append(RECORD_HEADER.pack(
+                offset, timestamp, enqueued, len(data), zlib.crc32(data)))
+            chunks.append(data)
+            self.size += RECORD_HEADER.size + len(data)
+        return b"".join(chunks)
+
+    def append(self, records: list[tuple[int, float, float, bytes]]):
+        if self.writer is None:
+            self.writer = open(self.path, "ab")
+        self.writer.write(self._encode(records))
+        self.writer.flush()
+
+    def rewrite(self, records: list[tuple[int, float, float, bytes]]):
+        """Атомарная замена содержимого закрытого сегмента"""
+        self.close()
+        self.offsets = array("Q")
+        self.positions = array("Q")
+        self.size = 0
+        temporary = self.path + ".cleaned"
+        with open(temporary, "wb") as f:
+            f.write(self._encode(records))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+
+    def sync(self):
+        if self.writer is not None:
+            os.fsync(self.writer.fileno())
+
+    def _mapped(self) -> mmap.mmap:
+        """Отображение файла, расширяемое по мере его роста"""
+        if self.map is None or len(self.map) < self.size:
+            self.unmap()
+            self.reader = open(self.path, "rb")
+            self.map = mmap.mmap(self.reader.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.map
+
+    def read(self, offset: int, limit: int) -> list[tuple[int, float, float, bytes]]:
+        """До limit записей с offset не меньше заданного"""
+        start = bisect.bisect_left(self.offsets, offset)
+        if start >= len(self.offsets):
+            return []
+        view = self._mapped()
+        records = []
+        for i in range(start, min(len(self.offsets), start + limit)):
+            position = self.positions[i]
+            record_offset, timestamp, enqueued, length, _ = RECORD_HEADER.unpack_from(
+                view, position)
+            begin = position + RECORD_HEADER.size
+            records.append((record_offset, timestamp, enqueued, view[begin:begin + length]))
+        return records
+
+    def unmap(self):
+        if self.map is not None:
+            self.map.close()
+            self.reader.close()
+            self.map = self.reader = None
+
+    def close(self):
+        self.unmap()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def delete(self):
+        self.close()
+        os.remove(self.path)
+
+
+class SegmentedLog:
+    """Сегментированный журнал сообщений одной темы на диске.
+
+    Сообщения дописываются пакетами в активный сегмент; по достижении
+    segment_bytes открывается новый. Политика fsync: batch — после
+    каждого пакета, interval — не чаще раза в fsync_interval секунд,
+    never — на усмотрение ОС. Старые сегменты удаляются, если журнал
+    превышает retention_bytes. При заданном compact_key закрытый сегмент,
+    в котором вытесненные более поздними сообщения с тем же значением
+    этого поля составляют не меньше min_dirty_ratio записей, переписывается
+    без них. Индекс ключ → смещение последнего сообщения и число
+    вытесненных записей по сегментам ведутся в памяти при записи, поэтому
+    компакция читает только переписываемые сегменты. Смещения групп
+    потребителей хранятся в offsets.json и сохраняются не чаще раза в
+    commit_interval секунд (при fsync=batch — при каждой фиксации).
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            segment_bytes: int = 16 * 1024 * 1024,
+            fsync: str = "interval",
+            fsync_interval: float = 1.0,
+            retention_bytes: int | None = None,
+            compact_key: str | None = None,
+            min_dirty_ratio: float = 0.5,
+            commit_interval: float = 1.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Неизвестная политика fsync: {fsync}")
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.retention_bytes = retention_bytes
+        self.compact_key = compact_key
+        self.min_dirty_ratio = min_dirty_ratio
+        self.commit_interval = commit_interval
+        self.last_sync = self.last_commit = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        self.segments = [
+            Segment(directory, int(name[:-len(SEGMENT_SUFFIX)]))
+            for name in sorted(os.listdir(directory))
+            if name.endswith(SEGMENT_SUFFIX)]
+        if not self.segments:
+            self.segments.append(Segment(directory, 0))
+        self.offsets_path = os.path.join(directory, "offsets.json")
+        self.committed: dict[str, int] = {}
+        if os.path.exists(self.offsets_path):
+            with open(self.offsets_path, encoding="utf-8") as f:
+                self.committed = json.load(f)
+        # Ключ компакции → смещение последнего сообщения с ним
+        self.latest: dict[Any, int] = {}
+        # Начало сегмента → число вытесненных записей в нём
+        self.dirty: dict[int, int] = {}
+        if compact_key is not None:
+            for segment in self.segments:
+                for offset, _, _, data in segment.read(0, len(segment.offsets)):
+                    self._track(json.loads(data), offset)
+
+    @property
+    def start_offset(self) -> int:
+        for segment in self.segments:
+            if segment.offsets:
+                return segment.offsets[0]
+        return self.end_offset
+
+    @property
+    def end_offset(self) -> int:
+        """Смещение, которое получит следующее сообщение"""
+        return self.segments[-1].next_offset
+
+    @property
+    def size(self) -> int:
+        return sum(segment.size for segment in self.segments)
+
+    def append(self, messages: list[tuple[float, float, Any]]) -> int:
+        """Запись пакета (время публикации, время постановки в очередь, данные);
+        возвращает смещение последнего сообщения"""
+        active = self.segments[-1]
+        if active.size >= self.segment_bytes:
+            active = self._roll()
+        offset = active.next_offset
+        records = []
+        for timestamp, enqueued, payload in messages:
+            records.append((offset, timestamp, enqueued, json.dumps(payload).encode()))
+            if self.compact_key is not None:
+                self._track(payload, offset)
+            offset += 1
+        active.append(records)
+        now = time.monotonic()
+        if self.fsync == "batch" or (
+                self.fsync == "interval" and now - self.last_sync >= self.fsync_interval):
+            active.sync()
+            self.last_sync = now
+        return offset - 1
+
+    def read(self, offset: int, limit: int) -> list[tuple[int, float, float, Any]]:
+        """До limit сообщений начиная с offset (пропуски после компакции
+        и удаления сегментов перескакиваются)"""
+        bases = [segment.base_offset for segment in self.segments]
+        index = max(0, bisect.bisect_right(bases, offset) - 1)
+        records = []
+        for segment in self.segments[index:]:
+            for record_offset, timestamp, enqueued, data in segment.read(
+                    offset, limit - len(records)):
+                records.append((record_offset, timestamp, enqueued, json.loads(data)))
+            if len(records) >= limit:
+                break
+        return records
+
+    def commit(self, group: str, offset: int):
+        """Смещение, с которого группа продолжит чтение"""
+        self.committed[group] = offset
+        now = time.monotonic()
+        if self.fsync == "batch" or now - self.last_commit >= self.commit_interval:
+            self._save_offsets()
+            self.last_commit = now
+
+    def _save_offsets(self):
+        temporary = self.offsets_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(self.committed, f)
+            if self.fsync == "batch":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temporary, self.offsets_path)
+
+    def _roll(self) -> Segment:
+        active = self.segments[-1]
+        active.sync()
+        active.close()
+        self.segments.append(Segment(self.directory, active.next_offset))
+        if self.compact_key is not None:
+            self.compact()
+        if self.retention_bytes is not None:
+            self._enforce_retention()
+        return self.segments[-1]
+
+    def _enforce_retention(self):
+        while len(self.segments) > 1 and self.size > self.retention_bytes:
+            segment = self.segments.pop(0)
+            self.dirty.pop(segment.base_offset, None)
+            segment.delete()
+
+    def _track(self, payload: Any, offset: int):
+        key = payload.get(self.compact_key)
+        if key is None:
+            return
+        previous = self.latest.get(key)
+        self.latest[key] = offset
+        if previous is None:
+            return
+        i = bisect.bisect_right(self.segments, previous, key=lambda segment: segment.base_offset)
+        if i:
+            # Сегменты до первого уже удалены по retention_bytes
+            base = self.segments[i - 1].base_offset
+            self.dirty[base] = self.dirty.get(base, 0) + 1
+
+    def compact(self):
+        """Переписать закрытые сегменты с долей вытесненных записей не
+        меньше min_dirty_ratio, оставив последнее сообщение по compact_key"""
+        compacted = []
+        for segment in self.segments[:-1]:
+            dirty = self.dirty.get(segment.base_offset, 0)
+            if not dirty or dirty < self.min_dirty_ratio * len(segment.offsets):
+                compacted.append(segment)
+                continue
+            del self.dirty[segment.base_offset]
+            records = [
+                (offset, timestamp, enqueued, data)
+                for offset, timestamp, enqueued, data in segment.read(0, len(segment.offsets))
+                if self.latest.get(json.loads(data).get(self.compact_key), offset) == offset]
+            if not records:
+                segment.delete()
+                continue
+            segment.rewrite(records)
+            compacted.append(segment)
+        self.segments[:-1] = compacted
+
+    def close(self):
+        if self.committed:
+            self._save_offsets()
+        for segment in self.segments:
+            segment.sync()
+            segment.close()
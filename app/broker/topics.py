@@ -0,0 +1,155 @@
+import asyncio
+from app.clock import clock
+from app.metrics import metrics
+from app.models import models
+from .segment_log import SegmentedLog
+
+
+class MemoryTopic:
+    """Очередь темы в памяти брокера"""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue[models.Message] = asyncio.Queue(maxsize)
+
+    def qsize(self) -> int:
+        return self.queue.qsize()
+
+    def full(self) -> bool:
+        return self.queue.full()
+
+    def drop_head(self):
+        self.queue.get_nowait()
+        self.queue.task_done()
+
+    async def put(self, msg: models.Message):
+        await self.queue.put(msg)
+
+    async def flush(self):
+        pass
+
+    async def get(self, limit: int) -> tuple[list[models.Message], int]:
+        """Пакет до limit сообщений и метка для подтверждения его обработки"""
+        batch = [await self.queue.get()]
+        while len(batch) < limit and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch, len(batch)
+
+    def done(self, token: int):
+        for _ in range(token):
+            self.queue.task_done()
+
+    def close(self):
+        pass
+
+
+class DurableTopic:
+    """Очередь темы поверх журнала на диске.
+
+    Принятые сообщения копятся в буфере и записываются в журнал одним
+    пакетом при flush; запись пакета стоит write_latency модельного
+    времени. Потребители группы group читают журнал по общему курсору,
+    а смещение фиксируется по самому раннему ещё не обработанному
+    пакету, поэтому после перезапуска необработанные сообщения будут
+    доставлены снова. Если сегменты с непрочитанными сообщениями удалены
+    по retention_bytes журнала, курсор переходит на начало журнала, а
+    потерянные сообщения учитываются как отброшенные.
+    """
+
+    def __init__(
+            self,
+            topic: str,
+            log: SegmentedLog,
+            maxsize: int,
+            write_latency: float = 0.002,
+            group: str = "consumers",
+            metrics_collector: metrics.MetricsCollector | None = None,
+            clock: clock.Clock = clock.default_clock):
+        self.topic = topic
+        self.log = log
+        self.maxsize = maxsize
+        self.write_latency = write_latency
+        self.group = group
+        self.metrics_collector = metrics_collector
+        self.clock = clock
+        self.cursor = max(log.committed.get(group, 0), log.start_offset)
+        self.pending: list[models.Message] = []
+        self.in_flight: dict[int, int] = {}
+        self.appended = asyncio.Event()
+        self.consumed = asyncio.Event()
+
+    def qsize(self) -> int:
+        return self.log.end_offset + len(self.pending) - self.cursor
+
+    def full(self) -> bool:
+        return self.qsize() >= self.maxsize
+
+    def drop_head(self):
+        if self.cursor < self.log.end_offset:
+            self.cursor += 1
+        else:
+            self.pending.pop(0)
+
+    async def put(self, msg: models.Message):
+        while self.full():
+            # Буфер пакета должен попасть в журнал, иначе его не прочитают
+            await self.flush()
+            self.consumed.clear()
+            await self.consumed.wait()
+        self.pending.append(msg)
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        self.log.append([(msg.timestamp, msg.enqueued, msg.payload) for msg in batch])
+        self._skip_expired()
+        await asyncio.sleep(self.write_latency)
+        self.appended.set()
+
+    def _skip_expired(self):
+        """Перевод курсора за сегменты, удалённые по retention_bytes"""
+        lost = self.log.start_offset - self.cursor
+        if lost <= 0:
+            return
+        self.cursor = self.log.start_offset
+        if self.metrics_collector is not None:
+            self.metrics_collector.record_broker_drop(self.topic, lost)
+
+    def message(self, timestamp: float, enqueued: float, payload: dict) -> models.Message:
+        msg = models.Message(self.topic, payload, clock=self.clock)
+        msg.timestamp = timestamp
+        msg.enqueued = enqueued
+        return msg
+
+    async def get(self, limit: int) -> tuple[list[models.Message], int]:
+        """Пакет до limit сообщений и смещение его начала"""
+        while self.cursor >= self.log.end_offset:
+            self.appended.clear()
+            await self.appended.wait()
+        records = self.log.read(self.cursor, limit)
+        start = self.cursor
+        self.cursor = records[-1][0] + 1
+        self.in_flight[start] = self.cursor
+        self.consumed.set()
+        return [
+            self.message(timestamp, enqueued, payload)
+            for _, timestamp, enqueued, payload in records], start
+
+    def done(self, token: int):
+        del self.in_flight[token]
+        self.log.commit(self.group, min(self.in_flight, default=self.cursor))
+
+    def replay(self, offset: int | None = None, limit: int = 100):
+        """Все сообщения журнала с offset (по умолчанию — с начала) без
+        изменения смещения группы"""
+        offset = self.log.start_offset if offset is None else offset
+        while offset < self.log.end_offset:
+            records = self.log.read(offset, limit)
+            if not records:
+                break
+            for _, timestamp, enqueued, payload in records:
+                yield self.message(timestamp, enqueued, payload)
+            offset = records[-1][0] + 1
+
+    def close(self):
+        self.log.close()
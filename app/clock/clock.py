@@ -0,0 +1,75 @@
+import asyncio
+import selectors
+import time
+
+
+class Clock:
+    """Источник времени модели"""
+
+    def now(self) -> float:
+        raise NotImplementedError
+
+
+class MonotonicClock(Clock):
+    """Реальное монотонное время, не подверженное переводу системных часов.
+
+    Совпадает с часами стандартного событийного цикла asyncio.
+    """
+
+    def now(self) -> float:
+        return time.monotonic()
+
+
+class SimulatedClock(Clock):
+    """Модельное время, которое сдвигается только явно"""
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+
+    def now(self) -> float:
+        return self._now
+
+    def advance(self, delta: float):
+        self._now += delta
+
+
+default_clock = MonotonicClock()
+
+
+class VirtualTimeSelector:
+    """Селектор, который вместо ожидания таймера сдвигает виртуальное время"""
+
+    def __init__(
+            self,
+            clock: SimulatedClock,
+            selector: selectors.BaseSelector | None = None):
+        self._selector = selector or selectors.DefaultSelector()
+        self.clock = clock
+
+    def select(self, timeout: float | None = None):
+        if timeout is None:
+            # Таймеров нет — остаётся только ждать реального ввода-вывода
+            return self._selector.select(None)
+        events = self._selector.select(0)
+        if not events and timeout > 0:
+            self.clock.advance(timeout)
+        return events
+
+    def __getattr__(self, name: str):
+        return getattr(self._selector, name)
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """Событийный цикл с виртуальным временем.
+
+    Когда готовых к выполнению задач нет, цикл не спит, а сразу
+    переходит к ближайшему таймеру. Все asyncio.sleep, wait_for и
+    call_later модели отрабатывают без реального ожидания.
+    """
+
+    def __init__(self, clock: SimulatedClock | None = None):
+        self.clock = clock or SimulatedClock()
+        super().__init__(VirtualTimeSelector(self.clock))
+
+    def time(self) -> float:
+        return self.clock.now()
@@ -0,0 +1,150 @@
+"""Параллельные независимые прогоны модели (метод Монте-Карло).
+
+Запуск: python -m app.experiments.replications --runs 20 --duration 600
+"""
+import argparse
+import math
+import os
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from app.metrics import metrics
+from .simulation import simulate
+
+
+def seed_stream(base_seed: int, runs: int) -> list[int]:
+    """Независимые детерминированные сиды для каждого прогона"""
+    children = np.random.SeedSequence(base_seed).spawn(runs)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+
+def student_t_cdf(t: float, df: int) -> float:
+    """Функция распределения Стьюдента для целого df (Абрамовиц — Стиган, 26.7.3–26.7.4)"""
+    theta = math.atan(abs(t) / math.sqrt(df))
+    cos2 = math.cos(theta) ** 2
+    if df % 2:
+        # P(|T| < t) = 2/π (θ + sinθ cosθ (1 + 2/3 cos²θ + 2·4/(3·5) cos⁴θ + ...))
+        term, total = 1.0, 1.0 if df > 1 else 0.0
+        for k in range(2, df - 1, 2):
+            term *= k / (k + 1) * cos2
+            total += term
+        inside = 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * total)
+    else:
+        # P(|T| < t) = sinθ (1 + 1/2 cos²θ + 1·3/(2·4) cos⁴θ + ...)
+        term, total = 1.0, 1.0
+        for k in range(1, df - 2, 2):
+            term *= k / (k + 1) * cos2
+            total += term
+        inside = math.sin(theta) * total
+    return (1 + inside) / 2 if t >= 0 else (1 - inside) / 2
+
+
+def student_t_quantile(p: float, df: int) -> float:
+    """Квантиль распределения Стьюдента.
+
+    Берётся из scipy, если он установлен, иначе находится делением
+    отрезка по точной функции распределения student_t_cdf.
+    """
+    try:
+        from scipy import stats
+    except ImportError:
+        pass
+    else:
+        return float(stats.t.ppf(p, df))
+    if p < 0.5:
+        return -student_t_quantile(1 - p, df)
+    low, high = 0.0, 1.0
+    while student_t_cdf(high, df) < p:
+        low, high = high, 2 * high
+    for _ in range(100):
+        middle = (low + high) / 2
+        if student_t_cdf(middle, df) < p:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def confidence_interval(
+        values: list[float],
+        confidence: float = 0.95) -> tuple[float, float, float]:
+    """Среднее и границы доверительного интервала"""
+    mean = statistics.mean(values)
+    if len(values) < 2:
+        return mean, mean, mean
+    t = student_t_quantile((1 + confidence) / 2, len(values) - 1)
+    half = t * statistics.stdev(values) / math.sqrt(len(values))
+    return mean, mean - half, mean + half
+
+
+def replication_metrics(
+        collector: metrics.MetricsCollector,
+        duration: float) -> dict[str, float]:
+    """Скалярные показатели одного прогона"""
+    total = collector.successes + collector.errors
+    latency = collector.get_latency_stats()
+    result = {
+        "rps": total / duration,
+        "error_rate": collector.errors / total if total else 0,
+        "p95": latency["p95"],
+        "p99": latency["p99"],
+    }
+    for name, stats in collector.get_service_summary().items():
+        result[f"latency[{name}]"] = stats["avg_response"]
+    for name, stats in collector.get_cache_stats().items():
+        result[f"hit_ratio[{name}]"] = stats["hit_ratio"]
+    return result
+
+
+def run_replications(
+        runs: int,
+        duration: float,
+        base_seed: int = 0,
+        confidence: float = 0.95,
+        workers: int | None = None,
+        app_kwargs: dict | None = None):
+    """N независимых прогонов в пуле процессов.
+
+    Возвращает доверительные интервалы показателей и объединённый
+    MetricsCollector всех прогонов.
+    """
+    seeds = seed_stream(base_seed, runs)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        collectors = list(pool.map(
+            simulate,
+            seeds,
+            [duration] * runs,
+            [app_kwargs] * runs))
+
+    per_run = [replication_metrics(c, duration) for c in collectors]
+    names = sorted({name for run in per_run for name in run})
+    intervals = {
+        name: confidence_interval(
+            [run[name] for run in per_run if name in run], confidence)
+        for name in names}
+
+    merged = metrics.MetricsCollector()
+    for collector in collectors:
+        merged.merge(collector)
+    return intervals, merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    intervals, _ = run_replications(
+        args.runs, args.duration, args.seed, args.confidence, args.workers)
+    print(f"{'Показатель':<36} {'среднее':>10} {'нижн.':>10} {'верхн.':>10}")
+    for name, (mean, low, high) in intervals.items():
+        print(f"{name:<36} {mean:>10.4f} {low:>10.4f} {high:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import asyncio
+import logging
+from app.app import Application
+from app.clock import clock
+from app.logger import logger as context_logger
+from app.metrics import metrics
+
+
+def simulate(
+        seed: int,
+        duration: float,
+        app_kwargs: dict | None = None) -> metrics.MetricsCollector:
+    """Один прогон модели в виртуальном времени без графиков.
+
+    Функция верхнего уровня, чтобы её можно было запускать в
+    процессах пула.
+    """
+    model_clock = clock.SimulatedClock()
+    app = Application(
+        clock=model_clock, plot=False, seed=seed, **(app_kwargs or {}))
+    app.duration = duration
+
+    async def main():
+        async with context_logger.app_logger(level=logging.CRITICAL):
+            await app.run()
+
+    asyncio.run(
+        main(),
+        loop_factory=lambda: clock.VirtualTimeEventLoop(model_clock))
+    return app.metrics_collector
@@ -0,0 +1,250 @@
+"""Параллельный перебор параметров топологии и настроек модели.
+
+Запуск:
+    python -m app.experiments.sweep --space '{"payment_count": [1, 2, 3],
+        "balancer_weights": [[7, 3], [5, 5]]}' --duration 300 --out sweep.csv
+    python -m app.experiments.sweep --design lhs --samples 20 \\
+        --space '{"fail_prob": [0.01, 0.1], "replication_delay": [0.05, 0.5]}'
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from app.topology import builder
+from .replications import replication_metrics
+from .simulation import simulate
+
+# Параметры Application, которые можно перебирать
+KNOBS = (
+    "topology",
+    "balancer_weights",
+    "balancer_strategy",
+    "payment_count",
+    "data_count",
+    "public_count",
+    "base_latency_scale",
+    "fail_prob",
+    "replication_delay",
+    "replication_mode",
+    "read_routing",
+    "max_replica_lag",
+    "read_your_writes",
+    "cache_capacity",
+    "cache_eviction",
+    "popularity_skew",
+    "db_pool_size",
+    "db_acquire_timeout",
+    "workers",
+    "queue_size",
+    "shedding",
+    "keep_alive",
+    "multiplexing",
+    "deadline",
+    "max_retries",
+    "retry_budget",
+    "hedge",
+    "outlier_detection",
+    "broker_batch_size",
+    "broker_queue_size",
+    "broker_overflow",
+    "broker_consumers",
+    "broker_prefetch",
+)
+
+# Параметры числа инстансов и соответствующие им группы балансировщика
+COUNT_KNOBS = {
+    "payment_count": "PaymentService",
+    "data_count": "DataService",
+    "public_count": "PublicInfoService",
+}
+
+
+def _check_knobs(space: dict):
+    unknown = set(space) - set(KNOBS)
+    if unknown:
+        raise ValueError(f"Неизвестные параметры перебора: {sorted(unknown)}")
+
+
+def grid(space: dict[str, list]) -> list[dict]:
+    """Полный перебор: space — значения каждого параметра"""
+    _check_knobs(space)
+    names = list(space)
+    return [dict(zip(names, values))
+            for values in itertools.product(*(space[n] for n in names))]
+
+
+def _scale(low, high, u: float):
+    value = low + (high - low) * u
+    if isinstance(low, int) and isinstance(high, int):
+        return int(round(value))
+    return float(value)
+
+
+def latin_hypercube(
+        space: dict[str, tuple],
+        samples: int,
+        seed: int = 0) -> list[dict]:
+    """Латинский гиперкуб: space — границы [low, high] числовых параметров"""
+    _check_knobs(space)
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, (low, high) in space.items():
+        strata = (rng.permutation(samples) + rng.random(samples)) / samples
+        columns[name] = [_scale(low, high, u) for u in strata]
+    return [{name: columns[name][i] for name in space} for i in range(samples)]
+
+
+def random_design(space: dict, samples: int, seed: int = 0) -> list[dict]:
+    """Случайные точки: список — выбор варианта, пара чисел — интервал"""
+    _check_knobs(space)
+    rng = np.random.default_rng(seed)
+    points = []
+    for _ in range(samples):
+        point = {}
+        for name, values in space.items():
+            if len(values) == 2 and all(
+                    isinstance(v, (int, float)) for v in values):
+                point[name] = _scale(values[0], values[1], rng.random())
+            else:
+                point[name] = values[rng.integers(len(values))]
+        points.append(point)
+    return points
+
+
+def topology_digest(point: dict) -> str | None:
+    """Хэш содержимого файла топологии точки (None для топологии-словаря)"""
+    topology = point.get("topology")
+    if isinstance(topology, dict):
+        return None
+    with open(topology or builder.DEFAULT_TOPOLOGY, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def config_hash(point: dict, duration: float, seed: int) -> str:
+    key = json.dumps(
+        {"point": point, "topology": topology_digest(point),
+         "duration": duration, "seed": seed}, sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def instance_count(point: dict) -> int:
+    """Число инстансов сервисов в точке (включая Auth и Notification)"""
+    topology = point.get("topology")
+    if not isinstance(topology, dict):
+        topology = builder.load_topology(topology)
+    spec = builder.apply_overrides(topology, instance_counts={
+        group: point[knob] for knob, group in COUNT_KNOBS.items()
+        if point.get(knob) is not None})
+    return builder.count_instances(spec)
+
+
+def run_point(point: dict, duration: float, seed: int, cache_dir: str) -> dict:
+    """Прогон одной точки; результат сохраняется в кэш на диске"""
+    collector = simulate(seed, duration, point)
+    row = {**point, "instances": instance_count(point)}
+    row.update(replication_metrics(collector, duration))
+    path = os.path.join(cache_dir, config_hash(point, duration, seed) + ".json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(row, f)
+    os.replace(tmp_path, path)
+    return row
+
+
+def sweep(
+        points: list[dict],
+        duration: float,
+        seed: int = 0,
+        cache_dir: str = ".sweep_cache",
+        workers: int | None = None) -> list[dict]:
+    """Прогон всех точек в пуле процессов с кэшированием по хэшу конфигурации"""
+    os.makedirs(cache_dir, exist_ok=True)
+    rows: list[dict | None] = []
+    pending = []
+    for point in points:
+        path = os.path.join(
+            cache_dir, config_hash(point, duration, seed) + ".json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                rows.append(json.load(f))
+        else:
+            rows.append(None)
+            pending.append((len(rows) - 1, point))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            futures = [
+                (i, pool.submit(run_point, point, duration, seed, cache_dir))
+                for i, point in pending]
+            for i, future in futures:
+                rows[i] = future.result()
+    return rows
+
+
+def pareto_front(
+        rows: list[dict],
+        x: str = "instances",
+        y: str = "p99") -> list[dict]:
+    """Недоминируемые точки при минимизации обоих показателей"""
+    front = []
+    best_y = float("inf")
+    for row in sorted(rows, key=lambda r: (r[x], r[y])):
+        if row[y] < best_y:
+            front.append(row)
+            best_y = row[y]
+    return front
+
+
+def write_csv(rows: list[dict], path: str):
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({
+                key: json.dumps(value) if isinstance(value, list) else value
+                for key, value in row.items()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--space", required=True, help="JSON с пространством параметров")
+    parser.add_argument("--design", choices=("grid", "lhs", "random"), default="grid")
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-dir", default=".sweep_cache")
+    parser.add_argument("--out", default=None, help="CSV с таблицей результатов")
+    args = parser.parse_args()
+
+    space = json.loads(args.space)
+    if args.design == "grid":
+        points = grid(space)
+    elif args.design == "lhs":
+        points = latin_hypercube(space, args.samples, args.seed)
+    else:
+        points = random_design(space, args.samples, args.seed)
+
+    rows = sweep(points, args.duration, args.seed, args.cache_dir, args.workers)
+    if args.out:
+        write_csv(rows, args.out)
+
+    summary = ("instances", "rps", "error_rate", "p95", "p99")
+    print(" | ".join((*space, *summary)))
+    for row in rows:
+        print(" | ".join(str(row[k]) if k in space else f"{row[k]:.4g}"
+                         for k in (*space, *summary)))
+    print("\nПарето-фронт (инстансы против p99):")
+    for row in pareto_front(rows):
+        print(f"  instances={row['instances']} p99={row['p99']:.4f} "
+              + ", ".join(f"{k}={row[k]}" for k in space))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import asyncio
+from typing import Awaitable, Callable
+from app.clock import clock
+from app.logger import logger as context_logger
+from app.models import models
+from app.rng import streams
+from .profiles import ArrivalProfile
+
+
+class LoadGenerator:
+    """Генератор нагрузки с открытой моделью поступления запросов.
+
+    Моменты прихода определяются только профилем: каждый пришедший
+    виртуальный пользователь обслуживается в отдельной задаче, поэтому
+    задержки системы не ограничивают подаваемую нагрузку.
+    """
+
+    def __init__(
+            self,
+            profile: ArrivalProfile,
+            user_flow: Callable[[models.User], Awaitable],
+            clock: clock.Clock = clock.default_clock,
+            max_active_users: int = 10000,
+            returning_user_prob: float = 0.5,
+            popularity_skew: float = 0.0,
+            rng: streams.RandomStream | None = None):
+        self.profile = profile
+        self.user_flow = user_flow
+        self.clock = clock
+        self.max_active_users = max_active_users
+        self.returning_user_prob = returning_user_prob
+        self.popularity_skew = popularity_skew
+        self.rng = rng or streams.default_factory.stream("LoadGenerator")
+        self.users: list[models.User] = []
+        self.active: set[asyncio.Task] = set()
+        self.arrivals = 0
+        self.dropped = 0
+
+    def next_user(self) -> models.User:
+        """Повторный визит известного пользователя или новый пользователь"""
+        if self.users and self.rng.random() <= self.returning_user_prob:
+            return self.users[self.returning_index(len(self.users))]
+        user = models.User(len(self.users))
+        self.users.append(user)
+        return user
+
+    def returning_index(self, n: int) -> int:
+        """Индекс возвращающегося пользователя.
+
+        При popularity_skew > 0 популярность подчиняется закону Ципфа с
+        этим показателем: пользователь с рангом k (ранние пользователи
+        популярнее) выбирается с вероятностью ~ 1 / k^s. Используется
+        обратная функция непрерывного степенного распределения на [1, n + 1),
+        поэтому выбор не зависит от размера аудитории.
+        """
+        u = self.rng.random()
+        s = self.popularity_skew
+        if s <= 0:
+            return int(u * n)
+        if s == 1:
+            rank = (n + 1) ** u
+        else:
+            rank = (1 + u * ((n + 1) ** (1 - s) - 1)) ** (1 / (1 - s))
+        return min(int(rank) - 1, n - 1)
+
+    async def run(self, duration: float):
+        """Подача нагрузки в течение duration секунд"""
+        logger = context_logger.get_logger()
+        start = self.clock.now()
+        offset = 0.0
+        while True:
+            offset += self.profile.next_interval(offset, self.rng, horizon=duration)
+            if offset >= duration:
+                break
+            # Ждём до абсолютного момента прихода, чтобы накладные
+            # расходы цикла не сдвигали поток
+            delay = start + offset - self.clock.now()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            self.arrivals += 1
+            if len(self.active) >= self.max_active_users:
+                self.dropped += 1
+                continue
+            task = asyncio.create_task(self.user_flow(self.next_user()))
+            self.active.add(task)
+            task.add_done_callback(self.active.discard)
+
+        remaining = start + duration - self.clock.now()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+        logger.info(
+            "Генерация запросов завершена: пришло %d, отброшено %d, в обработке %d",
+            self.arrivals, self.dropped, len(self.active))
@@ -0,0 +1,188 @@
+import math
+from app.rng import streams
+
+
+class ArrivalProfile:
+    """Профиль интенсивности входящего потока запросов.
+
+    По умолчанию моделирует нестационарный пуассоновский поток
+    методом прореживания (thinning) по функции rate(t).
+    """
+
+    max_rate: float
+
+    def rate(self, t: float) -> float:
+        """Интенсивность потока (запросов в секунду) в момент t"""
+        raise NotImplementedError
+
+    def next_interval(
+            self,
+            t: float,
+            rng: streams.RandomStream,
+            horizon: float = math.inf) -> float:
+        """Интервал от момента t до следующего прихода запроса.
+
+        Если до момента horizon прихода нет (например, интенсивность
+        упала до нуля), возвращается math.inf.
+        """
+        if self.max_rate <= 0:
+            return math.inf
+        elapsed = 0.0
+        while t + elapsed < horizon and not self.idle_from(t + elapsed):
+            elapsed += rng.expovariate(self.max_rate)
+            if rng.random() * self.max_rate <= self.rate(t + elapsed):
+                return elapsed
+        return math.inf
+
+    def idle_from(self, t: float) -> bool:
+        """Интенсивность равна нулю с момента t и далее"""
+        return False
+
+
+class ConstantRate(ArrivalProfile):
+    """Детерминированный поток с постоянным интервалом"""
+
+    def __init__(self, rps: float):
+        self.max_rate = rps
+
+    def rate(self, t: float) -> float:
+        return self.max_rate
+
+    def next_interval(
+            self,
+            t: float,
+            rng: streams.RandomStream,
+            horizon: float = math.inf) -> float:
+        return 1 / self.max_rate if self.max_rate > 0 else math.inf
+
+
+class Poisson(ArrivalProfile):
+    """Стационарный пуассоновский поток"""
+
+    def __init__(self, rps: float):
+        self.max_rate = rps
+
+    def rate(self, t: float) -> float:
+        return self.max_rate
+
+    def next_interval(
+            self,
+            t: float,
+            rng: streams.RandomStream,
+            horizon: float = math.inf) -> float:
+        if self.max_rate <= 0:
+            return math.inf
+        return rng.expovariate(self.max_rate)
+
+
+class MMPP(ArrivalProfile):
+    """Марковски-модулированный пуассоновский поток (всплески нагрузки).
+
+    Поток переключается между состояниями с интенсивностями rates,
+    время пребывания в состоянии i распределено экспоненциально со
+    средним mean_durations[i]; переходы идут по кругу.
+    """
+
+    def __init__(self, rates: list[float], mean_durations: list[float]):
+        if len(rates) != len(mean_durations):
+            raise ValueError("Число интенсивностей и длительностей состояний должно совпадать")
+        self.rates = rates
+        self.mean_durations = mean_durations
+        self.max_rate = max(rates)
+        self.state = 0
+        self.state_until: float | None = None
+
+    def rate(self, t: float) -> float:
+        return self.rates[self.state]
+
+    def _switch(self, t: float, rng: streams.RandomStream):
+        if self.state_until is None:
+            self.state_until = rng.expovariate(1 / self.mean_durations[0])
+        while t >= self.state_until:
+            self.state = (self.state + 1) % len(self.rates)
+            self.state_until += rng.expovariate(
+                1 / self.mean_durations[self.state])
+
+    def next_interval(
+            self,
+            t: float,
+            rng: streams.RandomStream,
+            horizon: float = math.inf) -> float:
+        if self.max_rate <= 0:
+            return math.inf
+        now = t
+        while now < horizon:
+            self._switch(now, rng)
+            rate = self.rates[self.state]
+            gap = rng.expovariate(rate) if rate > 0 else math.inf
+            if now + gap < self.state_until:
+                return now + gap - t
+            # Экспоненциальное распределение без памяти: продолжаем
+            # розыгрыш с момента смены состояния
+            now = self.state_until
+        return math.inf
+
+
+class DiurnalRamp(ArrivalProfile):
+    """Суточный профиль: плавный подъём от base_rps до peak_rps и обратно"""
+
+    def __init__(
+            self,
+            base_rps: float,
+            peak_rps: float,
+            period: float = 86400,
+            phase: float = 0.0):
+        self.base_rps = base_rps
+        self.peak_rps = peak_rps
+        self.period = period
+        self.phase = phase
+        self.max_rate = max(base_rps, peak_rps)
+
+    def rate(self, t: float) -> float:
+        wave = (1 - math.cos(2 * math.pi * (t + self.phase) / self.period)) / 2
+        return self.base_rps + (self.peak_rps - self.base_rps) * wave
+
+
+class Step(ArrivalProfile):
+    """Ступенчатый профиль: steps — список (момент начала, rps)"""
+
+    def __init__(self, steps: list[tuple[float, float]]):
+        if not steps:
+            raise ValueError("Ступенчатый профиль требует хотя бы одну ступень")
+        self.steps = sorted(steps)
+        self.max_rate = max(rps for _, rps in self.steps)
+
+    def rate(self, t: float) -> float:
+        current = 0.0
+        for start, rps in self.steps:
+            if t < start:
+                break
+            current = rps
+        return current
+
+    def idle_from(self, t: float) -> bool:
+        start, rps = self.steps[-1]
+        return rps <= 0 and t >= start
+
+
+PROFILES = ("poisson", "constant", "mmpp", "diurnal", "step")
+
+
+def make_profile(name: str, rps: float, duration: float) -> ArrivalProfile:
+    """Профиль по имени со средней за duration интенсивностью rps.
+
+    mmpp: 0.5·rps и 3·rps при средних длительностях 20 и 5 с;
+    diurnal: от rps/3 до 5·rps/3 за один период длиной duration;
+    step: четыре равные ступени 0.4, 0.8, 1.2 и 1.6·rps.
+    """
+    if name == "poisson":
+        return Poisson(rps)
+    if name == "constant":
+        return ConstantRate(rps)
+    if name == "mmpp":
+        return MMPP(rates=[rps * 0.5, rps * 3], mean_durations=[20, 5])
+    if name == "diurnal":
+        return DiurnalRamp(base_rps=rps / 3, peak_rps=rps * 5 / 3, period=duration)
+    if name == "step":
+        return Step([(duration * i / 4, rps * (i + 1) * 0.4) for i in range(4)])
+    raise ValueError(f"Неизвестный профиль нагрузки: {name}")
@@ -1,32 +1,173 @@
 import contextvars
+import json
 import logging
+import logging.handlers
+import queue
+import time
+from collections import defaultdict
 from contextlib import asynccontextmanager
 
 logger_var = contextvars.ContextVar("logger")
 
+FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+# Общий тип для событий сверх лимита EventFilter
+OTHER_EVENTS = "<прочие события>"
+
 
 def get_logger() -> contextvars.ContextVar:
     """Получение логгера"""
     return logger_var.get()
 
 
-def setup_logger() -> logging.Logger:
-    """Установка логгера"""
+class EventFilter(logging.Filter):
+    """Ограничение частоты и выборка сообщений по типу события.
+
+    Тип события — extra={"event": ...} или шаблон сообщения (record.msg),
+    поэтому на частых путях сообщения пишутся в %-стиле. Каждого типа
+    проходит не больше rate сообщений в секунду реального времени, а из
+    сообщений ниже WARNING — только каждое sample-е. Число отброшенных
+    сообщений по типам накапливается в suppressed. Различных типов
+    учитывается не больше max_events, остальные делят общий счётчик
+    OTHER_EVENTS, поэтому таблицы не растут от сообщений с уникальным
+    текстом.
+    """
+
+    def __init__(self, rate: float | None = None, sample: int = 1, max_events: int = 1024):
+        super().__init__()
+        self.rate = rate
+        self.sample = sample
+        self.max_events = max_events
+        self.events: set[str] = set()
+        self.seen: dict[str, int] = defaultdict(int)
+        # Тип события → (доступные токены, время последнего пополнения)
+        self.tokens: dict[str, tuple[float, float]] = {}
+        self.suppressed: dict[str, int] = defaultdict(int)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", record.msg)
+        if event not in self.events:
+            if len(self.events) < self.max_events:
+                self.events.add(event)
+            else:
+                event = OTHER_EVENTS
+        if self.sample > 1 and record.levelno < logging.WARNING:
+            seen = self.seen[event]
+            self.seen[event] = seen + 1
+            if seen % self.sample:
+                self.suppressed[event] += 1
+                return False
+        if self.rate is not None:
+            now = time.monotonic()
+            tokens, last = self.tokens.get(event, (self.rate, now))
+            tokens = min(self.rate, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self.tokens[event] = tokens, now
+                self.suppressed[event] += 1
+                return False
+            self.tokens[event] = tokens - 1, now
+        return True
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Передаёт запись в очередь без форматирования: сообщение собирается
+    уже в потоке QueueListener"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON: время, уровень, тип события,
+    сообщение и аргументы шаблона"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "event": getattr(record, "event", record.msg),
+            "message": record.getMessage(),
+        }
+        if isinstance(record.args, tuple) and record.args:
+            entry["args"] = [
+                arg if isinstance(arg, (int, float, str, bool)) or arg is None
+                else str(arg) for arg in record.args]
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logger(
+        level: int = logging.INFO,
+        queued: bool = False,
+        json_path: str | None = None,
+        rate: float | None = None,
+        sample: int = 1) -> tuple[logging.Logger, logging.handlers.QueueListener | None]:
+    """Установка логгера.
+
+    При queued логгер только кладёт записи в очередь, а форматирование и
+    вывод выполняет QueueListener в фоновом потоке. json_path добавляет
+    вывод в файл JSON Lines. Возвращает логгер и запущенный слушатель
+    очереди (None без queued).
+    """
     logger = logging.getLogger("simulation")
-    logger.setLevel(logging.INFO)
-    handler = logging.StreamHandler()
-    handler.setFormatter(logging.Formatter(
-        "%(asctime)s [%(levelname)s] %(message)s"))
-    logger.addHandler(handler)
-    return logger
+    logger.setLevel(level)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    for log_filter in list(logger.filters):
+        logger.removeFilter(log_filter)
+
+    handlers: list[logging.Handler] = [logging.StreamHandler()]
+    handlers[0].setFormatter(logging.Formatter(FORMAT))
+    if json_path is not None:
+        handlers.append(logging.FileHandler(json_path, encoding="utf-8"))
+        handlers[-1].setFormatter(JsonLinesFormatter())
+    if rate is not None or sample > 1:
+        logger.addFilter(EventFilter(rate, sample))
+
+    listener = None
+    if queued:
+        records = queue.SimpleQueue()
+        logger.addHandler(LazyQueueHandler(records))
+        listener = logging.handlers.QueueListener(records, *handlers)
+        listener.start()
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+    return logger, listener
+
+
+def report_suppressed(logger: logging.Logger):
+    """Итог по сообщениям, отброшенным фильтром событий"""
+    for log_filter in logger.filters:
+        if isinstance(log_filter, EventFilter) and log_filter.suppressed:
+            total = sum(log_filter.suppressed.values())
+            top = sorted(log_filter.suppressed.items(), key=lambda item: -item[1])[:3]
+            logger.warning(
+                "Отброшено сообщений лога: %d (чаще всего: %s)",
+                total, "; ".join(f"{event!r} x{count}" for event, count in top))
 
 
 @asynccontextmanager
-async def app_logger():
+async def app_logger(
+        level: int = logging.INFO,
+        queued: bool = False,
+        json_path: str | None = None,
+        rate: float | None = None,
+        sample: int = 1):
     """Асинхронный менеджер контекста для логгера"""
-    logger = setup_logger()
+    logger, listener = setup_logger(level, queued, json_path, rate, sample)
     token = logger_var.set(logger)
     try:
         yield logger
     finally:
-        logger_var.reset(token)
\ No newline at end of file
+        logger_var.reset(token)
+        report_suppressed(logger)
+        if listener is not None:
+            # Дописать очередь до конца
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+        if queued or json_path is not None or logger.filters:
+            # Вернуть синхронный вывод без фильтров и закрыть файлы
+            setup_logger(level)
@@ -0,0 +1,196 @@
+import asyncio
+import csv
+import os
+import numpy as np
+from app.clock import clock
+from app.models import models
+from . import metrics, request_log
+
+EXPORT_FORMATS = ("auto", "parquet", "arrow", "csv")
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
+
+
+def resolve_format(name: str) -> str:
+    """Формат файлов: auto — Parquet при установленном pyarrow, иначе CSV"""
+    if name not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {name}")
+    if name == "csv":
+        return name
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        if name == "auto":
+            return "csv"
+        raise ImportError(
+            f"Для выгрузки в {name} установите пакет pyarrow") from None
+    return "parquet" if name == "auto" else name
+
+
+class TableWriter:
+    """Потоковая запись таблицы: каждый вызов write — один пакет строк
+    (row group для Parquet, record batch для Arrow IPC)"""
+
+    def __init__(self, path: str, file_format: str):
+        self.path = path
+        self.format = file_format
+        self.writer = None
+        self.file = None
+        self.columns: list[str] | None = None
+
+    def write(self, columns: dict[str, np.ndarray]):
+        if not len(next(iter(columns.values()))):
+            return
+        if self.format == "csv":
+            self._write_csv(columns)
+        else:
+            self._write_arrow(columns)
+
+    def _write_csv(self, columns: dict[str, np.ndarray]):
+        if self.file is None:
+            self.file = open(self.path, "w", newline="", encoding="utf-8")
+            self.writer = csv.writer(self.file)
+            self.columns = list(columns)
+            self.writer.writerow(self.columns)
+        self.writer.writerows(zip(*(columns[name].tolist() for name in self.columns)))
+
+    def _write_arrow(self, columns: dict[str, np.ndarray]):
+        import pyarrow as pa
+        batch = pa.record_batch(
+            [pa.array(values) for values in columns.values()], names=list(columns))
+        if self.writer is None:
+            if self.format == "parquet":
+                import pyarrow.parquet as pq
+                self.writer = pq.ParquetWriter(self.path, batch.schema)
+            else:
+                self.writer = pa.ipc.new_file(self.path, batch.schema)
+        if self.format == "parquet":
+            self.writer.write_batch(batch)
+        else:
+            self.writer.write(batch)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+        elif self.writer is not None:
+            self.writer.close()
+        self.writer = self.file = None
+
+
+class RunExporter:
+    """Потоковая выгрузка результатов прогона в каталог directory.
+
+    requests — по строке на завершённый запрос; строки копятся в буфере
+    на batch_rows запросов и записываются пакетом, поэтому память не
+    зависит от длительности прогона. snapshots — каждые interval секунд
+    модельного времени RPS, доля ошибок, p50/p99 за самое короткое
+    скользящее окно, число запросов в обработке и накопленные счётчики,
+    по каждому сервису и по всем запросам (service = ""); срезы тоже
+    записываются пакетами по batch_rows строк.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            metrics_collector: metrics.MetricsCollector,
+            file_format: str = "auto",
+            batch_rows: int = 8192,
+            interval: float = 1.0,
+            clock: clock.Clock = clock.default_clock):
+        self.directory = directory
+        self.metrics = metrics_collector
+        self.format = resolve_format(file_format)
+        self.interval = interval
+        self.batch_rows = batch_rows
+        self.clock = clock
+        os.makedirs(directory, exist_ok=True)
+        self.buffer = request_log.RequestLog(capacity=batch_rows)
+        self.requests = TableWriter(self.path("requests"), self.format)
+        self.snapshots = TableWriter(self.path("snapshots"), self.format)
+        self.methods = np.array([method.value for method in request_log.METHOD_IDS])
+        self.snapshot_rows: list[tuple] = []
+        self.last_snapshot: float | None = None
+        self.task: asyncio.Task | None = None
+
+    def path(self, table: str) -> str:
+        return os.path.join(self.directory, table + EXTENSIONS[self.format])
+
+    def append(self, request: models.Request):
+        self.buffer.append(request)
+        if self.buffer.size == len(self.buffer.rows):
+            self.flush()
+
+    def flush(self):
+        """Запись накопленных запросов одним пакетом"""
+        data = self.buffer.data
+        if not len(data):
+            return
+        names = np.array(self.buffer.service_names)
+        self.requests.write({
+            "service": names[data["service"]],
+            "method": self.methods[data["method"]],
+            "start": data["start"],
+            "end": data["end"],
+            "success": data["success"],
+            "tcp": data["tcp"],
+            "tls": data["tls"],
+            "db": data["db"],
+            "cache": data["cache"],
+            "processing": data["processing"],
+        })
+        self.buffer.size = 0
+
+    def snapshot(self):
+        """Срез скользящих окон и счётчиков на текущий момент"""
+        window = min(self.metrics.windows)
+        now = self.last_snapshot = self.clock.now()
+        for name in [None, *sorted(self.metrics.by_service)]:
+            live = self.metrics.get_live(name, window)
+            if name is None:
+                success, error = self.metrics.successes, self.metrics.errors
+            else:
+                success = self.metrics.by_service[name]["success"]
+                error = self.metrics.by_service[name]["error"]
+            self.snapshot_rows.append((
+                now, name or "", live["rps"], live["error_rate"], live["p50"], live["p99"],
+                live["in_flight"], success, error))
+        if len(self.snapshot_rows) >= self.batch_rows:
+            self.flush_snapshots()
+
+    def flush_snapshots(self):
+        if not self.snapshot_rows:
+            return
+        columns = list(zip(*self.snapshot_rows))
+        self.snapshots.write({
+            "time": np.array(columns[0], dtype=np.float64),
+            "service": np.array(columns[1]),
+            "rps": np.array(columns[2], dtype=np.float64),
+            "error_rate": np.array(columns[3], dtype=np.float64),
+            "p50": np.array(columns[4], dtype=np.float64),
+            "p99": np.array(columns[5], dtype=np.float64),
+            "in_flight": np.array(columns[6], dtype=np.int64),
+            "success": np.array(columns[7], dtype=np.int64),
+            "error": np.array(columns[8], dtype=np.int64),
+        })
+        self.snapshot_rows = []
+
+    async def snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.snapshot()
+
+    def start(self):
+        self.metrics.exporter = self
+        self.task = asyncio.create_task(self.snapshot_loop())
+
+    def close(self):
+        """Последний срез и сброс буферов на диск"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.metrics.exporter = None
+        if self.last_snapshot != self.clock.now():
+            self.snapshot()
+        self.flush()
+        self.flush_snapshots()
+        self.requests.close()
+        self.snapshots.close()
@@ -0,0 +1,217 @@
+import asyncio
+import time
+from app.logger import logger as context_logger
+from . import histogram, metrics
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+# Границы корзин экспортируемых гистограмм задержек, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def labels(**values) -> str:
+    if not values:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in values.items()) + "}"
+
+
+def family(name: str, kind: str, description: str, samples: list[str]) -> list[str]:
+    if not samples:
+        return []
+    return [f"# TYPE {name} {kind}", f"# HELP {name} {description}", *samples]
+
+
+def histogram_samples(
+        name: str,
+        data: histogram.LatencyHistogram,
+        bounds: tuple[float, ...],
+        **label_values) -> list[str]:
+    """Кумулятивные корзины, _count и _sum гистограммы в формате OpenMetrics"""
+    samples = [
+        f"{name}_bucket{labels(**label_values, le=bound)} {count}"
+        for bound, count in zip(bounds, data.cumulative(list(bounds)))]
+    samples.append(f"{name}_bucket{labels(**label_values, le='+Inf')} {data.count}")
+    samples.append(f"{name}_count{labels(**label_values)} {data.count}")
+    samples.append(f"{name}_sum{labels(**label_values)} {data.total}")
+    return samples
+
+
+class OpenMetricsRenderer:
+    """Текстовое представление MetricsCollector в формате OpenMetrics.
+
+    Экспортируются счётчики и гистограммы задержек сервисов, счётчики
+    брокера, инфраструктурные сбои и состояние кластеров БД. Гистограммы
+    дороже всего остального, поэтому их строки кэшируются и строятся
+    заново только для сервисов и брокера, у которых изменилось число
+    записей с прошлого опроса.
+    """
+
+    def __init__(
+            self,
+            metrics_collector: metrics.MetricsCollector,
+            clusters: list | None = None,
+            broker=None,
+            bounds: tuple[float, ...] = LATENCY_BUCKETS):
+        self.metrics = metrics_collector
+        self.clusters = clusters or []
+        self.broker = broker
+        self.bounds = bounds
+        # Сервис (или None для брокера) → (число записей, строки гистограммы)
+        self.cache: dict[str | None, tuple[int, list[str]]] = {}
+
+    def _cached(self, key: str | None, name: str, data: histogram.LatencyHistogram,
+                **label_values) -> list[str]:
+        cached = self.cache.get(key)
+        if cached is None or cached[0] != data.count:
+            cached = data.count, histogram_samples(name, data, self.bounds, **label_values)
+            self.cache[key] = cached
+        return cached[1]
+
+    def services(self) -> list[str]:
+        by_service = sorted(self.metrics.by_service.items())
+        requests = [
+            f"webservice_requests_total{labels(service=name, outcome=outcome)} {data[outcome]}"
+            for name, data in by_service for outcome in ("success", "error")]
+        latencies = [
+            sample for name, data in by_service
+            for sample in self._cached(
+                name, "webservice_response_seconds", data["response_times"], service=name)]
+        in_flight = [
+            f"webservice_in_flight{labels(service=name)} {data['active']}"
+            for name, data in sorted(self.metrics.load_stats.items())]
+        return [
+            *family("webservice_requests", "counter", "Завершённые запросы", requests),
+            *family(
+                "webservice_response_seconds", "histogram",
+                "Время ответа успешных запросов", latencies),
+            *family("webservice_in_flight", "gauge", "Запросы в обработке", in_flight),
+        ]
+
+    def broker_metrics(self) -> list[str]:
+        data = self.metrics.broker_metrics
+        messages = [
+            f"broker_messages_total{labels(outcome=outcome)} {data['messages_' + outcome]}"
+            for outcome in ("sent", "failed", "dropped")]
+        depths = []
+        if self.broker is not None:
+            depths = [
+                f"broker_queue_depth{labels(topic=topic)} {queue.qsize()}"
+                for topic, queue in sorted(self.broker.queues.items())]
+        return [
+            *family("broker_messages", "counter", "Публикации сообщений", messages),
+            *family(
+                "broker_batches", "counter", "Отправленные пакеты публикаций",
+                [f"broker_batches_total {data['batches']}"]),
+            *family(
+                "broker_delivery_seconds", "histogram",
+                "Задержка от публикации до получения потребителем",
+                self._cached(None, "broker_delivery_seconds", data["delivery_latencies"])),
+            *family("broker_queue_depth", "gauge", "Глубина очереди темы", depths),
+        ]
+
+    def infrastructure(self) -> list[str]:
+        failures = [
+            f"infrastructure_failures_total{labels(kind=kind.removesuffix('_failures'))} {count}"
+            for kind, count in sorted(self.metrics.infrastructure.items())]
+        return family("infrastructure_failures", "counter", "Инфраструктурные сбои", failures)
+
+    def cluster_state(self) -> list[str]:
+        masters, up, lag_seconds, lag_entries = [], [], [], []
+        for cluster in self.clusters:
+            master = cluster.current_master
+            masters.append(f"db_cluster_master{labels(cluster=cluster.name, node=master.name)} 1")
+            for node in (master, *cluster.replicas):
+                role = "master" if node is master else "replica"
+                up.append(
+                    f"db_node_up{labels(cluster=cluster.name, node=node.name, role=role)} "
+                    f"{int(node.available)}")
+            now = cluster.clock.now()
+            for replica in cluster.replicas:
+                seconds, entries = cluster.log.lag(replica.name, now)
+                node_labels = labels(cluster=cluster.name, replica=replica.name)
+                lag_seconds.append(f"db_replica_lag_seconds{node_labels} {seconds}")
+                lag_entries.append(f"db_replica_lag_entries{node_labels} {entries}")
+        return [
+            *family("db_cluster_master", "gauge", "Текущий master кластера", masters),
+            *family("db_node_up", "gauge", "Доступность узла кластера", up),
+            *family(
+                "db_replica_lag_seconds", "gauge",
+                "Возраст старейшей неприменённой записи журнала", lag_seconds),
+            *family(
+                "db_replica_lag_entries", "gauge",
+                "Число неприменённых записей журнала", lag_entries),
+        ]
+
+    def render(self) -> bytes:
+        lines = [
+            *self.services(),
+            *self.broker_metrics(),
+            *self.infrastructure(),
+            *self.cluster_state(),
+            "# EOF"]
+        return ("\n".join(lines) + "\n").encode()
+
+
+class MetricsServer:
+    """HTTP-эндпоинт /metrics для опроса Prometheus.
+
+    Сервер работает в том же цикле событий, что и модель, поэтому
+    обработчик только собирает текст и сразу отвечает. Опросы чаще
+    min_interval секунд реального времени получают прошлый ответ.
+    """
+
+    def __init__(
+            self,
+            renderer: OpenMetricsRenderer,
+            host: str = "127.0.0.1",
+            port: int = 9464,
+            min_interval: float = 0.5):
+        self.renderer = renderer
+        self.host = host
+        self.port = port
+        self.min_interval = min_interval
+        self.server: asyncio.Server | None = None
+        self.body = b""
+        self.rendered_at = -float("inf")
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        context_logger.get_logger().info(
+            "📈 Метрики доступны на http://%s:%d/metrics", self.host, self.port)
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+
+    def metrics_body(self) -> bytes:
+        now = time.monotonic()
+        if now - self.rendered_at >= self.min_interval:
+            self.body = self.renderer.render()
+            self.rendered_at = now
+        return self.body
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            method, path, *_ = head.split(b"\r\n", 1)[0].decode("latin-1").split(" ")
+            if method != "GET":
+                status, content_type, body = "405 Method Not Allowed", "text/plain", b""
+            elif path.split("?", 1)[0] != "/metrics":
+                status, content_type, body = "404 Not Found", "text/plain", b""
+            else:
+                status, content_type, body = "200 OK", CONTENT_TYPE, self.metrics_body()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
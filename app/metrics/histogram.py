@@ -0,0 +1,120 @@
+import math
+
+import numpy as np
+
+
+class LatencyHistogram:
+    """Потоковая гистограмма задержек с логарифмическими корзинами.
+
+    Хранит только счётчики корзин, поэтому память постоянна, запись
+    выполняется за O(1), а квантили считаются с относительной
+    погрешностью не более precision. Гистограммы с одинаковыми
+    параметрами можно объединять.
+    """
+
+    def __init__(
+            self,
+            precision: float = 0.01,
+            min_value: float = 1e-6,
+            max_value: float = 3600.0):
+        if not 0 < precision < 1:
+            raise ValueError("Точность гистограммы должна быть в интервале (0, 1)")
+        self.precision = precision
+        self.min_value = min_value
+        self.max_value = max_value
+        self._gamma = (1 + precision) / (1 - precision)
+        self._log_gamma = math.log(self._gamma)
+        self._offset = math.ceil(math.log(min_value) / self._log_gamma)
+        size = math.ceil(math.log(max_value) / self._log_gamma) - self._offset + 1
+        # Корзина 0 — значения не больше min_value
+        self.counts = np.zeros(size + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        if value >= self.max_value:
+            return len(self.counts) - 1
+        return math.ceil(math.log(value) / self._log_gamma) - self._offset + 1
+
+    def _value(self, index: int) -> float:
+        if index == 0:
+            return 0.0
+        upper = self._gamma ** (index - 1 + self._offset)
+        return 2 * upper / (self._gamma + 1)
+
+    def record(self, value: float):
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram"):
+        """Добавление счётчиков другой гистограммы с теми же параметрами"""
+        if (self.precision, self.min_value, self.max_value) != (
+                other.precision, other.min_value, other.max_value):
+            raise ValueError("Нельзя объединить гистограммы с разными параметрами")
+        self.counts += other.counts
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def subtract(self, other: "LatencyHistogram"):
+        """Вычитание ранее добавленных счётчиков (для скользящих окон).
+
+        min и max остаются прежними и служат лишь границами значений.
+        """
+        self.counts -= other.counts
+        self.count -= other.count
+        self.total -= other.total
+        if not self.count:
+            self.reset()
+
+    def reset(self):
+        self.counts[:] = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0
+
+    def quantiles(self, qs: list[float]) -> list[float]:
+        """Квантили (доли от 0 до 1) без копирования исходных значений"""
+        if not self.count:
+            return [0 for _ in qs]
+        cumulative = np.cumsum(self.counts)
+        ranks = [q * (self.count - 1) for q in qs]
+        indexes = np.searchsorted(cumulative, ranks, side="right")
+        return [
+            min(max(self._value(int(i)), self.min), self.max)
+            for i in indexes]
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+    def cumulative(self, bounds: list[float]) -> list[int]:
+        """Число значений не больше каждой из границ bounds (по возрастанию).
+
+        Граница относится к корзине, в которую попало бы равное ей
+        значение, поэтому счётчики точны с погрешностью precision.
+        """
+        if not self.count:
+            return [0 for _ in bounds]
+        cumulative = np.cumsum(self.counts)
+        return [int(cumulative[self._index(bound)]) for bound in bounds]
+
+    def buckets(self) -> tuple[np.ndarray, np.ndarray]:
+        """Представительные значения и счётчики непустых корзин"""
+        indexes = np.nonzero(self.counts)[0]
+        values = np.array([self._value(int(i)) for i in indexes])
+        return values, self.counts[indexes]
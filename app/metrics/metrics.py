@@ -1,33 +1,43 @@
-from collections import defaultdict
+from collections import defaultdict, deque
 
-import numpy as np
 from app.models import models
+from app.clock import clock
+from . import histogram, request_log, window
 import statistics
 
 
 class MetricsCollector:
-    def __init__(self):
-        self.response_times = []
+    def __init__(
+            self,
+            clock: clock.Clock = clock.default_clock,
+            histogram_precision: float = 0.01,
+            keep_requests: bool = False,
+            windows: tuple[int, ...] = (1, 10, 60),
+            max_outlier_events: int = 10000):
+        self.clock = clock
+        self.histogram_precision = histogram_precision
+        self.windows = windows
+        self.request_log = request_log.RequestLog() if keep_requests else None
+        # Потоковая выгрузка запросов на диск (export.RunExporter)
+        self.exporter = None
+        self.response_times = self.new_histogram()
         self.errors = 0
         self.successes = 0
-        self.time_buckets = defaultdict(lambda: {"success": 0, "error": 0})
-        self.by_service = defaultdict(lambda: {
-            "success": 0,
-            "error": 0,
-            "response_times": [],
-            "tcp_times": [],
-            "tls_times": [],
-            "db_times": [],
-            "cache_times": [],
-            "processing_times": [],
-            "network_latencies": [],
-        })
+        self.timeline = window.DownsampledSeries()
+        # Скользящие окна по сервисам и по всем запросам (ключ None)
+        self.live = defaultdict(self._live_windows)
+        self.by_service = defaultdict(self._service_stats)
 
         self.broker_metrics = {
             "messages_sent": 0,
             "messages_failed": 0,
-            "latencies": [],
-            "queue_sizes": []
+            "messages_dropped": 0,
+            "batches": 0,
+            "batched": 0,
+            "latencies": self.new_histogram(),
+            "delivery_latencies": self.new_histogram(),
+            # Наибольшая глубина очереди темы по интервалам времени
+            "queue_sizes": {}
         }
 
         self.infrastructure = {
@@ -37,73 +47,289 @@ class MetricsCollector:
         }
 
         self.load_stats = defaultdict(lambda: {"active": 0, "total": 0})
+        self.cache_stats = defaultdict(self._cache_stats)
+        self.pool_stats = defaultdict(self._pool_stats)
+        self.admission_stats = defaultdict(self._admission_stats)
+        self.connection_stats = defaultdict(self._connection_stats)
+        self.route_stats = defaultdict(self._route_stats)
+        self.outlier_stats = defaultdict(lambda: {"eject": 0, "restore": 0})
+        # Последние события исключения инстансов (для отметок на графике)
+        self.outlier_events: deque[tuple[float, str, str, str]] = deque(
+            maxlen=max_outlier_events)
+        self.replication_stats = defaultdict(self._replication_stats)
+        self.commit_stats = defaultdict(
+            lambda: {"writes": 0, "groups": 0, "ack_timeouts": 0})
+        self.read_stats = defaultdict(
+            lambda: {"master": 0, "replica": 0, "stale": 0})
+
+    def _service_stats(self) -> dict:
+        return {
+            "success": 0,
+            "error": 0,
+            "response_times": self.new_histogram(),
+            "tcp_times": self.new_histogram(),
+            "tls_times": self.new_histogram(),
+            "db_times": self.new_histogram(),
+            "cache_times": self.new_histogram(),
+            "processing_times": self.new_histogram(),
+            "network_latencies": self.new_histogram(),
+        }
+
+    def _live_windows(self) -> window.RollingWindows:
+        return window.RollingWindows(self.windows)
+
+    @staticmethod
+    def _cache_stats() -> dict:
+        return {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    def _pool_stats(self) -> dict:
+        return {
+            "acquired": 0,
+            "timeouts": 0,
+            "max_waiting": 0,
+            "busy_time": 0.0,
+            "capacity_time": 0.0,
+            "wait_times": self.new_histogram(),
+        }
+
+    @staticmethod
+    def _connection_stats() -> dict:
+        return {"reused": 0, "opened": 0, "resumed": 0}
+
+    @staticmethod
+    def _route_stats() -> dict:
+        return {
+            "requests": 0,
+            "attempts": 0,
+            "retries": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "budget_exhausted": 0,
+            "deadline_exceeded": 0,
+        }
+
+    def _replication_stats(self) -> dict:
+        return {
+            "batches": 0,
+            "entries": 0,
+            "lsn_lag_total": 0,
+            "max_lsn_lag": 0,
+            "lag_times": self.new_histogram(),
+        }
+
+    def _admission_stats(self) -> dict:
+        return {
+            "admitted": 0,
+            "max_queue": 0,
+            "shed": defaultdict(int),
+            "queue_waits": self.new_histogram(),
+        }
+
+    def __getstate__(self) -> dict:
+        # defaultdict с lambda не сериализуется pickle — передаём обычные dict
+        state = self.__dict__.copy()
+        state["live"] = dict(self.live)
+        state["exporter"] = None
+        state["by_service"] = dict(self.by_service)
+        state["load_stats"] = dict(self.load_stats)
+        state["cache_stats"] = dict(self.cache_stats)
+        state["pool_stats"] = dict(self.pool_stats)
+        state["connection_stats"] = dict(self.connection_stats)
+        state["route_stats"] = dict(self.route_stats)
+        state["outlier_stats"] = dict(self.outlier_stats)
+        state["replication_stats"] = dict(self.replication_stats)
+        state["commit_stats"] = dict(self.commit_stats)
+        state["read_stats"] = dict(self.read_stats)
+        state["admission_stats"] = {
+            name: {**data, "shed": dict(data["shed"])}
+            for name, data in self.admission_stats.items()}
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.live = defaultdict(self._live_windows, state["live"])
+        self.by_service = defaultdict(self._service_stats, state["by_service"])
+        self.load_stats = defaultdict(
+            lambda: {"active": 0, "total": 0}, state["load_stats"])
+        self.cache_stats = defaultdict(self._cache_stats, state["cache_stats"])
+        self.pool_stats = defaultdict(self._pool_stats, state["pool_stats"])
+        self.connection_stats = defaultdict(
+            self._connection_stats, state["connection_stats"])
+        self.route_stats = defaultdict(self._route_stats, state["route_stats"])
+        self.outlier_stats = defaultdict(
+            lambda: {"eject": 0, "restore": 0}, state["outlier_stats"])
+        self.replication_stats = defaultdict(
+            self._replication_stats, state["replication_stats"])
+        self.commit_stats = defaultdict(
+            lambda: {"writes": 0, "groups": 0, "ack_timeouts": 0},
+            state["commit_stats"])
+        self.read_stats = defaultdict(
+            lambda: {"master": 0, "replica": 0, "stale": 0}, state["read_stats"])
+        self.admission_stats = defaultdict(self._admission_stats, {
+            name: {**data, "shed": defaultdict(int, data["shed"])}
+            for name, data in state["admission_stats"].items()})
+
+    def merge(self, other: "MetricsCollector"):
+        """Объединение метрик другого прогона (например, параллельной реплики)"""
+        self.successes += other.successes
+        self.errors += other.errors
+        self.response_times.merge(other.response_times)
+        # Скользящие окна описывают текущий момент прогона и не объединяются
+        self.timeline.merge(other.timeline)
+        for name, data in other.by_service.items():
+            svc = self.by_service[name]
+            for key, value in data.items():
+                if isinstance(value, histogram.LatencyHistogram):
+                    svc[key].merge(value)
+                else:
+                    svc[key] += value
+        for key in ("messages_sent", "messages_failed", "messages_dropped", "batches", "batched"):
+            self.broker_metrics[key] += other.broker_metrics[key]
+        for key in ("latencies", "delivery_latencies"):
+            self.broker_metrics[key].merge(other.broker_metrics[key])
+        for topic, series in other.broker_metrics["queue_sizes"].items():
+            self._queue_series(topic).merge(series)
+        for key, value in other.infrastructure.items():
+            self.infrastructure[key] = self.infrastructure.get(key, 0) + value
+        for name, data in other.load_stats.items():
+            self.load_stats[name]["total"] += data["total"]
+        for name, data in other.cache_stats.items():
+            for key, value in data.items():
+                self.cache_stats[name][key] += value
+        for name, data in other.pool_stats.items():
+            pool = self.pool_stats[name]
+            for key, value in data.items():
+                if isinstance(value, histogram.LatencyHistogram):
+                    pool[key].merge(value)
+                elif key == "max_waiting":
+                    pool[key] = max(pool[key], value)
+                else:
+                    pool[key] += value
+        for name, data in other.admission_stats.items():
+            stats = self.admission_stats[name]
+            stats["admitted"] += data["admitted"]
+            stats["max_queue"] = max(stats["max_queue"], data["max_queue"])
+            stats["queue_waits"].merge(data["queue_waits"])
+            for reason, count in data["shed"].items():
+                stats["shed"][reason] += count
+        for name, data in other.connection_stats.items():
+            for key, value in data.items():
+                self.connection_stats[name][key] += value
+        for name, data in other.route_stats.items():
+            for key, value in data.items():
+                self.route_stats[name][key] += value
+        for name, data in other.outlier_stats.items():
+            for key, value in data.items():
+                self.outlier_stats[name][key] += value
+        self.outlier_events.extend(other.outlier_events)
+        for name, data in other.replication_stats.items():
+            stats = self.replication_stats[name]
+            for key, value in data.items():
+                if isinstance(value, histogram.LatencyHistogram):
+                    stats[key].merge(value)
+                elif key == "max_lsn_lag":
+                    stats[key] = max(stats[key], value)
+                else:
+                    stats[key] += value
+        for name, data in other.commit_stats.items():
+            for key, value in data.items():
+                self.commit_stats[name][key] += value
+        for name, data in other.read_stats.items():
+            for key, value in data.items():
+                self.read_stats[name][key] += value
+
+    def new_histogram(self) -> histogram.LatencyHistogram:
+        return histogram.LatencyHistogram(precision=self.histogram_precision)
 
     def record(self, request: models.Request):
         """Сбор метрик"""
         duration = request.end_time - request.start_time
-        bucket = int(request.end_time)
+        if self.request_log is not None:
+            self.request_log.append(request)
+        if self.exporter is not None:
+            self.exporter.append(request)
+        self.timeline.add(request.end_time, request.success)
+        self.live[None].record(request.end_time, request.success, duration)
+        self.live[request.service_name].record(request.end_time, request.success, duration)
 
         if request.success:
             self.successes += 1
-            self.response_times.append(duration)
-            self.time_buckets[bucket]["success"] += 1
+            self.response_times.record(duration)
             svc = self.by_service[request.service_name]
             svc["success"] += 1
-            svc["response_times"].append(duration)
-            svc["tcp_times"].append(request.tcp_time)
-            svc["tls_times"].append(request.tls_time)
-            svc["db_times"].append(request.db_time)
-            svc["cache_times"].append(request.cache_time)
-            svc["processing_times"].append(request.processing_time)
-            svc["network_latencies"].append(request.network_latency)
+            svc["response_times"].record(duration)
+            svc["tcp_times"].record(request.tcp_time)
+            svc["tls_times"].record(request.tls_time)
+            svc["db_times"].record(request.db_time)
+            svc["cache_times"].record(request.cache_time)
+            svc["processing_times"].record(request.processing_time)
+            svc["network_latencies"].record(request.network_latency)
         else:
             self.errors += 1
-            self.time_buckets[bucket]["error"] += 1
             svc = self.by_service[request.service_name]
             svc["error"] += 1
 
     def get_rps_series(self):
         """Агрегированная статистика RPS"""
-        times = sorted(self.time_buckets.keys())
-        rps = [self.time_buckets[t]["success"] +
-               self.time_buckets[t]["error"] for t in times]
-        errors = [self.time_buckets[t]["error"] for t in times]
-        return times, rps, errors
+        if self.request_log is not None:
+            return self.request_log.rps_series()
+        return self.timeline.series()
+
+    def get_live(self, service_name: str | None = None, window: int = 10) -> dict:
+        """RPS, доля ошибок, p50/p99 за последние window секунд и число
+        запросов в обработке — по сервису или по всем запросам (None)"""
+        stats = self.live[service_name].get(window, self.clock.now())
+        if service_name is None:
+            stats["in_flight"] = sum(data["active"] for data in self.load_stats.values())
+        else:
+            stats["in_flight"] = self.load_stats.get(service_name, {}).get("active", 0)
+        return stats
 
     def get_service_summary(self):
         """Агрегированная статистика по каждому сервису"""
+        if self.request_log is not None:
+            return self.request_log.service_summary()
         summary = {}
         for name, data in self.by_service.items():
             summary[name] = {
-                "success": data["success"], "error": data["error"], "avg_response": statistics.mean(
-                    data["response_times"]) if data["response_times"] else 0, "avg_tcp": statistics.mean(
-                    data["tcp_times"]) if data["tcp_times"] else 0, "avg_tls": statistics.mean(
-                    data["tls_times"]) if data["tls_times"] else 0, "avg_db": statistics.mean(
-                    data["db_times"]) if data["db_times"] else 0, "avg_cache": statistics.mean(
-                        data["cache_times"]) if data["cache_times"] else 0, "avg_processing": statistics.mean(
-                            data["processing_times"]) if data["processing_times"] else 0, }
+                "success": data["success"],
+                "error": data["error"],
+                "avg_response": data["response_times"].mean,
+                "avg_tcp": data["tcp_times"].mean,
+                "avg_tls": data["tls_times"].mean,
+                "avg_db": data["db_times"].mean,
+                "avg_cache": data["cache_times"].mean,
+                "avg_processing": data["processing_times"].mean,
+            }
         return summary
 
     def get_latency_stats(self):
-        """Возвращает среднее, p95 и p99 времени ответа"""
-        if not self.response_times:
-            return {"avg": 0, "p95": 0, "p99": 0}
-
-        avg = statistics.mean(self.response_times)
-        p95 = np.percentile(self.response_times, 95)
-        p99 = np.percentile(self.response_times, 99)
-        return {"avg": avg, "p95": p95, "p99": p99}
+        """Возвращает среднее, p50, p95, p99 и p99.9 времени ответа"""
+        p50, p95, p99, p999 = self.response_times.quantiles(
+            [0.5, 0.95, 0.99, 0.999])
+        return {
+            "avg": self.response_times.mean,
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+            "p999": p999}
 
     def get_tcp_tls_avg(self):
-        """Возвращает среднее время на TCP и TLS хендшейки"""
-        all_tcp = []
-        all_tls = []
-        for svc in self.by_service.values():
-            all_tcp.extend(svc["tcp_times"])
-            all_tls.extend(svc["tls_times"])
-        tcp_avg = statistics.mean(all_tcp) if all_tcp else 0
-        tls_avg = statistics.mean(all_tls) if all_tls else 0
-        return {"tcp_avg": tcp_avg, "tls_avg": tls_avg}
+        """Возвращает среднее время на TCP и TLS хендшейки и долю
+        переиспользованных соединений"""
+        if self.request_log is not None:
+            result = self.request_log.tcp_tls_avg()
+        else:
+            tcp = self.new_histogram()
+            tls = self.new_histogram()
+            for svc in self.by_service.values():
+                tcp.merge(svc["tcp_times"])
+                tls.merge(svc["tls_times"])
+            result = {"tcp_avg": tcp.mean, "tls_avg": tls.mean}
+        reused = sum(data["reused"] for data in self.connection_stats.values())
+        opened = sum(data["opened"] for data in self.connection_stats.values())
+        result["reuse_ratio"] = reused / (reused + opened) if reused + opened else 0.0
+        return result
 
     def record_load_start(self, service_name: str):
         self.load_stats[service_name]["active"] += 1
@@ -114,31 +340,255 @@ class MetricsCollector:
             0, self.load_stats[service_name]["active"] - 1)
 
     def get_avg_load(self):
-        r = {s: data["total"] / max(1, len(self.time_buckets))
-             for s, data in self.load_stats.items()}
+        if self.request_log is not None:
+            counts = self.request_log.service_counts()
+            seconds = max(1, self.request_log.active_seconds())
+            return {s: counts.get(s, 0) / seconds for s in self.load_stats}
         return {
-            s: data["total"] / max(1, len(self.time_buckets))
+            s: data["total"] / max(1, self.timeline.active_seconds())
             for s, data in self.load_stats.items()
         }
 
+    def record_cache_access(self, cache_name: str, hit: bool):
+        self.cache_stats[cache_name]["hits" if hit else "misses"] += 1
+
+    def record_cache_eviction(self, cache_name: str, count: int = 1):
+        self.cache_stats[cache_name]["evictions"] += count
+
+    def record_cache_expired(self, cache_name: str):
+        self.cache_stats[cache_name]["expired"] += 1
+
+    def get_cache_stats(self):
+        """Доля попаданий и вытеснения по каждому кэшу"""
+        stats = {}
+        for name, data in self.cache_stats.items():
+            lookups = data["hits"] + data["misses"]
+            stats[name] = {
+                **data,
+                "hit_ratio": data["hits"] / lookups if lookups else 0.0}
+        return stats
+
+    def record_pool_wait(self, pool_name: str, wait: float):
+        pool = self.pool_stats[pool_name]
+        pool["acquired"] += 1
+        pool["wait_times"].record(wait)
+
+    def record_pool_queue(self, pool_name: str, waiting: int):
+        pool = self.pool_stats[pool_name]
+        pool["max_waiting"] = max(pool["max_waiting"], waiting)
+
+    def record_pool_timeout(self, pool_name: str):
+        self.pool_stats[pool_name]["timeouts"] += 1
+
+    def record_pool_usage(self, pool_name: str, in_use: int, size: int, elapsed: float):
+        pool = self.pool_stats[pool_name]
+        pool["busy_time"] += in_use * elapsed
+        pool["capacity_time"] += size * elapsed
+
+    def get_pool_stats(self):
+        """Ожидание соединений, утилизация и таймауты по каждому пулу"""
+        stats = {}
+        for name, data in self.pool_stats.items():
+            waits = data["wait_times"]
+            stats[name] = {
+                "acquired": data["acquired"],
+                "timeouts": data["timeouts"],
+                "max_waiting": data["max_waiting"],
+                "avg_wait": waits.mean,
+                "p99_wait": waits.quantile(0.99),
+                "utilization": data["busy_time"] / data["capacity_time"]
+                if data["capacity_time"] else 0.0,
+            }
+        return stats
+
+    def record_queue_wait(self, service_name: str, wait: float):
+        stats = self.admission_stats[service_name]
+        stats["admitted"] += 1
+        stats["queue_waits"].record(wait)
+
+    def record_queue_length(self, service_name: str, length: int):
+        stats = self.admission_stats[service_name]
+        stats["max_queue"] = max(stats["max_queue"], length)
+
+    def record_shed(self, service_name: str, reason: str):
+        self.admission_stats[service_name]["shed"][reason] += 1
+
+    def get_admission_stats(self):
+        """Ожидание в очереди допуска и отброшенные запросы по инстансам"""
+        stats = {}
+        for name, data in self.admission_stats.items():
+            waits = data["queue_waits"]
+            stats[name] = {
+                "admitted": data["admitted"],
+                "shed": sum(data["shed"].values()),
+                "shed_by_reason": dict(data["shed"]),
+                "max_queue": data["max_queue"],
+                "avg_wait": waits.mean,
+                "p99_wait": waits.quantile(0.99),
+            }
+        return stats
+
+    def record_connection(self, pool_name: str, reused: bool, resumed: bool = False):
+        stats = self.connection_stats[pool_name]
+        if reused:
+            stats["reused"] += 1
+        else:
+            stats["opened"] += 1
+            stats["resumed"] += resumed
+
+    def get_connection_stats(self):
+        """Доля переиспользованных соединений и возобновлённых TLS-сессий"""
+        stats = {}
+        for name, data in self.connection_stats.items():
+            total = data["reused"] + data["opened"]
+            stats[name] = {
+                **data,
+                "reuse_ratio": data["reused"] / total if total else 0.0,
+                "resumption_ratio": data["resumed"] / data["opened"]
+                if data["opened"] else 0.0}
+        return stats
+
+    def record_route_event(self, route: str, event: str):
+        self.route_stats[route][event] += 1
+
+    def get_route_stats(self):
+        """Усиление нагрузки повторами и доля выигравших хеджей по маршрутам"""
+        stats = {}
+        for name, data in self.route_stats.items():
+            stats[name] = {
+                **data,
+                "retry_amplification": data["attempts"] / data["requests"]
+                if data["requests"] else 0.0,
+                "hedge_win_rate": data["hedge_wins"] / data["hedges"]
+                if data["hedges"] else 0.0}
+        return stats
+
+    def record_outlier_event(self, group: str, instance_name: str, event: str, time: float):
+        """Исключение инстанса из балансировки (eject) или возврат (restore)"""
+        self.outlier_stats[instance_name][event] += 1
+        self.outlier_events.append((time, group, instance_name, event))
+
+    def get_outlier_stats(self):
+        return {name: dict(data) for name, data in self.outlier_stats.items()}
+
+    def record_commit_group(self, cluster_name: str, size: int):
+        stats = self.commit_stats[cluster_name]
+        stats["writes"] += size
+        stats["groups"] += 1
+
+    def record_commit_timeout(self, cluster_name: str):
+        self.commit_stats[cluster_name]["ack_timeouts"] += 1
+
+    def record_replication(
+            self,
+            replica_name: str,
+            entries: int,
+            lag: float,
+            lsn_lag: int):
+        """Применение репликой пакета журнала.
+
+        lag — время от фиксации первой записи пакета до его применения,
+        lsn_lag — число записей журнала, которые реплика ещё не получила.
+        """
+        stats = self.replication_stats[replica_name]
+        stats["batches"] += 1
+        stats["entries"] += entries
+        stats["lsn_lag_total"] += lsn_lag
+        stats["max_lsn_lag"] = max(stats["max_lsn_lag"], lsn_lag)
+        stats["lag_times"].record(lag)
+
+    def get_replication_stats(self):
+        """Отставание реплик во времени и в LSN, размер пакетов"""
+        stats = {}
+        for name, data in self.replication_stats.items():
+            lags = data["lag_times"]
+            batches = data["batches"]
+            stats[name] = {
+                "batches": batches,
+                "entries": data["entries"],
+                "avg_batch": data["entries"] / batches if batches else 0.0,
+                "avg_lag": lags.mean,
+                "p99_lag": lags.quantile(0.99),
+                "max_lag": lags.max if lags.count else 0.0,
+                "avg_lsn_lag": data["lsn_lag_total"] / batches if batches else 0.0,
+                "max_lsn_lag": data["max_lsn_lag"],
+            }
+        return stats
+
+    def get_commit_stats(self):
+        """Размер групп group commit и таймауты подтверждений по кластерам"""
+        return {
+            name: {
+                **data,
+                "avg_group": data["writes"] / data["groups"] if data["groups"] else 0.0}
+            for name, data in self.commit_stats.items()}
+
+    def record_read(self, cluster_name: str, on_master: bool, stale: bool):
+        """Чтение из кластера; stale — реплика ещё не применила последнюю запись ключа"""
+        stats = self.read_stats[cluster_name]
+        stats["master" if on_master else "replica"] += 1
+        stats["stale"] += stale
+
+    def get_read_stats(self):
+        """Доля чтений, снятых с master, и доля устаревших чтений по кластерам"""
+        stats = {}
+        for name, data in self.read_stats.items():
+            total = data["master"] + data["replica"]
+            stats[name] = {
+                **data,
+                "offload_ratio": data["replica"] / total if total else 0.0,
+                "stale_ratio": data["stale"] / total if total else 0.0}
+        return stats
+
     def record_broker_event(self, success: bool, latency: float = 0):
         if success:
             self.broker_metrics["messages_sent"] += 1
-            self.broker_metrics["latencies"].append(latency)
+            self.broker_metrics["latencies"].record(latency)
         else:
             self.broker_metrics["messages_failed"] += 1
 
+    def record_broker_batch(self, size: int):
+        self.broker_metrics["batches"] += 1
+        self.broker_metrics["batched"] += size
+
+    def record_broker_drop(self, topic: str, count: int = 1):
+        self.broker_metrics["messages_dropped"] += count
+
+    def record_broker_delivery(self, latency: float):
+        """Задержка от публикации до получения сообщения потребителем"""
+        self.broker_metrics["delivery_latencies"].record(latency)
+
+    def _queue_series(self, topic: str) -> window.DownsampledMax:
+        queue_sizes = self.broker_metrics["queue_sizes"]
+        if topic not in queue_sizes:
+            queue_sizes[topic] = window.DownsampledMax()
+        return queue_sizes[topic]
+
     def record_broker_queue_size(self, topic: str, size: int):
-        self.broker_metrics["queue_sizes"][topic] = size
+        self._queue_series(topic).add(self.clock.now(), size)
+
+    def get_broker_queue_series(self, topic: str):
+        """Наибольшая глубина очереди темы по интервалам времени"""
+        if topic not in self.broker_metrics["queue_sizes"]:
+            return [], []
+        return self.broker_metrics["queue_sizes"][topic].series()
 
     def get_broker_stats(self):
         lat = self.broker_metrics["latencies"]
-        avg = statistics.mean(lat) if lat else 0
-        p95 = np.percentile(lat, 95) if lat else 0
+        delivery = self.broker_metrics["delivery_latencies"]
+        depths = [
+            size for series in self.broker_metrics["queue_sizes"].values()
+            for size in series.series()[1]]
+        batches = self.broker_metrics["batches"]
         return {
-            "avg_latency": avg,
-            "p95_latency": p95,
+            "avg_latency": lat.mean,
+            "p95_latency": lat.quantile(0.95),
+            "avg_delivery": delivery.mean,
+            "p95_delivery": delivery.quantile(0.95),
+            "p99_delivery": delivery.quantile(0.99),
             "messages_sent": self.broker_metrics["messages_sent"],
             "messages_failed": self.broker_metrics["messages_failed"],
-            "avg_queue_size": statistics.mean(
-                self.broker_metrics["queue_sizes"].values()) if self.broker_metrics["queue_sizes"] else 0}
+            "messages_dropped": self.broker_metrics["messages_dropped"],
+            "avg_batch": self.broker_metrics["batched"] / batches if batches else 0.0,
+            "avg_queue_size": statistics.mean(depths) if depths else 0,
+            "max_queue_size": max(depths, default=0)}
@@ -0,0 +1,128 @@
+import numpy as np
+from app.models import models
+
+REQUEST_DTYPE = np.dtype([
+    ("service", np.int32),
+    ("method", np.int8),
+    ("start", np.float64),
+    ("end", np.float64),
+    ("success", np.bool_),
+    ("tcp", np.float64),
+    ("tls", np.float64),
+    ("db", np.float64),
+    ("cache", np.float64),
+    ("processing", np.float64),
+])
+
+METHOD_IDS = {method: i for i, method in enumerate(models.HTTPMethod)}
+
+
+class RequestLog:
+    """Колоночный журнал запросов на структурированном массиве NumPy.
+
+    Массив выделяется заранее и увеличивается вдвое при заполнении,
+    имена сервисов хранятся как целочисленные идентификаторы.
+    """
+
+    def __init__(self, capacity: int = 65536):
+        self.rows = np.empty(capacity, dtype=REQUEST_DTYPE)
+        self.size = 0
+        self.service_ids: dict[str, int] = {}
+        self.service_names: list[str] = []
+
+    def service_id(self, name: str) -> int:
+        service_id = self.service_ids.get(name)
+        if service_id is None:
+            service_id = len(self.service_names)
+            self.service_ids[name] = service_id
+            self.service_names.append(name)
+        return service_id
+
+    def append(self, request: models.Request):
+        if self.size == len(self.rows):
+            self.rows = np.resize(self.rows, 2 * len(self.rows))
+        self.rows[self.size] = (
+            self.service_id(request.service_name),
+            METHOD_IDS[request.method],
+            request.start_time,
+            request.end_time,
+            bool(request.success),
+            request.tcp_time,
+            request.tls_time,
+            request.db_time,
+            request.cache_time,
+            request.processing_time,
+        )
+        self.size += 1
+
+    @property
+    def data(self) -> np.ndarray:
+        """Заполненная часть журнала (без копирования)"""
+        return self.rows[:self.size]
+
+    def _group_sum(self, ids: np.ndarray, values: np.ndarray | None = None):
+        return np.bincount(
+            ids, weights=values, minlength=len(self.service_names))
+
+    def service_summary(self) -> dict:
+        """Успехи, ошибки и средние времена по сервисам"""
+        data = self.data
+        ok = data[data["success"]]
+        successes = self._group_sum(ok["service"])
+        errors = self._group_sum(data["service"][~data["success"]])
+        divisor = np.maximum(successes, 1)
+        means = {
+            column: self._group_sum(ok["service"], values) / divisor
+            for column, values in (
+                ("avg_response", ok["end"] - ok["start"]),
+                ("avg_tcp", ok["tcp"]),
+                ("avg_tls", ok["tls"]),
+                ("avg_db", ok["db"]),
+                ("avg_cache", ok["cache"]),
+                ("avg_processing", ok["processing"]),
+            )}
+        summary = {}
+        for service_id, name in enumerate(self.service_names):
+            summary[name] = {
+                "success": int(successes[service_id]),
+                "error": int(errors[service_id]),
+            }
+            for column, values in means.items():
+                summary[name][column] = float(values[service_id])
+        return summary
+
+    def tcp_tls_avg(self) -> dict:
+        ok = self.data[self.data["success"]]
+        if not len(ok):
+            return {"tcp_avg": 0, "tls_avg": 0}
+        return {
+            "tcp_avg": float(ok["tcp"].mean()),
+            "tls_avg": float(ok["tls"].mean())}
+
+    def rps_series(self) -> tuple[list[int], list[int], list[int]]:
+        """Число запросов и ошибок по секундам завершения"""
+        data = self.data
+        if not len(data):
+            return [], [], []
+        seconds = data["end"].astype(np.int64)
+        times, inverse = np.unique(seconds, return_inverse=True)
+        rps = np.bincount(inverse)
+        errors = np.bincount(inverse, weights=~data["success"])
+        return times.tolist(), rps.tolist(), errors.astype(np.int64).tolist()
+
+    def service_counts(self) -> dict[str, int]:
+        counts = self._group_sum(self.data["service"])
+        return {
+            name: int(counts[service_id])
+            for service_id, name in enumerate(self.service_names)}
+
+    def active_seconds(self) -> int:
+        return len(np.unique(self.data["end"].astype(np.int64)))
+
+    def save(self, path: str):
+        """Сохранение журнала для офлайн-анализа"""
+        np.savez_compressed(
+            path,
+            requests=self.data,
+            services=np.array(self.service_names),
+            methods=np.array([method.value for method in METHOD_IDS]))
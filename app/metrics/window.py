@@ -0,0 +1,231 @@
+import math
+
+import numpy as np
+from . import histogram
+
+
+class RollingWindows:
+    """Скользящие окна по последним завершённым секундам.
+
+    Кольцевой буфер из max(windows) + 1 секундных ячеек хранит число
+    успешных и ошибочных запросов и счётчики корзин задержек. Для
+    каждого окна поддерживается сумма его ячеек: при смене секунды
+    завершённая ячейка добавляется, а вышедшая из окна вычитается.
+    Поэтому запись стоит O(1), чтение окна не зависит от числа запросов,
+    а память не растёт с длительностью прогона. Корзины всех ячеек
+    хранятся одной матрицей int32 с грубой сеткой (precision, диапазон
+    min_value..max_value): около 20 КБ на сервис.
+    """
+
+    def __init__(
+            self,
+            windows: tuple[int, ...] = (1, 10, 60),
+            precision: float = 0.1,
+            min_value: float = 1e-4,
+            max_value: float = 600.0):
+        self.windows = tuple(sorted(windows))
+        self.size = self.windows[-1] + 1
+        self.precision = precision
+        self.min_value = min_value
+        self.max_value = max_value
+        # Гистограмма-образец задаёт сетку корзин для матрицы ячеек
+        self.grid = self._histogram()
+        self.seconds = [-1] * self.size
+        self.success = [0] * self.size
+        self.errors = [0] * self.size
+        self.latencies = np.zeros((self.size, len(self.grid.counts)), dtype=np.int32)
+        self.sums = [0.0] * self.size
+        self.mins = [math.inf] * self.size
+        self.maxs = [-math.inf] * self.size
+        self.totals = {window: self._total() for window in self.windows}
+        self.current: int | None = None
+
+    def _histogram(self) -> histogram.LatencyHistogram:
+        return histogram.LatencyHistogram(
+            precision=self.precision, min_value=self.min_value, max_value=self.max_value)
+
+    def _total(self) -> dict:
+        return {"success": 0, "error": 0, "latencies": self._histogram()}
+
+    def _reset_slot(self, second: int):
+        i = second % self.size
+        self.seconds[i] = second
+        self.success[i] = 0
+        self.errors[i] = 0
+        self.latencies[i] = 0
+        self.sums[i] = 0.0
+        self.mins[i] = math.inf
+        self.maxs[i] = -math.inf
+
+    def advance(self, now: float):
+        """Перевод буфера на секунду now"""
+        second = int(now)
+        if self.current is None or second - self.current > self.size:
+            self.seconds = [-1] * self.size
+            self.totals = {window: self._total() for window in self.windows}
+            self.current = second
+            self._reset_slot(second)
+            return
+        while self.current < second:
+            completed = self.current % self.size
+            for window, total in self.totals.items():
+                self._add(total, completed, 1)
+                expired = self.current - window
+                if self.seconds[expired % self.size] == expired:
+                    self._add(total, expired % self.size, -1)
+            self.current += 1
+            self._reset_slot(self.current)
+
+    def _add(self, total: dict, i: int, sign: int):
+        if not self.success[i] and not self.errors[i]:
+            return
+        total["success"] += sign * self.success[i]
+        total["error"] += sign * self.errors[i]
+        if not self.success[i]:
+            return
+        latencies = total["latencies"]
+        latencies.counts += sign * self.latencies[i]
+        latencies.count += sign * self.success[i]
+        latencies.total += sign * self.sums[i]
+        if sign > 0:
+            latencies.min = min(latencies.min, self.mins[i])
+            latencies.max = max(latencies.max, self.maxs[i])
+        elif not latencies.count:
+            # min и max после вычитания остаются лишь границами значений
+            latencies.reset()
+
+    def record(self, now: float, success: bool, duration: float):
+        if int(now) != self.current:
+            self.advance(now)
+        # Запоздавший запрос учитывается в текущей секунде
+        i = self.current % self.size
+        if success:
+            self.success[i] += 1
+            self.latencies[i, self.grid._index(duration)] += 1
+            self.sums[i] += duration
+            if duration < self.mins[i]:
+                self.mins[i] = duration
+            if duration > self.maxs[i]:
+                self.maxs[i] = duration
+        else:
+            self.errors[i] += 1
+
+    def get(self, window: int, now: float) -> dict:
+        """RPS, доля ошибок и квантили задержки за последние window секунд"""
+        self.advance(now)
+        total = self.totals[window]
+        requests = total["success"] + total["error"]
+        p50, p99 = total["latencies"].quantiles([0.5, 0.99])
+        return {
+            "rps": requests / window,
+            "error_rate": total["error"] / requests if requests else 0.0,
+            "p50": p50,
+            "p99": p99,
+        }
+
+
+class DownsampledSeries:
+    """Ряд счётчиков успешных и ошибочных запросов с постоянной памятью.
+
+    Интервалы начинаются с resolution = 1 с; когда ряд не помещается в
+    max_points интервалов, соседние интервалы попарно объединяются, а
+    resolution удваивается.
+    """
+
+    rows = 2
+    empty = 0
+
+    def __init__(self, max_points: int = 3600):
+        # Чётное число интервалов, чтобы их можно было объединять попарно
+        self.max_points = max_points - max_points % 2
+        self.resolution = 1
+        self.origin: int | None = None
+        self.counts = np.full((self.rows, self.max_points), self.empty, dtype=np.int64)
+        self.last = -1
+
+    @staticmethod
+    def _combine(pairs: np.ndarray) -> np.ndarray:
+        return pairs.sum(axis=2)
+
+    def _coarsen(self):
+        half = self.max_points // 2
+        pairs = self._combine(self.counts[:, :half * 2].reshape(self.rows, half, 2))
+        self.counts[:] = self.empty
+        self.counts[:, :half] = pairs
+        self.resolution *= 2
+        self.last //= 2
+
+    def _slot(self, time: float) -> int:
+        """Индекс интервала момента time (ряд при необходимости огрубляется)"""
+        if self.origin is None:
+            self.origin = int(time)
+        index = int((time - self.origin) // self.resolution)
+        while index >= self.max_points:
+            self._coarsen()
+            index = int((time - self.origin) // self.resolution)
+        index = max(0, index)
+        self.last = max(self.last, index)
+        return index
+
+    def add(self, time: float, success: bool, count: int = 1):
+        self.counts[0 if success else 1, self._slot(time)] += count
+
+    def _align(self, other: "DownsampledSeries"):
+        while self.resolution < other.resolution:
+            self._coarsen()
+
+    def merge(self, other: "DownsampledSeries"):
+        if other.origin is None:
+            return
+        self._align(other)
+        for i in range(other.last + 1):
+            time = other.origin + i * other.resolution
+            for row, success in ((0, True), (1, False)):
+                if other.counts[row, i]:
+                    self.add(time, success, int(other.counts[row, i]))
+
+    def active_seconds(self) -> int:
+        """Длительность интервалов, в которых были запросы"""
+        return int(np.count_nonzero(self.counts.sum(axis=0))) * self.resolution
+
+    def series(self) -> tuple[list[float], list[float], list[float]]:
+        """Время начала интервалов, запросов и ошибок в секунду"""
+        if self.origin is None:
+            return [], [], []
+        used = self.counts[:, :self.last + 1] / self.resolution
+        times = [self.origin + i * self.resolution for i in range(self.last + 1)]
+        return times, (used[0] + used[1]).tolist(), used[1].tolist()
+
+
+class DownsampledMax(DownsampledSeries):
+    """Ряд наибольших значений (например, глубины очереди) по интервалам
+    с постоянной памятью; при огрублении берётся максимум пары"""
+
+    rows = 1
+    # Интервал без наблюдений
+    empty = -1
+
+    @staticmethod
+    def _combine(pairs: np.ndarray) -> np.ndarray:
+        return pairs.max(axis=2)
+
+    def add(self, time: float, value: int):
+        index = self._slot(time)
+        self.counts[0, index] = max(self.counts[0, index], value)
+
+    def merge(self, other: "DownsampledMax"):
+        if other.origin is None:
+            return
+        self._align(other)
+        for i in range(other.last + 1):
+            if other.counts[0, i] != self.empty:
+                self.add(other.origin + i * other.resolution, int(other.counts[0, i]))
+
+    def series(self) -> tuple[list[int], list[int]]:
+        """Время начала интервалов с наблюдениями и максимум в каждом"""
+        if self.origin is None:
+            return [], []
+        values = self.counts[0, :self.last + 1]
+        observed = np.nonzero(values != self.empty)[0]
+        times = [self.origin + int(i) * self.resolution for i in observed]
+        return times, values[observed].tolist()
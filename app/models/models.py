@@ -1,8 +1,11 @@
 from enum import Enum
-import time
+import sys
+from app.clock import clock
 
 
 class User:
+    __slots__ = ("id", "authorized")
+
     def __init__(self, user_id: int):
         self.id = user_id
         self.authorized = False
@@ -14,11 +17,42 @@ class HTTPMethod(Enum):
 
 
 class Request:
-    def __init__(self, user: User, service_name: str, method: HTTPMethod):
+    __slots__ = (
+        "clock",
+        "user",
+        "service_name",
+        "method",
+        "start_time",
+        "end_time",
+        "success",
+        "tcp_time",
+        "tls_time",
+        "db_time",
+        "cache_time",
+        "processing_time",
+        "network_latency",
+    )
+
+    def __init__(
+            self,
+            user: User,
+            service_name: str,
+            method: HTTPMethod,
+            clock: clock.Clock = clock.default_clock):
+        self.reset(user, service_name, method, clock)
+
+    def reset(
+            self,
+            user: User,
+            service_name: str,
+            method: HTTPMethod,
+            clock: clock.Clock):
+        """Заполнение полей запроса заново (используется и при повторном использовании)"""
+        self.clock = clock
         self.user: User = user
-        self.service_name: str = service_name
+        self.service_name: str = sys.intern(service_name)
         self.method: HTTPMethod = method
-        self.start_time: float = time.time()
+        self.start_time: float = clock.now()
         self.end_time: float | None = None
         self.success: bool | None = None
 
@@ -33,11 +67,48 @@ class Request:
     @property
     def duration(self) -> float:
         """Общее время обработки запроса"""
-        return (self.end_time or time.time()) - self.start_time
+        return (self.end_time or self.clock.now()) - self.start_time
+
+
+class RequestPool:
+    """Пул повторно используемых объектов Request.
+
+    Запрос возвращается в пул после того, как MetricsCollector.record
+    сохранил его метрики; после release на объект нельзя ссылаться.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._free: list[Request] = []
+
+    def acquire(
+            self,
+            user: User,
+            service_name: str,
+            method: HTTPMethod,
+            clock: clock.Clock = clock.default_clock) -> Request:
+        if self._free:
+            request = self._free.pop()
+            request.reset(user, service_name, method, clock)
+            return request
+        return Request(user, service_name, method, clock)
+
+    def release(self, request: Request):
+        if len(self._free) < self.max_size:
+            request.user = None
+            self._free.append(request)
 
 
 class Message:
-    def __init__(self, topic: str, payload: dict):
+    __slots__ = ("topic", "payload", "timestamp", "enqueued")
+
+    def __init__(
+            self,
+            topic: str,
+            payload: dict,
+            clock: clock.Clock = clock.default_clock):
         self.topic = topic
         self.payload = payload
-        self.timestamp = time.time()
+        self.timestamp = clock.now()
+        # Момент помещения в очередь брокера; до этого — момент публикации
+        self.enqueued = self.timestamp
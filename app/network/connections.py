@@ -0,0 +1,178 @@
+import asyncio
+import contextlib
+from collections import OrderedDict
+from typing import Hashable
+from app.clock import clock
+from app.metrics import metrics
+from app.models import models
+from app.rng import streams
+
+
+class Connection:
+    __slots__ = ("key", "requests", "streams", "last_used", "closed")
+
+    def __init__(self, key: Hashable, now: float):
+        self.key = key
+        self.requests = 0
+        self.streams = 0
+        self.last_used = now
+        self.closed = False
+
+
+class ConnectionPool:
+    """Клиентский пул keep-alive соединений к одному адресату.
+
+    Соединения группируются по ключу (например, id пользователя для
+    клиентских соединений к Nginx); без ключа пул общий, как upstream
+    keepalive в Nginx. Простаивающее дольше idle_timeout соединение
+    закрывается, как и обслужившее max_requests запросов. Новое
+    соединение платит TCP handshake и полный TLS handshake, а при
+    действующем session ticket — только resumption_cost от его стоимости.
+    При multiplexing по одному соединению идёт до max_streams запросов
+    одновременно (HTTP/2), иначе — по одному.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            metrics_collector: metrics.MetricsCollector,
+            idle_timeout: float = 60.0,
+            max_requests: int = 1000,
+            max_idle: int = 32,
+            tls_resumption: bool = True,
+            resumption_cost: float = 0.3,
+            ticket_lifetime: float = 300.0,
+            multiplexing: bool = False,
+            max_streams: int = 100,
+            tcp_handshake: tuple[float, float] = (0.01, 0.03),
+            tls_handshake: tuple[float, float] = (0.02, 0.05),
+            clock: clock.Clock = clock.default_clock,
+            rng: streams.RandomStream | None = None):
+        self.name = name
+        self.metrics_collector = metrics_collector
+        self.idle_timeout = idle_timeout
+        self.max_requests = max_requests
+        self.max_idle = max_idle
+        self.tls_resumption = tls_resumption
+        self.resumption_cost = resumption_cost
+        self.ticket_lifetime = ticket_lifetime
+        self.stream_limit = max_streams if multiplexing else 1
+        self.tcp_handshake = tcp_handshake
+        self.tls_handshake = tls_handshake
+        self.clock = clock
+        self.rng = rng or streams.default_factory.stream(f"{name}/connections")
+        # Открытые соединения по ключам в порядке последнего обращения
+        self.open: OrderedDict[Hashable, list[Connection]] = OrderedDict()
+        self.touched: dict[Hashable, float] = {}
+        self.tickets: OrderedDict[Hashable, float] = OrderedDict()
+
+    def _touch(self, key: Hashable, now: float):
+        self.open.move_to_end(key)
+        self.touched[key] = now
+
+    def _expire(self, now: float):
+        """Закрытие соединений ключей, к которым давно не обращались"""
+        while self.open:
+            key = next(iter(self.open))
+            if now - self.touched[key] <= self.idle_timeout:
+                break
+            connections = self.open.pop(key)
+            del self.touched[key]
+            active = [c for c in connections if c.streams]
+            for connection in connections:
+                if not connection.streams:
+                    connection.closed = True
+            if active:
+                self.open[key] = active
+                self.touched[key] = now
+        while self.tickets:
+            key, issued = next(iter(self.tickets.items()))
+            if now - issued <= self.ticket_lifetime:
+                break
+            del self.tickets[key]
+
+    async def acquire(self, request: models.Request, key: Hashable = None) -> Connection:
+        """Соединение для запроса; время handshake добавляется в request"""
+        now = self.clock.now()
+        self._expire(now)
+        connections = self.open.get(key)
+        if connections is not None:
+            reusable = None
+            alive = []
+            for connection in connections:
+                if not connection.streams and now - connection.last_used > self.idle_timeout:
+                    connection.closed = True
+                    continue
+                alive.append(connection)
+                if (reusable is None
+                        and connection.streams < self.stream_limit
+                        and connection.requests < self.max_requests):
+                    reusable = connection
+            connections[:] = alive
+            self._touch(key, now)
+            if reusable is not None:
+                self._use(reusable, now)
+                self.metrics_collector.record_connection(self.name, reused=True)
+                return reusable
+
+        start = now
+        await asyncio.sleep(self.rng.uniform(*self.tcp_handshake))
+        request.tcp_time += self.clock.now() - start
+
+        start = self.clock.now()
+        tls_time = self.rng.uniform(*self.tls_handshake)
+        resumed = self.tls_resumption and key in self.tickets
+        if resumed:
+            tls_time *= self.resumption_cost
+        await asyncio.sleep(tls_time)
+        now = self.clock.now()
+        request.tls_time += now - start
+        if self.tls_resumption:
+            self.tickets[key] = now
+            self.tickets.move_to_end(key)
+
+        connection = Connection(key, now)
+        self.open.setdefault(key, []).append(connection)
+        self._touch(key, now)
+        self._use(connection, now)
+        self.metrics_collector.record_connection(self.name, reused=False, resumed=resumed)
+        return connection
+
+    def _use(self, connection: Connection, now: float):
+        connection.requests += 1
+        connection.streams += 1
+        connection.last_used = now
+
+    def release(self, connection: Connection):
+        now = self.clock.now()
+        connection.streams -= 1
+        connection.last_used = now
+        if connection.closed:
+            return
+        key = connection.key
+        connections = self.open[key]
+        self._touch(key, now)
+        if connection.requests >= self.max_requests or (
+                not connection.streams
+                and sum(1 for c in connections if not c.streams) > self.max_idle):
+            connection.closed = True
+            connections.remove(connection)
+            if not connections:
+                del self.open[key]
+                del self.touched[key]
+
+    def close_all(self):
+        """Разрыв всех соединений (адресат упал)"""
+        for connections in self.open.values():
+            for connection in connections:
+                connection.closed = True
+        self.open.clear()
+        self.touched.clear()
+
+    @contextlib.asynccontextmanager
+    async def connection(self, request: models.Request, key: Hashable = None):
+        connection = await self.acquire(request, key)
+        try:
+            yield connection
+        finally:
+            self.release(connection)
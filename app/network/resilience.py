@@ -0,0 +1,76 @@
+from app.metrics import histogram
+from app.rng import streams
+
+
+class RetryBudget:
+    """Бюджет повторов: каждый запрос маршрута добавляет ratio токена,
+    каждый повтор или хедж тратит целый токен.
+
+    Так доля дополнительных попыток в установившемся режиме не превышает
+    ratio, а запас max_tokens позволяет повторять и при малом трафике.
+    """
+
+    def __init__(self, ratio: float = 0.1, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class RoutePolicy:
+    """Политика вызова маршрута: дедлайн, повторы и хеджирование.
+
+    deadline — сквозной предел времени запроса со всеми попытками.
+    Повтор выполняется не более max_retries раз с экспоненциальной
+    задержкой backoff * 2^n, ограниченной max_backoff, и полным джиттером.
+    При hedge копия запроса уходит на другой инстанс, если первая попытка
+    не ответила за hedge_quantile задержек маршрута (после
+    hedge_min_samples наблюдений).
+    """
+
+    def __init__(
+            self,
+            deadline: float | None = None,
+            max_retries: int = 0,
+            backoff: float = 0.05,
+            max_backoff: float = 1.0,
+            retry_budget: float = 0.1,
+            budget_reserve: float = 10.0,
+            hedge: bool = False,
+            hedge_quantile: float = 0.95,
+            hedge_min_samples: int = 50,
+            rng: streams.RandomStream | None = None):
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.budget = RetryBudget(retry_budget, budget_reserve)
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.rng = rng or streams.default_factory.stream("RoutePolicy")
+        self.latencies = histogram.LatencyHistogram()
+        self._hedge_delay: float | None = None
+
+    def backoff_delay(self, retry: int) -> float:
+        """Задержка перед повтором номер retry (с 1)"""
+        return self.rng.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** (retry - 1)))
+
+    def observe(self, latency: float):
+        """Задержка успешной попытки для расчёта порога хеджирования"""
+        self.latencies.record(latency)
+        # Квантиль пересчитывается периодически, а не на каждый запрос
+        if self.latencies.count % self.hedge_min_samples == 0:
+            self._hedge_delay = self.latencies.quantile(self.hedge_quantile)
+
+    def hedge_delay(self) -> float | None:
+        return self._hedge_delay if self.hedge else None
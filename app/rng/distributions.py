@@ -0,0 +1,115 @@
+import math
+
+import numpy as np
+
+
+class Distribution:
+    """Распределение задержки, генерирующее значения блоками"""
+
+    def sample(self, generator: np.random.Generator, size: int) -> np.ndarray:
+        raise NotImplementedError
+
+    @property
+    def mean(self) -> float:
+        raise NotImplementedError
+
+
+class Uniform(Distribution):
+    def __init__(self, low: float, high: float):
+        self.low = low
+        self.high = high
+
+    def sample(self, generator, size):
+        return generator.uniform(self.low, self.high, size)
+
+    @property
+    def mean(self):
+        return (self.low + self.high) / 2
+
+
+class LogNormal(Distribution):
+    """Логнормальное распределение с медианой median"""
+
+    def __init__(self, median: float, sigma: float):
+        self.median = median
+        self.sigma = sigma
+
+    def sample(self, generator, size):
+        return generator.lognormal(math.log(self.median), self.sigma, size)
+
+    @property
+    def mean(self):
+        return self.median * math.exp(self.sigma ** 2 / 2)
+
+
+class Gamma(Distribution):
+    """Гамма-распределение, заданное средним и параметром формы"""
+
+    def __init__(self, mean: float, shape: float):
+        self._mean = mean
+        self.shape = shape
+
+    def sample(self, generator, size):
+        return generator.gamma(self.shape, self._mean / self.shape, size)
+
+    @property
+    def mean(self):
+        return self._mean
+
+
+class ParetoTail(Distribution):
+    """Распределение Парето: минимум scale и тяжёлый хвост с индексом alpha"""
+
+    def __init__(self, scale: float, alpha: float):
+        self.scale = scale
+        self.alpha = alpha
+
+    def sample(self, generator, size):
+        return (generator.pareto(self.alpha, size) + 1) * self.scale
+
+    @property
+    def mean(self):
+        if self.alpha <= 1:
+            return math.inf
+        return self.alpha * self.scale / (self.alpha - 1)
+
+
+class Empirical(Distribution):
+    """Выборка с возвращением из наблюдённых значений"""
+
+    def __init__(self, samples: list[float] | np.ndarray):
+        self.samples = np.asarray(samples, dtype=np.float64)
+        if not len(self.samples):
+            raise ValueError("Эмпирическое распределение требует непустую выборку")
+
+    @classmethod
+    def from_file(cls, path: str) -> "Empirical":
+        """Значения в секундах, по одному на строку или через пробел"""
+        return cls(np.loadtxt(path, dtype=np.float64).ravel())
+
+    def sample(self, generator, size):
+        return generator.choice(self.samples, size)
+
+    @property
+    def mean(self):
+        return float(self.samples.mean())
+
+
+DISTRIBUTIONS = {
+    "uniform": Uniform,
+    "lognormal": LogNormal,
+    "gamma": Gamma,
+    "pareto": ParetoTail,
+    "empirical": Empirical,
+}
+
+
+def from_spec(spec: dict) -> Distribution:
+    """Распределение по описанию вида {"type": "lognormal", "median": 0.1, ...}"""
+    params = dict(spec)
+    kind = params.pop("type")
+    if kind == "empirical" and "file" in params:
+        return Empirical.from_file(params["file"])
+    if kind not in DISTRIBUTIONS:
+        raise ValueError(f"Неизвестное распределение: {kind}")
+    return DISTRIBUTIONS[kind](**params)
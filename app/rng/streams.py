@@ -0,0 +1,81 @@
+import hashlib
+import math
+import struct
+from typing import Sequence, TypeVar
+
+import numpy as np
+from .distributions import Distribution
+
+T = TypeVar("T")
+
+
+class RandomStream:
+    """Поток случайных чисел одного компонента модели.
+
+    Значения генерируются numpy.random.Generator блоками по block_size
+    и выдаются по одному; блок пополняется лениво по мере расхода.
+    Сам генератор создаётся при первом розыгрыше: многие потоки (например,
+    сбоев) за короткий прогон не используются.
+    """
+
+    def __init__(self, seed_sequence: np.random.SeedSequence, block_size: int = 4096):
+        self.seed_sequence = seed_sequence
+        self.block_size = block_size
+        self._generator: np.random.Generator | None = None
+        self._uniforms: list[float] = []
+        self._blocks: dict[Distribution, list[float]] = {}
+
+    @property
+    def generator(self) -> np.random.Generator:
+        if self._generator is None:
+            self._generator = np.random.Generator(np.random.PCG64(self.seed_sequence))
+        return self._generator
+
+    def _refill(self) -> list[float]:
+        self._uniforms = self.generator.random(self.block_size).tolist()
+        return self._uniforms
+
+    def random(self) -> float:
+        """Равномерное число из [0, 1)"""
+        return (self._uniforms or self._refill()).pop()
+
+    def uniform(self, a: float, b: float) -> float:
+        return a + (b - a) * (self._uniforms or self._refill()).pop()
+
+    def expovariate(self, rate: float) -> float:
+        return -math.log(1.0 - self.random()) / rate
+
+    def choice(self, seq: Sequence[T]) -> T:
+        return seq[int(self.random() * len(seq))]
+
+    def draw(self, distribution: Distribution) -> float:
+        """Значение из произвольного распределения задержки"""
+        block = self._blocks.get(distribution)
+        if not block:
+            block = distribution.sample(self.generator, self.block_size).tolist()
+            self._blocks[distribution] = block
+        return block.pop()
+
+
+class StreamFactory:
+    """Независимые воспроизводимые потоки по именам компонентов.
+
+    Поток компонента зависит только от общего сида и имени, поэтому
+    порядок создания компонентов и планирования задач на него не влияет.
+    """
+
+    def __init__(self, seed: int | None = None, block_size: int = 4096):
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.block_size = block_size
+
+    def stream(self, name: str) -> RandomStream:
+        # Ключ — 128-битный хэш имени (четыре слова uint32): совпадение
+        # имён практически исключено, а длина ключа от имени не зависит
+        digest = hashlib.blake2b(name.encode(), digest_size=16).digest()
+        child = np.random.SeedSequence(
+            self.seed_sequence.entropy,
+            spawn_key=struct.unpack("<4I", digest))
+        return RandomStream(child, self.block_size)
+
+
+default_factory = StreamFactory()
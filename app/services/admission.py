@@ -0,0 +1,135 @@
+import asyncio
+import math
+from collections import deque
+from app.clock import clock
+from app.metrics import metrics
+from app.models import models
+
+SHEDDING_POLICIES = ("reject", "lifo", "codel", "deadline")
+
+
+class RequestShed(Exception):
+    """Запрос отброшен очередью допуска"""
+
+
+class AdmissionQueue:
+    """Пул обработчиков инстанса с ограниченной очередью допуска.
+
+    Одновременно обрабатывается не больше workers запросов, остальные
+    ждут в очереди длиной до queue_size. Политики перегрузки:
+
+    - reject — FIFO, при заполненной очереди новый запрос отклоняется;
+    - lifo — FIFO, пока старейший запрос ждёт меньше target, иначе
+      обслуживается самый свежий; при заполненной очереди вытесняется старейший;
+    - codel — FIFO с адаптивным сбросом по алгоритму CoDel: если время
+      ожидания дольше interval держится выше target, запросы сбрасываются
+      с частотой, растущей как корень из числа сбросов;
+    - deadline — FIFO, запрос сбрасывается, если к моменту выхода из
+      очереди с его начала прошло больше deadline.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            workers: int,
+            metrics_collector: metrics.MetricsCollector,
+            queue_size: int = 64,
+            policy: str = "reject",
+            target: float = 0.005,
+            interval: float = 0.1,
+            deadline: float = 1.0,
+            clock: clock.Clock = clock.default_clock):
+        if policy not in SHEDDING_POLICIES:
+            raise ValueError(f"Неизвестная политика перегрузки: {policy}")
+        if workers < 1:
+            raise ValueError("Число обработчиков должно быть положительным")
+        self.name = name
+        self.workers = workers
+        self.queue_size = queue_size
+        self.policy = policy
+        self.target = target
+        self.interval = interval
+        self.deadline = deadline
+        self.metrics_collector = metrics_collector
+        self.clock = clock
+        self.busy = 0
+        self.queue: deque[tuple[asyncio.Future, float, float]] = deque()
+        # Состояние CoDel
+        self.first_above_time = 0.0
+        self.dropping = False
+        self.drop_count = 0
+        self.drop_next = 0.0
+
+    def _shed(self, future: asyncio.Future, reason: str):
+        if future.done():
+            # Ожидавший запрос уже отменён
+            return
+        self.metrics_collector.record_shed(self.name, reason)
+        future.set_exception(RequestShed(f"{self.name}: запрос отброшен ({reason})"))
+
+    async def acquire(self, request: models.Request):
+        """Ожидание свободного обработчика"""
+        if self.busy < self.workers and not self.queue:
+            self.busy += 1
+            self.metrics_collector.record_queue_wait(self.name, 0.0)
+            return
+        if len(self.queue) >= self.queue_size:
+            if self.policy != "lifo" or not self.queue:
+                self.metrics_collector.record_shed(self.name, "queue_full")
+                raise RequestShed(f"{self.name}: очередь заполнена")
+            self._shed(self.queue.popleft()[0], "queue_full")
+        future = asyncio.get_running_loop().create_future()
+        enqueued = self.clock.now()
+        self.queue.append((future, enqueued, request.start_time))
+        self.metrics_collector.record_queue_length(self.name, len(self.queue))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.release()
+            raise
+        self.metrics_collector.record_queue_wait(self.name, self.clock.now() - enqueued)
+
+    def release(self):
+        """Освобождение обработчика и выдача его следующему запросу"""
+        self.busy -= 1
+        while self.busy < self.workers and self.queue:
+            future, enqueued, started = self._next()
+            if future.done():
+                continue
+            if self._should_drop(enqueued, started):
+                self._shed(future, self.policy)
+                continue
+            self.busy += 1
+            future.set_result(None)
+
+    def _next(self) -> tuple[asyncio.Future, float, float]:
+        if (self.policy == "lifo"
+                and self.clock.now() - self.queue[0][1] > self.target):
+            return self.queue.pop()
+        return self.queue.popleft()
+
+    def _should_drop(self, enqueued: float, started: float) -> bool:
+        now = self.clock.now()
+        if self.policy == "deadline":
+            return now - started > self.deadline
+        if self.policy != "codel":
+            return False
+        if now - enqueued < self.target or not self.queue:
+            self.first_above_time = 0.0
+            self.dropping = False
+            return False
+        if not self.first_above_time:
+            self.first_above_time = now + self.interval
+            return False
+        if now < self.first_above_time:
+            return False
+        if not self.dropping:
+            self.dropping = True
+            self.drop_count = 1
+        elif now >= self.drop_next:
+            self.drop_count += 1
+        else:
+            return False
+        self.drop_next = now + self.interval / math.sqrt(self.drop_count)
+        return True
@@ -1,8 +1,8 @@
 import asyncio
-import random
 from app.services import service
 from app.models import models
 from app.store import cluster
+from app.clock import clock
 
 
 class AuthService(service.Service):
@@ -16,7 +16,12 @@ class AuthService(service.Service):
             cache=None,
             base_latency=0.05,
             fail_prob=0.05,
-            requires_auth=False):
+            requires_auth=False,
+            clock=clock.default_clock,
+            rng=None,
+            failure_rng=None,
+            latency_distribution=None,
+            connections=None):
         super().__init__(
             name,
             metrics_collector,
@@ -24,14 +29,25 @@ class AuthService(service.Service):
             cache,
             base_latency,
             fail_prob,
-            requires_auth)
+            requires_auth,
+            clock=clock,
+            rng=rng,
+            failure_rng=failure_rng,
+            latency_distribution=latency_distribution,
+            connections=connections)
 
     async def handle(self, request: models.Request):
+        if self.connections is not None:
+            async with self.connections.connection(request):
+                return await self.authorize(request)
         await self.tcp_handshake()
         await self.tls_handshake()
+        return await self.authorize(request)
+
+    async def authorize(self, request: models.Request):
         if not request.user.authorized:
-            await asyncio.sleep(random.uniform(0.05, 0.1))
-            request.user.authorized = random.random() < 0.9
+            await asyncio.sleep(self.rng.uniform(0.05, 0.1))
+            request.user.authorized = self.rng.random() < 0.9
             if not request.user.authorized:
                 raise Exception("Ошибка авторизации пользователя")
         return
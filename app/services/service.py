@@ -1,6 +1,7 @@
 import asyncio
-import random
-import time
+import sys
+from typing import Callable
+from app.clock import clock
 from app.logger import logger as context_logger
 from app.store.database import db
 from app.store import cluster
@@ -9,6 +10,12 @@ from app.models import models
 from app.broker import rabbitmq
 from app.utils import auth
 from app.metrics import metrics
+from app.rng import distributions, streams
+from app.network import connections as network
+from . import admission
+
+
+CACHE_WRITE_POLICIES = ("invalidate", "write_through")
 
 
 class Service:
@@ -21,85 +28,164 @@ class Service:
             base_latency: float = 0.05,
             fail_prob: float = 0.05,
             requires_auth: bool = False,
-            broker: rabbitmq.RabbitMQ | None = None
+            broker: rabbitmq.RabbitMQ | None = None,
+            clock: clock.Clock = clock.default_clock,
+            rng: streams.RandomStream | None = None,
+            failure_rng: streams.RandomStream | None = None,
+            latency_distribution: distributions.Distribution | None = None,
+            cache_write_policy: str = "invalidate",
+            workers: int | None = None,
+            queue_size: int = 64,
+            shedding: str = "reject",
+            deadline: float = 1.0,
+            connections: network.ConnectionPool | None = None
     ):
-        self.name = name
+        if cache_write_policy not in CACHE_WRITE_POLICIES:
+            raise ValueError(
+                f"Неизвестная политика записи в кэш: {cache_write_policy}")
+        self.name = sys.intern(name)
         self.db_cluster = db_cluster
         self.metrics_collector = metrics_collector
         self.cache = cache
+        self.cache_write_policy = cache_write_policy
         self.base_latency = base_latency
         self.fail_prob = fail_prob
-        self.available = True
+        self.availability_listeners: list[Callable[["Service"], None]] = []
+        self._available = True
         self.requires_auth = requires_auth
         self.broker = broker
+        self.connections = connections
+        self.clock = clock
+        self.rng = rng or streams.default_factory.stream(name)
+        # Отдельный поток для сбоев, чтобы они не сдвигали поток запросов
+        self.failure_rng = failure_rng or streams.default_factory.stream(f"{name}/failures")
+        self.latency_distribution = latency_distribution or distributions.Uniform(
+            base_latency, 2 * base_latency)
+        self.admission = admission.AdmissionQueue(
+            self.name,
+            workers,
+            metrics_collector,
+            queue_size=queue_size,
+            policy=shedding,
+            deadline=deadline,
+            clock=clock) if workers else None
+
+    @property
+    def available(self) -> bool:
+        return self._available
+
+    @available.setter
+    def available(self, value: bool):
+        """Смена доступности с уведомлением подписчиков (балансировщика)"""
+        if value == self._available:
+            return
+        self._available = value
+        for listener in self.availability_listeners:
+            listener(self)
 
     async def tcp_handshake(self):
         """TCP handshake"""
-        await asyncio.sleep(random.uniform(0.01, 0.03))
+        await asyncio.sleep(self.rng.uniform(0.01, 0.03))
 
     async def tls_handshake(self):
         """TLS handshake"""
-        await asyncio.sleep(random.uniform(0.02, 0.05))
+        await asyncio.sleep(self.rng.uniform(0.02, 0.05))
 
     @auth.auth_check
     async def handle(self, request: models.Request):
         """Обработка запроса"""
-        logger = context_logger.get_logger()
-        user = request.user
+        if self.connections is not None:
+            async with self.connections.connection(request):
+                return await self.serve(request)
 
-        start_tcp = time.time()
+        start_tcp = self.clock.now()
         await self.tcp_handshake()
-        tcp_time = time.time() - start_tcp
-        start_tls = time.time()
+        tcp_time = self.clock.now() - start_tcp
+        start_tls = self.clock.now()
         await self.tls_handshake()
-        tls_time = time.time() - start_tls
-        request.tcp_time = tcp_time
-        request.tls_time = tls_time
+        tls_time = self.clock.now() - start_tls
+        request.tcp_time += tcp_time
+        request.tls_time += tls_time
+        return await self.serve(request)
 
+    async def serve(self, request: models.Request):
+        """Обработка запроса по установленному соединению"""
         if not self.available:
             raise Exception(f"Service {self.name} недоступен")
 
-        await asyncio.sleep(random.uniform(self.base_latency, 2 * self.base_latency))
-        if random.random() < self.fail_prob:
+        if self.admission is None:
+            return await self.process(request)
+        await self.admission.acquire(request)
+        try:
+            return await self.process(request)
+        finally:
+            self.admission.release()
+
+    async def process(self, request: models.Request):
+        """Обработка запроса обработчиком инстанса"""
+        logger = context_logger.get_logger()
+        user = request.user
+        await asyncio.sleep(self.rng.draw(self.latency_distribution))
+        if self.rng.random() < self.fail_prob:
             raise Exception(f"{self.name} внутренняя ошибка")
 
+        cache_key = f"user:{user.id}"
         if request.method == models.HTTPMethod.POST:
             if self.db_cluster:
                 try:
-                    await self.db_cluster.write(f"key-{request.user.id}", f"value-{request.user.id}")
+                    await self.db_cluster.write(
+                        f"key-{user.id}", f"value-{user.id}", session=user.id)
                 except Exception as e:
-                    logger.warning(
-                        f"Кластер {
-                            self.db_cluster.name} недоступен")
+                    logger.warning("Кластер %s недоступен", self.db_cluster.name)
+                else:
+                    if self.cache:
+                        await self.update_cache(cache_key, f"value-{user.id}")
 
         else:
+            data = None
             if self.cache:
-                data = await self.cache.get("user:" + str(user.id))
-                if not data:
-                    if self.db_cluster:
-                        await self.db_cluster.read("data to get")
-            else:
-                if self.db_cluster:
-                    await self.db_cluster.read("data to get")
+                data = await self.cache.get(cache_key)
+            if data is None and self.db_cluster:
+                data = await self.db_cluster.read(f"key-{user.id}", session=user.id)
+                # Отсутствующую в БД запись не кэшируем
+                if self.cache and data is not None:
+                    await self.update_cache(cache_key, data, populate=True)
 
-        logger.info(f"✅ {self.name} обработал запрос {user.id}")
+        logger.info("✅ %s обработал запрос %s", self.name, user.id)
         if self.broker:
             msg = models.Message(
                 topic="messages",
                 payload={
                     "service": self.name,
-                    "user_id": request.user.id})
+                    "user_id": request.user.id},
+                clock=self.clock)
             await self.broker.publish(msg)
         return "ok"
 
+    async def update_cache(self, key: str, value, populate: bool = False):
+        """Заполнение кэша после промаха или его обновление после записи в БД.
+
+        Ошибка кэша здесь не ломает запрос: данные уже есть в БД.
+        """
+        logger = context_logger.get_logger()
+        try:
+            if populate or self.cache_write_policy == "write_through":
+                await self.cache.put(key, value)
+            else:
+                await self.cache.delete(key)
+        except Exception as e:
+            logger.warning("Кэш %s: %s", self.cache.name, e)
+
     async def simulate_failure(self):
         """Моделирование недоступности сервиса"""
         logger = context_logger.get_logger()
         while True:
-            await asyncio.sleep(random.uniform(15, 40))
+            await asyncio.sleep(self.failure_rng.uniform(15, 40))
             self.available = False
-            logger.warning(f"⚠️ {self.name} упал")
+            if self.connections is not None:
+                self.connections.close_all()
+            logger.warning("⚠️ %s упал", self.name)
             self.metrics_collector.infrastructure["service_failures"] += 1
-            await asyncio.sleep(random.uniform(5, 15))
+            await asyncio.sleep(self.failure_rng.uniform(5, 15))
             self.available = True
-            logger.info(f"✅ {self.name} восстановился")
+            logger.info("✅ %s восстановился", self.name)
@@ -1,55 +1,226 @@
 import asyncio
-import random
 import time
-from typing import Any
+from collections import OrderedDict
+from typing import Any, Hashable
+from app.clock import clock
 from app.store.database import db
 from app.logger import logger as context_logger
+from app.metrics import metrics
+from app.rng import streams
+from .replication import ReplicationLog
+from .routing import READ_ROUTERS
+
+REPLICATION_MODES = ("async", "semi_sync", "sync")
 
 
 class DBCluster:
-    """Имитация кластера баз данных с master-slave репликацией."""
+    """Имитация кластера баз данных с master-slave репликацией.
+
+    Записи master попадают в журнал репликации через group commit: один
+    сброс журнала (fsync_latency) подтверждает все записи, накопленные за
+    commit_delay. Каждую реплику обслуживает отдельная задача, которая
+    отправляет ей журнал пакетами до batch_size записей, платя
+    replication_delay за пакет. Режимы подтверждения записи:
+
+    - async — запись подтверждается после сброса журнала на master;
+    - semi_sync — дополнительно ждём применения хотя бы одной репликой,
+      по истечении ack_timeout запись подтверждается асинхронно;
+    - sync — ждём применения всеми доступными репликами, по истечении
+      ack_timeout запись считается неуспешной.
+
+    Узел для чтения выбирает политика read_routing среди доступных
+    реплик, отстающих от master не больше чем на max_lag секунд. При
+    read_your_writes после записи в сессии её чтения идут только на
+    master или реплики, уже применившие эту запись.
+    """
 
     def __init__(self,
                  name: str,
                  master: db.Database,
                  replicas: list[db.Database],
-                 replication_delay: float = 0.1):
+                 replication_delay: float = 0.1,
+                 mode: str = "async",
+                 batch_size: int = 100,
+                 commit_delay: float = 0.0,
+                 fsync_latency: float = 0.002,
+                 ack_timeout: float = 1.0,
+                 retry_interval: float = 1.0,
+                 read_routing: str = "random",
+                 max_lag: float | None = None,
+                 read_your_writes: bool = False,
+                 max_sessions: int = 10000,
+                 metrics_collector: metrics.MetricsCollector | None = None,
+                 clock: clock.Clock = clock.default_clock,
+                 rng: streams.RandomStream | None = None):
+        if mode not in REPLICATION_MODES:
+            raise ValueError(f"Неизвестный режим репликации: {mode}")
+        if read_routing not in READ_ROUTERS:
+            raise ValueError(f"Неизвестная политика чтения: {read_routing}")
         self.name = name
         self.master = master
         self.replicas = replicas
         self.replication_delay = replication_delay
+        self.mode = mode
+        self.batch_size = batch_size
+        self.commit_delay = commit_delay
+        self.fsync_latency = fsync_latency
+        self.ack_timeout = ack_timeout
+        self.retry_interval = retry_interval
+        self.metrics_collector = metrics_collector or master.metrics_collector
+        self.clock = clock
         self.failed_masters = []
         self.current_master = master
         self.failover_in_progress = False
+        self.rng = rng or streams.default_factory.stream(name)
+        self.log = ReplicationLog()
+        self.pending: list[tuple[str, Any, asyncio.Future]] = []
+        self.commit_signal: asyncio.Event | None = None
+        self.committer: asyncio.Task | None = None
+        self.streamers: dict[str, asyncio.Task] = {}
+        self.router = READ_ROUTERS[read_routing](self.rng)
+        self.max_lag = max_lag
+        self.read_your_writes = read_your_writes
+        self.max_sessions = max_sessions
+        # LSN последней записи сессии и последней записи ключа
+        self.sessions: OrderedDict[Hashable, int] = OrderedDict()
+        self.written: OrderedDict[str, int] = OrderedDict()
 
-    async def replicate(self, key: str, value: Any):
-        """Имитация задержки репликации данных на слейвы."""
-        await asyncio.sleep(self.replication_delay)
-        logger = context_logger.get_logger()
+    def start_replication(self):
+        """Запуск задачи group commit и задач отправки журнала репликам.
+
+        Вызывается повторно после смены состава реплик: новым репликам
+        назначаются задачи, у ставших master задачи останавливаются.
+        """
+        if self.committer is None:
+            self.commit_signal = asyncio.Event()
+            self.committer = asyncio.create_task(self.commit_loop())
+        names = {replica.name for replica in self.replicas}
+        for name in list(self.streamers):
+            if name not in names:
+                self.streamers.pop(name).cancel()
+                self.log.unfollow(name)
         for replica in self.replicas:
-            if replica.available:
-                try:
-                    await replica.put(key, value)
-                except Exception as e:
-                    logger.error(e)
+            if replica.name not in self.streamers:
+                # Новая реплика начинает с актуальной копии master
+                self.log.follow(replica.name)
+                self.streamers[replica.name] = asyncio.create_task(
+                    self.stream(replica))
+
+    async def commit_loop(self):
+        """Group commit: одна запись журнала на группу транзакций"""
+        while True:
+            await self.commit_signal.wait()
+            self.commit_signal.clear()
+            if self.commit_delay:
+                await asyncio.sleep(self.commit_delay)
+            group, self.pending = self.pending, []
+            await asyncio.sleep(self.fsync_latency)
+            now = self.clock.now()
+            for key, value, future in group:
+                lsn = self.log.append(key, value, now)
+                if not future.done():
+                    future.set_result(lsn)
+            self.metrics_collector.record_commit_group(self.name, len(group))
+
+    async def commit(self, key: str, value: Any) -> int:
+        """Фиксация записи в журнале; возвращает её LSN"""
+        self.start_replication()
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((key, value, future))
+        self.commit_signal.set()
+        return await future
 
-        
-        logger.info(f"🔄 Репликация ключа '{key}' завершена")
+    async def stream(self, replica: db.Database):
+        """Отправка журнала одной реплике пакетами"""
+        logger = context_logger.get_logger()
+        name = replica.name
+        while True:
+            if self.log.applied[name] >= self.log.head:
+                await self.log.wait(name)
+                continue
+            if not replica.available:
+                await asyncio.sleep(self.retry_interval)
+                continue
+            await asyncio.sleep(self.replication_delay)
+            batch = self.log.read(name, self.batch_size)
+            if not batch:
+                continue
+            try:
+                await replica.apply(batch)
+            except Exception as e:
+                logger.debug("Репликация на %s прервана: %s", name, e)
+                await asyncio.sleep(self.retry_interval)
+                continue
+            now = self.clock.now()
+            self.log.ack(name, batch[-1].lsn)
+            self.metrics_collector.record_replication(
+                name,
+                len(batch),
+                now - batch[0].committed_at,
+                self.log.head - batch[-1].lsn)
 
-    async def write(self, key: str, value: str):
-        """Запись в master и репликация."""
+    async def write(self, key: str, value: str, session: Hashable = None) -> int:
+        """Запись в master и репликация; возвращает LSN записи."""
         if not self.current_master.available:
             await self.failover()
         await self.current_master.put(key, value)
-        asyncio.create_task(self.replicate(key, value))
+        lsn = await self.commit(key, value)
+        self._remember(self.written, key, lsn, self.log.retention)
+        if self.read_your_writes and session is not None:
+            self._remember(self.sessions, session, lsn, self.max_sessions)
+        if self.mode != "async":
+            await self.wait_acks(lsn)
+        return lsn
+
+    async def wait_acks(self, lsn: int):
+        """Ожидание подтверждений реплик в режимах semi_sync и sync"""
+        # Подтверждения считаются по различным репликам, подключённым к журналу
+        available = len({
+            replica.name for replica in self.replicas
+            if replica.available and replica.name in self.log.applied})
+        needed = available if self.mode == "sync" else min(1, available)
+        if not needed:
+            return
+        try:
+            await asyncio.wait_for(
+                self.log.wait_replicated(lsn, needed), self.ack_timeout)
+        except TimeoutError:
+            self.metrics_collector.record_commit_timeout(self.name)
+            if self.mode == "sync":
+                raise Exception(
+                    f"{self.name}: запись {lsn} не подтверждена репликами")
+
+    @staticmethod
+    def _remember(table: OrderedDict, key: Hashable, lsn: int, limit: int):
+        table[key] = lsn
+        table.move_to_end(key)
+        if len(table) > limit:
+            table.popitem(last=False)
+
+    def eligible(self, replica: db.Database, session: Hashable, now: float) -> bool:
+        """Реплика доступна, не слишком отстала и видит записи сессии"""
+        if not replica.available:
+            return False
+        if self.max_lag is not None and self.log.lag(replica.name, now)[0] > self.max_lag:
+            return False
+        if self.read_your_writes and session in self.sessions:
+            return self.log.applied.get(replica.name, self.log.head) >= self.sessions[session]
+        return True
 
-    async def read(self, key: str):
-        """Чтение — чаще из реплики, иногда из master."""
-        if random.random() < 0.7 and self.replicas:
-            replica = random.choice(self.replicas)
-            if replica.available:
-                return await replica.get(key)
-        return await self.current_master.get(key)
+    async def read(self, key: str, session: Hashable = None):
+        """Чтение с узла, выбранного политикой маршрутизации чтений."""
+        now = self.clock.now()
+        replicas = [
+            replica for replica in self.replicas
+            if self.eligible(replica, session, now)]
+        node = self.router.select(self.current_master, replicas)
+        on_master = node is self.current_master
+        stale = not on_master and self.log.applied.get(
+            node.name, self.log.head) < self.written.get(key, 0)
+        result = await node.get(key)
+        self.router.on_result(node, self.clock.now() - now)
+        self.metrics_collector.record_read(self.name, on_master, stale)
+        return result
 
     async def failover(self):
         """Переключение на новую master-ноду."""
@@ -59,8 +230,7 @@ class DBCluster:
         logger = context_logger.get_logger()
         self.failover_in_progress = True
         logger.warning(
-            f"⚠️ Master {
-                self.current_master.name} недоступен. Инициируем failover")
+            "⚠️ Master %s недоступен. Инициируем failover", self.current_master.name)
 
         available_replicas = [
             replica for replica in self.replicas if replica.available]
@@ -69,14 +239,17 @@ class DBCluster:
             self.failover_in_progress = False
             raise Exception("Все узлы БД недоступны")
 
-        new_master = random.choice(available_replicas)
+        new_master = self.rng.choice(available_replicas)
         self.replicas.remove(new_master)
-        self.replicas.append(self.current_master)
+        if self.current_master not in self.replicas:
+            self.replicas.append(self.current_master)
         self.failed_masters.append(self.current_master)
         self.current_master = new_master
 
-        logger.info(f"✅ Реплика {new_master.name} стала новым master")
+        logger.info("✅ Реплика %s стала новым master", new_master.name)
         self.failover_in_progress = False
+        if self.committer is not None:
+            self.start_replication()
 
     async def monitor_master(self, interval: float = 5.0):
         """Фоновый мониторинг master и автоматический failover."""
@@ -87,13 +260,17 @@ class DBCluster:
                 try:
                     await self.failover()
                 except Exception:
-                    logger.warning(f"Кластер {self.name} полностью недоступен")
+                    logger.warning("Кластер %s полностью недоступен", self.name)
 
             recovered = [m for m in self.failed_masters if m.available]
             if recovered:
                 old_master = recovered.pop()
                 logger.info(
-                    f"🔁 Старый мастер {
-                        old_master.name} снова доступен — выполняет роль реплики")
+                    "🔁 Старый мастер %s снова доступен — выполняет роль реплики",
+                    old_master.name)
                 self.failed_masters.remove(old_master)
-                self.replicas.append(old_master)
+                # После failover узел уже числится репликой
+                if old_master not in self.replicas:
+                    self.replicas.append(old_master)
+                if self.committer is not None:
+                    self.start_replication()
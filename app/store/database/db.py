@@ -1,7 +1,9 @@
 import asyncio
-import random
 from typing import Any
+from app.clock import clock
 from app.metrics import metrics
+from app.rng import distributions, streams
+from .pool import DBConnectionPool
 
 
 class Database:
@@ -11,12 +13,48 @@ class Database:
             metrics_collector: metrics.MetricsCollector,
             latency: float,
             fail_prob: float,
-            available: bool):
+            available: bool,
+            rng: streams.RandomStream | None = None,
+            failure_rng: streams.RandomStream | None = None,
+            latency_distribution: distributions.Distribution | None = None,
+            clock: clock.Clock = clock.default_clock,
+            pool_size: int | None = None,
+            acquire_timeout: float | None = None,
+            contention: float = 0.0):
         self.name = name
         self.metrics_collector = metrics_collector
         self.latency = latency
         self.fail_prob = fail_prob
         self.available = True
+        self.rng = rng or streams.default_factory.stream(name)
+        # Отдельный поток для сбоев, чтобы они не сдвигали поток запросов
+        self.failure_rng = failure_rng or streams.default_factory.stream(f"{name}/failures")
+        self.latency_distribution = latency_distribution or distributions.Uniform(
+            latency, 2 * latency)
+        self.clock = clock
+        self.contention = contention
+        self.active_queries = 0
+        self.pool = DBConnectionPool(
+            name, pool_size, metrics_collector,
+            acquire_timeout=acquire_timeout,
+            clock=clock) if pool_size else None
+
+    async def execute(self):
+        """Выполнение запроса на соединении из пула.
+
+        Время запроса растёт на долю contention за каждый другой
+        запрос, выполняющийся на узле одновременно с ним.
+        """
+        if self.pool is not None:
+            await self.pool.acquire()
+        self.active_queries += 1
+        try:
+            delay = self.rng.draw(self.latency_distribution)
+            await asyncio.sleep(delay * (1 + self.contention * (self.active_queries - 1)))
+        finally:
+            self.active_queries -= 1
+            if self.pool is not None:
+                self.pool.release()
 
     async def get(self, *args):
         pass
@@ -24,9 +62,22 @@ class Database:
     async def put(self, key: str, value: Any):
         if not self.available:
             raise Exception(f"{self.name} недоступен")
-        await asyncio.sleep(random.uniform(self.latency, 2 * self.latency))
-        if random.random() < self.fail_prob:
+        await self.execute()
+        if self.rng.random() < self.fail_prob:
             raise Exception(f"{self.name} ошибка при put({key, value})")
 
+    async def apply(self, entries: list):
+        """Применение пакета записей журнала репликации одним запросом"""
+        if not self.available:
+            raise Exception(f"{self.name} недоступен")
+        await self.execute()
+        if self.rng.random() < self.fail_prob:
+            raise Exception(f"{self.name} ошибка при применении журнала")
+        for entry in entries:
+            self.store(entry.key, entry.value)
+
+    def store(self, key: str, value: Any):
+        pass
+
     async def simulate_failure(self):
         pass
@@ -0,0 +1,65 @@
+import asyncio
+from app.clock import clock
+from app.metrics import metrics
+
+
+class DBConnectionPool:
+    """Пул соединений узла БД с очередью ожидания.
+
+    Ожидающие получают соединения в порядке прихода; если соединение
+    не освободилось за acquire_timeout, запрос завершается ошибкой.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            size: int,
+            metrics_collector: metrics.MetricsCollector,
+            acquire_timeout: float | None = None,
+            clock: clock.Clock = clock.default_clock):
+        if size < 1:
+            raise ValueError("Размер пула соединений должен быть положительным")
+        self.name = name
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.metrics_collector = metrics_collector
+        self.clock = clock
+        self.semaphore = asyncio.Semaphore(size)
+        self.in_use = 0
+        self.waiting = 0
+        self.last_change = None
+
+    def _account(self):
+        """Накопление занятых соединение-секунд для расчёта утилизации"""
+        now = self.clock.now()
+        if self.last_change is not None:
+            self.metrics_collector.record_pool_usage(
+                self.name, self.in_use, self.size, now - self.last_change)
+        self.last_change = now
+
+    async def acquire(self):
+        if not self.semaphore.locked():
+            await self.semaphore.acquire()
+            self.metrics_collector.record_pool_wait(self.name, 0.0)
+        else:
+            start = self.clock.now()
+            self.waiting += 1
+            self.metrics_collector.record_pool_queue(self.name, self.waiting)
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), self.acquire_timeout)
+            except asyncio.TimeoutError:
+                self.metrics_collector.record_pool_timeout(self.name)
+                raise Exception(
+                    f"{self.name}: нет свободных соединений за "
+                    f"{self.acquire_timeout}s") from None
+            finally:
+                self.waiting -= 1
+            self.metrics_collector.record_pool_wait(
+                self.name, self.clock.now() - start)
+        self._account()
+        self.in_use += 1
+
+    def release(self):
+        self._account()
+        self.in_use -= 1
+        self.semaphore.release()
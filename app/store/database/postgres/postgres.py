@@ -1,7 +1,8 @@
 import asyncio
-import random
+from app.clock import clock
 from app.logger import logger as context_logger
 from app.metrics import metrics
+from app.rng import distributions, streams
 from ..db import Database
 
 
@@ -11,15 +12,34 @@ class PostgresDB(Database):
             metrics_collector: metrics.MetricsCollector,
             name: str = "Postgres",
             latency: float = 0.15,
-            fail_prob: float = 0.03):
-        super().__init__(name, metrics_collector, latency, fail_prob, True)
+            fail_prob: float = 0.03,
+            rng: streams.RandomStream | None = None,
+            failure_rng: streams.RandomStream | None = None,
+            latency_distribution: distributions.Distribution | None = None,
+            clock: clock.Clock = clock.default_clock,
+            pool_size: int | None = None,
+            acquire_timeout: float | None = None,
+            contention: float = 0.0):
+        super().__init__(
+            name,
+            metrics_collector,
+            latency,
+            fail_prob,
+            True,
+            rng=rng,
+            failure_rng=failure_rng,
+            latency_distribution=latency_distribution,
+            clock=clock,
+            pool_size=pool_size,
+            acquire_timeout=acquire_timeout,
+            contention=contention)
 
     async def get(self, sql: str) -> dict:
         """Моделирование получение данных"""
         if not self.available:
             raise Exception(f"{self.name} недоступен")
-        await asyncio.sleep(random.uniform(self.latency, 2 * self.latency))
-        if random.random() < self.fail_prob:
+        await self.execute()
+        if self.rng.random() < self.fail_prob:
             raise Exception(f"{self.name} ошибка при запросе")
         return {"result": "some_data"}
 
@@ -27,10 +47,10 @@ class PostgresDB(Database):
         """Моделирование недоступности бд"""
         logger = context_logger.get_logger()
         while True:
-            await asyncio.sleep(random.uniform(30, 50))
+            await asyncio.sleep(self.failure_rng.uniform(30, 50))
             self.available = False
-            logger.error(f"💥 {self.name} упал")
+            logger.error("💥 %s упал", self.name)
             self.metrics_collector.infrastructure["db_failures"] += 1
-            await asyncio.sleep(random.uniform(10, 20))
+            await asyncio.sleep(self.failure_rng.uniform(10, 20))
             self.available = True
-            logger.info(f"✅ {self.name} восстановлен")
+            logger.info("✅ %s восстановлен", self.name)
@@ -0,0 +1,185 @@
+import zlib
+from collections import OrderedDict
+
+
+class EvictionPolicy:
+    """Политика вытеснения ключей из ограниченного кэша"""
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("Ёмкость кэша должна быть положительной")
+        self.capacity = capacity
+
+    def access(self, key: str):
+        """Обращение к ключу, который есть в кэше"""
+        raise NotImplementedError
+
+    def insert(self, key: str) -> list[str]:
+        """Добавление нового ключа; возвращает вытесненные ключи.
+
+        Политика с фильтром допуска может вернуть и сам key, если он
+        не был допущен в кэш.
+        """
+        raise NotImplementedError
+
+    def remove(self, key: str):
+        """Удаление ключа (инвалидация или истечение TTL)"""
+        raise NotImplementedError
+
+
+class LRU(EvictionPolicy):
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self.order: OrderedDict[str, None] = OrderedDict()
+
+    def access(self, key):
+        self.order.move_to_end(key)
+
+    def insert(self, key):
+        self.order[key] = None
+        if len(self.order) > self.capacity:
+            victim, _ = self.order.popitem(last=False)
+            return [victim]
+        return []
+
+    def remove(self, key):
+        self.order.pop(key, None)
+
+
+class LFU(EvictionPolicy):
+    """LFU за O(1): корзины ключей по частоте, внутри корзины — LRU"""
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self.freq: dict[str, int] = {}
+        self.buckets: dict[int, OrderedDict[str, None]] = {}
+        self.min_freq = 0
+
+    def _bump(self, key: str):
+        freq = self.freq[key]
+        bucket = self.buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[freq]
+            if self.min_freq == freq:
+                self.min_freq = freq + 1
+        self.freq[key] = freq + 1
+        self.buckets.setdefault(freq + 1, OrderedDict())[key] = None
+
+    def access(self, key):
+        self._bump(key)
+
+    def insert(self, key):
+        evicted = []
+        if len(self.freq) >= self.capacity:
+            bucket = self.buckets[self.min_freq]
+            victim, _ = bucket.popitem(last=False)
+            if not bucket:
+                del self.buckets[self.min_freq]
+            del self.freq[victim]
+            evicted.append(victim)
+        self.freq[key] = 1
+        self.buckets.setdefault(1, OrderedDict())[key] = None
+        self.min_freq = 1
+        return evicted
+
+    def remove(self, key):
+        freq = self.freq.pop(key, None)
+        if freq is None:
+            return
+        bucket = self.buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[freq]
+            if self.min_freq == freq:
+                self.min_freq = min(self.buckets, default=0)
+
+
+class FrequencySketch:
+    """Count-Min sketch с 4-битными счётчиками и периодическим старением"""
+
+    ROWS = 4
+    SEEDS = (0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F)
+
+    def __init__(self, capacity: int):
+        self.width = 1 << max(4, (capacity * 2 - 1).bit_length())
+        self.table = [[0] * self.width for _ in range(self.ROWS)]
+        self.sample_size = 10 * capacity
+        self.additions = 0
+
+    def _indexes(self, key: str):
+        h = zlib.crc32(key.encode())
+        mask = self.width - 1
+        return [((h * seed) >> 16) & mask for seed in self.SEEDS]
+
+    def frequency(self, key: str) -> int:
+        return min(row[i] for row, i in zip(self.table, self._indexes(key)))
+
+    def increment(self, key: str):
+        for row, i in zip(self.table, self._indexes(key)):
+            if row[i] < 15:
+                row[i] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            for row in self.table:
+                for i in range(self.width):
+                    row[i] >>= 1
+            self.additions //= 2
+
+
+class WTinyLFU(EvictionPolicy):
+    """W-TinyLFU: окно LRU, основная область SLRU и фильтр допуска по частоте"""
+
+    def __init__(self, capacity: int, window_ratio: float = 0.01):
+        super().__init__(capacity)
+        self.window_capacity = max(1, int(capacity * window_ratio))
+        main_capacity = max(1, capacity - self.window_capacity)
+        self.protected_capacity = max(1, int(main_capacity * 0.8))
+        self.main_capacity = main_capacity
+        self.window: OrderedDict[str, None] = OrderedDict()
+        self.probation: OrderedDict[str, None] = OrderedDict()
+        self.protected: OrderedDict[str, None] = OrderedDict()
+        self.sketch = FrequencySketch(capacity)
+
+    def access(self, key):
+        self.sketch.increment(key)
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.probation:
+            del self.probation[key]
+            self.protected[key] = None
+            if len(self.protected) > self.protected_capacity:
+                demoted, _ = self.protected.popitem(last=False)
+                self.probation[demoted] = None
+        else:
+            self.protected.move_to_end(key)
+
+    def insert(self, key):
+        self.sketch.increment(key)
+        self.window[key] = None
+        if len(self.window) <= self.window_capacity:
+            return []
+        candidate, _ = self.window.popitem(last=False)
+        if len(self.probation) + len(self.protected) < self.main_capacity:
+            self.probation[candidate] = None
+            return []
+        segment = self.probation if self.probation else self.protected
+        victim = next(iter(segment))
+        if self.sketch.frequency(candidate) > self.sketch.frequency(victim):
+            del segment[victim]
+            self.probation[candidate] = None
+            return [victim]
+        return [candidate]
+
+    def remove(self, key):
+        for segment in (self.window, self.probation, self.protected):
+            if key in segment:
+                del segment[key]
+                return
+
+
+POLICIES = {
+    "lru": LRU,
+    "lfu": LFU,
+    "w-tinylfu": WTinyLFU,
+}
@@ -1,41 +1,121 @@
 import asyncio
-import random
 from typing import Any
+from app.clock import clock
 from app.logger import logger as context_logger
 from app.metrics import metrics
+from app.rng import distributions, streams
 from ..db import Database
+from . import eviction
 
 
 class Redis(Database):
+    """Кэш ключ-значение с ограниченной ёмкостью, TTL и политикой вытеснения.
+
+    Истёкшие ключи удаляются лениво — при обращении к ним, как в Redis.
+    После падения узел поднимается с пустым кэшем.
+    """
+
     def __init__(
             self,
             metrics_collector: metrics.MetricsCollector,
             name="Redis",
             latency=0.01,
-            fail_prob=0.02):
-        super().__init__(name, metrics_collector, latency, fail_prob, True)
+            fail_prob=0.02,
+            capacity: int = 10000,
+            ttl: float | None = None,
+            eviction_policy: str = "lru",
+            rng: streams.RandomStream | None = None,
+            failure_rng: streams.RandomStream | None = None,
+            latency_distribution: distributions.Distribution | None = None,
+            clock: clock.Clock = clock.default_clock,
+            pool_size: int | None = None,
+            acquire_timeout: float | None = None,
+            contention: float = 0.0):
+        super().__init__(
+            name,
+            metrics_collector,
+            latency,
+            fail_prob,
+            True,
+            rng=rng,
+            failure_rng=failure_rng,
+            latency_distribution=latency_distribution,
+            clock=clock,
+            pool_size=pool_size,
+            acquire_timeout=acquire_timeout,
+            contention=contention)
+        if eviction_policy not in eviction.POLICIES:
+            raise ValueError(f"Неизвестная политика вытеснения: {eviction_policy}")
+        self.capacity = capacity
+        self.ttl = ttl
+        self.eviction_policy = eviction_policy
+        self.keyspace: dict[str, tuple[Any, float | None]] = {}
+        self.policy = eviction.POLICIES[eviction_policy](capacity)
 
-    async def get(self, key) -> str | None:
-        """Моделирование получение данных"""
+    async def get(self, key) -> Any | None:
+        """Чтение ключа; None — промах"""
         if not self.available:
             raise Exception(f"{self.name} недоступен")
-        await asyncio.sleep(random.uniform(self.latency, 2 * self.latency))
-        if random.random() < self.fail_prob:
+        await self.execute()
+        if self.rng.random() < self.fail_prob:
             raise Exception(f"{self.name} ошибка при get({key})")
-        hit = random.random() < 0.8
-        return "cached_value" if hit else None
+        entry = self.keyspace.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= self.clock.now():
+            self.discard(key)
+            self.metrics_collector.record_cache_expired(self.name)
+            entry = None
+        hit = entry is not None
+        if hit:
+            self.policy.access(key)
+        self.metrics_collector.record_cache_access(self.name, hit)
+        return entry[0] if hit else None
+
+    async def put(self, key: str, value: Any, ttl: float | None = None):
+        """Запись ключа; ttl по умолчанию берётся из настроек узла"""
+        await super().put(key, value)
+        self.store(key, value, ttl)
+
+    async def delete(self, key: str):
+        """Инвалидация ключа"""
+        if not self.available:
+            raise Exception(f"{self.name} недоступен")
+        await self.execute()
+        self.discard(key)
+
+    def store(self, key: str, value: Any, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self.clock.now() + ttl if ttl is not None else None
+        if key in self.keyspace:
+            self.keyspace[key] = (value, expires_at)
+            self.policy.access(key)
+            return
+        self.keyspace[key] = (value, expires_at)
+        evicted = self.policy.insert(key)
+        for victim in evicted:
+            del self.keyspace[victim]
+        if evicted:
+            self.metrics_collector.record_cache_eviction(self.name, len(evicted))
+
+    def discard(self, key: str):
+        if self.keyspace.pop(key, None) is not None:
+            self.policy.remove(key)
+
+    def flush(self):
+        self.keyspace.clear()
+        self.policy = eviction.POLICIES[self.eviction_policy](self.capacity)
 
     async def simulate_failure(self):
         """Моделирование недоступности бд"""
         logger = context_logger.get_logger()
         while True:
-            await asyncio.sleep(random.uniform(20, 40))
+            await asyncio.sleep(self.failure_rng.uniform(20, 40))
             self.available = False
+            self.flush()
             if "cache" in self.name.lower():
                 self.metrics_collector.infrastructure["cache_failures"] += 1
             else:
                 self.metrics_collector.infrastructure["db_failures"] += 1
-            logger.warning(f"⚠️ {self.name} недоступен")
-            await asyncio.sleep(random.uniform(5, 15))
+            logger.warning("⚠️ %s недоступен", self.name)
+            await asyncio.sleep(self.failure_rng.uniform(5, 15))
             self.available = True
-            logger.info(f"✅ {self.name} восстановлен")
+            logger.info("✅ %s восстановлен", self.name)
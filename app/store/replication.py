@@ -0,0 +1,117 @@
+import asyncio
+from collections import deque
+from typing import Any
+
+
+class LogEntry:
+    __slots__ = ("lsn", "key", "value", "committed_at")
+
+    def __init__(self, lsn: int, key: str, value: Any, committed_at: float):
+        self.lsn = lsn
+        self.key = key
+        self.value = value
+        self.committed_at = committed_at
+
+
+class ReplicationLog:
+    """Журнал репликации кластера: записи только добавляются, каждой
+    присваивается возрастающий LSN.
+
+    Для каждой реплики хранится LSN последней применённой записи.
+    Записи, применённые всеми репликами, удаляются из журнала; кроме
+    того, журнал не хранит больше retention записей — отставшая сильнее
+    реплика пропускает удалённые записи (как после повторной загрузки
+    базовой копии).
+    """
+
+    def __init__(self, retention: int = 100_000):
+        self.retention = retention
+        self.entries: deque[LogEntry] = deque()
+        self.head = 0
+        self.applied: dict[str, int] = {}
+        self.resyncs: dict[str, int] = {}
+        self.signals: dict[str, asyncio.Event] = {}
+        self.waiters: list[tuple[int, int, asyncio.Future]] = []
+
+    def append(self, key: str, value: Any, now: float) -> int:
+        self.head += 1
+        self.entries.append(LogEntry(self.head, key, value, now))
+        if len(self.entries) > self.retention:
+            self.entries.popleft()
+        for signal in self.signals.values():
+            signal.set()
+        return self.head
+
+    def follow(self, replica: str, lsn: int | None = None):
+        """Подключение реплики, применившей журнал до lsn (по умолчанию — весь)"""
+        self.applied[replica] = self.head if lsn is None else lsn
+        self.resyncs.setdefault(replica, 0)
+        self.signals[replica] = asyncio.Event()
+
+    def unfollow(self, replica: str):
+        self.applied.pop(replica, None)
+        self.signals.pop(replica, None)
+        self._trim()
+
+    async def wait(self, replica: str):
+        """Ожидание новых записей для реплики"""
+        signal = self.signals[replica]
+        if self.applied[replica] >= self.head:
+            signal.clear()
+            await signal.wait()
+
+    def read(self, replica: str, limit: int) -> list[LogEntry]:
+        """Очередной пакет неприменённых записей реплики"""
+        if not self.entries:
+            return []
+        first = self.entries[0].lsn
+        start = self.applied[replica] + 1
+        if start < first:
+            self.resyncs[replica] += 1
+            start = first
+        offset = start - first
+        end = min(len(self.entries), offset + limit)
+        return [self.entries[i] for i in range(offset, end)]
+
+    def ack(self, replica: str, lsn: int):
+        """Подтверждение применения записей до lsn включительно"""
+        if replica not in self.applied:
+            # Реплика стала master, пока пакет был в пути
+            return
+        self.applied[replica] = max(self.applied[replica], lsn)
+        self._trim()
+        pending = []
+        for waiter in self.waiters:
+            target, count, future = waiter
+            if future.done():
+                continue
+            if sum(1 for applied in self.applied.values() if applied >= target) >= count:
+                future.set_result(None)
+            else:
+                pending.append(waiter)
+        self.waiters = pending
+
+    def wait_replicated(self, lsn: int, count: int) -> asyncio.Future:
+        """Future, завершающийся, когда count реплик применят запись lsn"""
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append((lsn, count, future))
+        return future
+
+    def lag(self, replica: str, now: float) -> tuple[float, int]:
+        """Отставание реплики: возраст старейшей неприменённой записи и число записей"""
+        if replica not in self.applied:
+            # Реплика ещё не подключена к журналу — у неё актуальная копия
+            return 0.0, 0
+        applied = self.applied[replica]
+        behind = self.head - applied
+        if not behind or not self.entries:
+            return 0.0, behind
+        index = max(0, applied + 1 - self.entries[0].lsn)
+        return now - self.entries[index].committed_at, behind
+
+    def _trim(self):
+        if not self.applied:
+            return
+        oldest = min(self.applied.values())
+        while self.entries and self.entries[0].lsn <= oldest:
+            self.entries.popleft()
@@ -0,0 +1,73 @@
+from app.rng import streams
+from app.store.database import db
+
+
+def outstanding(node: db.Database) -> int:
+    """Запросы, выполняющиеся на узле или ждущие соединения из его пула"""
+    waiting = node.pool.waiting if node.pool is not None else 0
+    return node.active_queries + waiting
+
+
+class ReadRouter:
+    """Выбор узла кластера для чтения.
+
+    replicas — доступные реплики, уже отфильтрованные по отставанию и
+    согласованности сессии; если подходящих реплик нет, читается master.
+    """
+
+    def __init__(self, rng: streams.RandomStream):
+        self.rng = rng
+
+    def select(self, master: db.Database, replicas: list[db.Database]) -> db.Database:
+        raise NotImplementedError
+
+    def on_result(self, node: db.Database, latency: float):
+        """Обратная связь о завершённом чтении"""
+
+
+class RandomReplica(ReadRouter):
+    """Доля replica_share чтений уходит на случайную реплику, остальные — на master"""
+
+    def __init__(self, rng: streams.RandomStream, replica_share: float = 0.7):
+        super().__init__(rng)
+        self.replica_share = replica_share
+
+    def select(self, master, replicas):
+        if replicas and self.rng.random() < self.replica_share:
+            return self.rng.choice(replicas)
+        return master
+
+
+class LeastOutstanding(ReadRouter):
+    """Узел с наименьшим числом запросов в работе; при равенстве — реплика"""
+
+    def select(self, master, replicas):
+        return min([*replicas, master], key=outstanding)
+
+
+class EwmaLatency(ReadRouter):
+    """Узел с наименьшей сглаженной задержкой с поправкой на нагрузку"""
+
+    def __init__(self, rng: streams.RandomStream, alpha: float = 0.2):
+        super().__init__(rng)
+        self.alpha = alpha
+        self.ewma: dict[str, float] = {}
+
+    def on_result(self, node, latency):
+        previous = self.ewma.get(node.name)
+        self.ewma[node.name] = latency if previous is None else (
+            previous + self.alpha * (latency - previous))
+
+    def cost(self, node: db.Database) -> float:
+        # Непрогретые узлы считаются быстрыми, чтобы получить пробный трафик
+        return self.ewma.get(node.name, 0.0) * (outstanding(node) + 1)
+
+    def select(self, master, replicas):
+        return min([*replicas, master], key=self.cost)
+
+
+READ_ROUTERS = {
+    "random": RandomReplica,
+    "least_outstanding": LeastOutstanding,
+    "ewma": EwmaLatency,
+}
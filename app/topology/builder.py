@@ -0,0 +1,350 @@
+import copy
+import itertools
+import json
+import os
+import tomllib
+from app.balance_loader import nginx
+from app.broker import rabbitmq
+from app.clock import clock
+from app.metrics import metrics
+from app.network import connections, resilience
+from app.rng import distributions, streams
+from app.services import service
+from app.services.auth_service import auth_service
+from app.store import cluster
+from app.store.database import db
+from app.store.database.postgres import postgres
+from app.store.database.redis import redis
+
+DEFAULT_TOPOLOGY = os.path.join(os.path.dirname(__file__), "default.json")
+
+NODE_TYPES = {
+    "postgres": postgres.PostgresDB,
+    "redis": redis.Redis,
+}
+
+
+class Topology:
+    """Собранные объекты модели"""
+
+    def __init__(self):
+        self.services: list[service.Service] = []
+        self.auth_service: auth_service.AuthService | None = None
+        self.resources: list[db.Database] = []
+        self.routes: list[str] = []
+        self.load_balancer: nginx.Nginx | None = None
+        self.broker: rabbitmq.RabbitMQ | None = None
+        self.client_connections: connections.ConnectionPool | None = None
+        self.route_policies: dict[str, resilience.RoutePolicy] = {}
+
+
+def load_topology(path: str | None = None) -> dict:
+    """Чтение описания топологии из JSON, TOML или YAML"""
+    path = path or DEFAULT_TOPOLOGY
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".toml":
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path, encoding="utf-8") as f:
+        if extension in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError(
+                    "Для топологии в YAML установите пакет pyyaml") from None
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def apply_overrides(
+        spec: dict,
+        balancer_weights: list[int] | None = None,
+        balancer_strategy: str | None = None,
+        instance_counts: dict[str, int] | None = None,
+        base_latency_scale: float = 1.0,
+        fail_prob: float | None = None,
+        replication_delay: float | None = None,
+        replication_mode: str | None = None,
+        read_routing: str | None = None,
+        max_replica_lag: float | None = None,
+        read_your_writes: bool | None = None,
+        cache_capacity: int | None = None,
+        cache_eviction: str | None = None,
+        db_pool_size: int | None = None,
+        db_acquire_timeout: float | None = None,
+        workers: int | None = None,
+        queue_size: int | None = None,
+        shedding: str | None = None,
+        keep_alive: bool | None = None,
+        multiplexing: bool | None = None,
+        deadline: float | None = None,
+        max_retries: int | None = None,
+        retry_budget: float | None = None,
+        hedge: bool | None = None,
+        outlier_detection: bool | None = None,
+        broker_batch_size: int | None = None,
+        broker_queue_size: int | None = None,
+        broker_overflow: str | None = None,
+        broker_consumers: int | None = None,
+        broker_prefetch: int | None = None,
+        broker_log: str | None = None) -> dict:
+    """Копия топологии с изменёнными параметрами (для what-if экспериментов).
+
+    instance_counts задаёт число инстансов по имени группы балансировщика,
+    balancer_weights — шаблон весов, повторяемый по всем инстансам группы.
+    """
+    spec = copy.deepcopy(spec)
+    broker_overrides = {
+        key: value for key, value in (
+            ("batch_size", broker_batch_size),
+            ("queue_size", broker_queue_size),
+            ("overflow", broker_overflow),
+            ("consumers", broker_consumers),
+            ("prefetch", broker_prefetch)) if value is not None}
+    if broker_log is not None:
+        broker_overrides["persistence"] = {
+            **spec.get("broker", {}).get("persistence", {}), "path": broker_log}
+    if broker_overrides:
+        spec.setdefault("broker", {}).update(broker_overrides)
+    if keep_alive is False:
+        # Без пулов соединений каждый вызов платит полный handshake
+        spec.pop("connections", None)
+    elif keep_alive or multiplexing:
+        # Пулы с параметрами по умолчанию: handshake стоит столько же,
+        # сколько без пулов, экономится только его повторение
+        connections_spec = spec.setdefault("connections", {})
+        connections_spec.setdefault("client", {})
+        connections_spec.setdefault("upstream", {})
+    if multiplexing is not None:
+        for pool_spec in spec.get("connections", {}).values():
+            pool_spec["multiplexing"] = multiplexing
+    policy_overrides = {
+        key: value for key, value in (
+            ("deadline", deadline),
+            ("max_retries", max_retries),
+            ("retry_budget", retry_budget),
+            ("hedge", hedge)) if value is not None}
+    if policy_overrides:
+        policies = spec.setdefault("route_policies", {})
+        for route in spec.get("routes", []):
+            policies.setdefault(route, {}).update(policy_overrides)
+    if balancer_strategy is not None:
+        spec.setdefault("balancer", {})["strategy"] = balancer_strategy
+    if outlier_detection is False:
+        spec.get("balancer", {}).pop("outlier_detection", None)
+    elif outlier_detection:
+        spec.setdefault("balancer", {}).setdefault("outlier_detection", {})
+    for svc in spec["services"]:
+        if instance_counts and svc.get("group") in instance_counts:
+            svc["instances"] = instance_counts[svc["group"]]
+        if balancer_weights is not None and "group" in svc:
+            svc["weights"] = list(itertools.islice(
+                itertools.cycle(balancer_weights), svc.get("instances", 1)))
+        elif "weights" in svc and len(svc["weights"]) != svc.get("instances", 1):
+            # Число инстансов изменено — повторяем исходный шаблон весов
+            svc["weights"] = list(itertools.islice(
+                itertools.cycle(svc["weights"]), svc.get("instances", 1)))
+        svc["base_latency"] = svc.get("base_latency", 0.05) * base_latency_scale
+        if fail_prob is not None:
+            svc["fail_prob"] = fail_prob
+        if "db_cluster" in svc:
+            cluster_spec = svc["db_cluster"]
+            if replication_delay is not None:
+                cluster_spec["replication_delay"] = replication_delay
+            if replication_mode is not None:
+                cluster_spec["mode"] = replication_mode
+            if read_routing is not None:
+                cluster_spec["read_routing"] = read_routing
+            if max_replica_lag is not None:
+                cluster_spec["max_lag"] = max_replica_lag
+            if read_your_writes is not None:
+                cluster_spec["read_your_writes"] = read_your_writes
+        if "cache" in svc:
+            if cache_capacity is not None:
+                svc["cache"]["capacity"] = cache_capacity
+            if cache_eviction is not None:
+                svc["cache"]["eviction_policy"] = cache_eviction
+        if "group" in svc:
+            if workers is not None:
+                svc["workers"] = workers
+            if queue_size is not None:
+                svc["queue_size"] = queue_size
+            if shedding is not None:
+                svc["shedding"] = shedding
+        if "db_cluster" in svc:
+            nodes = [svc["db_cluster"]["master"], *svc["db_cluster"].get("replicas", [])]
+            for node in nodes:
+                if node.get("type") != "postgres":
+                    continue
+                if db_pool_size is not None:
+                    node["pool_size"] = db_pool_size
+                    # Ограниченный пул моделируется вместе с конкуренцией запросов
+                    node.setdefault("contention", 0.05)
+                if db_acquire_timeout is not None:
+                    node["acquire_timeout"] = db_acquire_timeout
+    return spec
+
+
+def count_instances(spec: dict) -> int:
+    """Число инстансов сервисов, которое получится при сборке"""
+    return sum(svc.get("instances", 1) for svc in spec["services"])
+
+
+class TopologyBuilder:
+    """Сборка объектов модели по декларативному описанию.
+
+    В именах допускаются шаблоны {i} — номер инстанса (с 0) и
+    {r} — номер реплики (с 1).
+    """
+
+    def __init__(
+            self,
+            metrics_collector: metrics.MetricsCollector,
+            clock: clock.Clock = clock.default_clock,
+            streams: streams.StreamFactory = streams.default_factory):
+        self.metrics_collector = metrics_collector
+        self.clock = clock
+        self.streams = streams
+
+    def build(self, spec: dict) -> Topology:
+        topology = Topology()
+        topology.load_balancer = nginx.Nginx(
+            rng=self.streams.stream("Nginx"),
+            strategy=spec.get("balancer", {}).get("strategy", "weighted"),
+            metrics_collector=self.metrics_collector,
+            outlier_detection=spec.get("balancer", {}).get("outlier_detection"),
+            clock=self.clock)
+        broker_spec = spec.get("broker", {})
+        broker_name = broker_spec.get("name", "RabbitMQ")
+        topology.broker = rabbitmq.RabbitMQ(
+            broker_name,
+            metrics_collector=self.metrics_collector,
+            base_latency=broker_spec.get("base_latency", 0.02),
+            fail_prob=broker_spec.get("fail_prob", 0.02),
+            queue_size=broker_spec.get("queue_size", 10000),
+            overflow=broker_spec.get("overflow", "backpressure"),
+            batch_size=broker_spec.get("batch_size", 50),
+            linger=broker_spec.get("linger", 0.005),
+            channels=broker_spec.get("channels", 4),
+            consumers=broker_spec.get("consumers", 4),
+            prefetch=broker_spec.get("prefetch", 10),
+            persistence=broker_spec.get("persistence"),
+            clock=self.clock,
+            rng=self.streams.stream(broker_name))
+        topology.routes = list(spec.get("routes", []))
+        for route, policy_spec in spec.get("route_policies", {}).items():
+            topology.route_policies[route] = resilience.RoutePolicy(
+                rng=self.streams.stream(f"{route}/policy"), **policy_spec)
+        connections_spec = spec.get("connections", {})
+        if "client" in connections_spec:
+            topology.client_connections = self._connections(
+                "client", connections_spec["client"])
+
+        for svc_spec in spec["services"]:
+            instances = [
+                self._service(svc_spec, i, topology.broker, connections_spec.get("upstream"))
+                for i in range(svc_spec.get("instances", 1))]
+            topology.services.extend(instances)
+            if svc_spec.get("kind") == "auth" and topology.auth_service is None:
+                topology.auth_service = instances[0]
+            if "group" in svc_spec:
+                topology.load_balancer.add_instances(
+                    svc_spec["group"], instances, svc_spec.get("weights"))
+
+        for s in topology.services:
+            if s.db_cluster:
+                topology.resources.append(s.db_cluster.master)
+                topology.resources.extend(s.db_cluster.replicas)
+            if s.cache:
+                topology.resources.append(s.cache)
+        return topology
+
+    def _connections(self, name: str, pool_spec: dict) -> connections.ConnectionPool:
+        return connections.ConnectionPool(
+            name,
+            self.metrics_collector,
+            clock=self.clock,
+            rng=self.streams.stream(f"{name}/connections"),
+            **pool_spec)
+
+    def _node(self, node_spec: dict, i: int, r: int = 0) -> db.Database:
+        node_type = NODE_TYPES.get(node_spec.get("type"))
+        if node_type is None:
+            raise ValueError(f"Неизвестный тип узла БД: {node_spec.get('type')}")
+        name = node_spec["name"].format(i=i, r=r)
+        kwargs = {
+            key: value for key, value in node_spec.items()
+            if key not in ("type", "name", "count", "latency_distribution")}
+        return node_type(
+            name=name,
+            metrics_collector=self.metrics_collector,
+            rng=self.streams.stream(name),
+            failure_rng=self.streams.stream(f"{name}/failures"),
+            latency_distribution=self._distribution(node_spec),
+            clock=self.clock,
+            **kwargs)
+
+    def _distribution(self, spec: dict) -> distributions.Distribution | None:
+        if "latency_distribution" not in spec:
+            return None
+        return distributions.from_spec(spec["latency_distribution"])
+
+    def _cluster(self, cluster_spec: dict, i: int) -> cluster.DBCluster:
+        replicas = []
+        for replica_spec in cluster_spec.get("replicas", []):
+            replicas.extend(
+                self._node(replica_spec, i, r)
+                for r in range(1, replica_spec.get("count", 1) + 1))
+        name = cluster_spec["name"].format(i=i)
+        return cluster.DBCluster(
+            name=name,
+            master=self._node(cluster_spec["master"], i),
+            replicas=replicas,
+            replication_delay=cluster_spec.get("replication_delay", 0.1),
+            mode=cluster_spec.get("mode", "async"),
+            batch_size=cluster_spec.get("batch_size", 100),
+            commit_delay=cluster_spec.get("commit_delay", 0.0),
+            fsync_latency=cluster_spec.get("fsync_latency", 0.002),
+            ack_timeout=cluster_spec.get("ack_timeout", 1.0),
+            read_routing=cluster_spec.get("read_routing", "random"),
+            max_lag=cluster_spec.get("max_lag"),
+            read_your_writes=cluster_spec.get("read_your_writes", False),
+            metrics_collector=self.metrics_collector,
+            clock=self.clock,
+            rng=self.streams.stream(name))
+
+    def _service(
+            self,
+            svc_spec: dict,
+            i: int,
+            broker: rabbitmq.RabbitMQ,
+            upstream: dict | None = None) -> service.Service:
+        db_cluster = (self._cluster(svc_spec["db_cluster"], i)
+                      if "db_cluster" in svc_spec else None)
+        cache = (self._node(svc_spec["cache"], i)
+                 if "cache" in svc_spec else None)
+        name = svc_spec["name"].format(i=i)
+        kwargs = {
+            "name": name,
+            "metrics_collector": self.metrics_collector,
+            "db_cluster": db_cluster,
+            "cache": cache,
+            "base_latency": svc_spec.get("base_latency", 0.05),
+            "fail_prob": svc_spec.get("fail_prob", 0.05),
+            "requires_auth": svc_spec.get("requires_auth", False),
+            "clock": self.clock,
+            "rng": self.streams.stream(name),
+            "failure_rng": self.streams.stream(f"{name}/failures"),
+            "latency_distribution": self._distribution(svc_spec),
+            "connections": self._connections(name, upstream) if upstream else None,
+        }
+        if svc_spec.get("kind") == "auth":
+            return auth_service.AuthService(**kwargs)
+        return service.Service(
+            broker=broker if svc_spec.get("broker") else None,
+            cache_write_policy=svc_spec.get("cache_write_policy", "invalidate"),
+            workers=svc_spec.get("workers"),
+            queue_size=svc_spec.get("queue_size", 64),
+            shedding=svc_spec.get("shedding", "reject"),
+            deadline=svc_spec.get("deadline", 1.0),
+            **kwargs)
@@ -15,9 +15,7 @@ def auth_check(func: Coroutine) -> Coroutine:
         if not request.user.authorized and self.requires_auth:
             logger = context_logger.get_logger()
             logger.warning(
-                f"🚫 Пользователь {
-                    request.user.id} не авторизован для {
-                    self.name}")
+                "🚫 Пользователь %s не авторизован для %s", request.user.id, self.name)
             raise PermissionError("Пользователь не авторизован")
         return await func(self, request, *args, **kwargs)
     return wrapper
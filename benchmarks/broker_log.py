@@ -0,0 +1,69 @@
+"""Пропускная способность очереди брокера: в памяти против журнала на диске.
+
+Публикуется N сообщений пакетами по BATCH, затем все они читаются
+пакетами по PREFETCH с фиксацией смещения. Для журнала сравниваются
+политики fsync. Байты считаются по JSON-представлению сообщений.
+
+Запуск: python -m benchmarks.broker_log
+"""
+import asyncio
+import json
+import tempfile
+import time
+
+from app.broker.segment_log import SegmentedLog
+from app.broker.topics import DurableTopic, MemoryTopic
+from app.models import models
+
+N = 50_000
+BATCH = 50
+PREFETCH = 10
+
+
+def make_messages() -> list[models.Message]:
+    return [
+        models.Message(
+            "messages",
+            {"service": f"PaymentService-{i % 3}", "user_id": i})
+        for i in range(N)]
+
+
+async def run(topic) -> tuple[float, float]:
+    """Время публикации и время чтения всех сообщений"""
+    messages = make_messages()
+    start = time.perf_counter()
+    for i in range(0, N, BATCH):
+        for msg in messages[i:i + BATCH]:
+            await topic.put(msg)
+        await topic.flush()
+    published = time.perf_counter()
+    received = 0
+    while received < N:
+        batch, token = await topic.get(PREFETCH)
+        received += len(batch)
+        topic.done(token)
+    consumed = time.perf_counter()
+    topic.close()
+    return published - start, consumed - published
+
+
+async def run_durable(directory: str, policy: str) -> tuple[float, float]:
+    log = SegmentedLog(directory, segment_bytes=1024 * 1024, fsync=policy)
+    return await run(DurableTopic("messages", log, N, write_latency=0))
+
+
+def main():
+    size = sum(len(json.dumps(msg.payload)) for msg in make_messages())
+    results = {"в памяти": asyncio.run(run(MemoryTopic(N)))}
+    for policy in ("never", "interval", "batch"):
+        with tempfile.TemporaryDirectory() as directory:
+            results[f"журнал, fsync={policy}"] = asyncio.run(run_durable(directory, policy))
+    print(f"{'режим':<22} {'запись, сообщ/с':>16} {'МБ/с':>8} {'чтение, сообщ/с':>16} {'МБ/с':>8}")
+    for name, (write, read) in results.items():
+        print(
+            f"{name:<22} {N / write:16.0f} {size / write / 1e6:8.1f} "
+            f"{N / read:16.0f} {size / read / 1e6:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Память на один запрос: прежние классы с __dict__ против __slots__ и пула.
+
+Для Request учитывается и созданный вместе с ним User.
+
+Запуск: python -m benchmarks.request_memory
+"""
+import gc
+import tracemalloc
+
+from app.clock import clock
+from app.models import models
+
+N = 100_000
+SERVICE_NAMES = [f"PaymentService-{i}" for i in range(3)]
+
+
+class DictUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.authorized = False
+
+
+class DictRequest:
+    """Раскладка models.Request до перехода на __slots__"""
+
+    def __init__(self, user, service_name, method, clock):
+        self.user = user
+        self.service_name = service_name
+        self.method = method
+        self.start_time = clock.now()
+        self.end_time = None
+        self.success = None
+        self.tcp_time = 0.0
+        self.tls_time = 0.0
+        self.db_time = 0.0
+        self.cache_time = 0.0
+        self.processing_time = 0.0
+        self.network_latency = 0.0
+
+
+def bytes_per_object(factory) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(N)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / N
+
+
+def pooled_allocations() -> float:
+    """Выделения памяти на запрос при повторном использовании через пул"""
+    pool = models.RequestPool()
+    user = models.User(0)
+    sim_clock = clock.SimulatedClock()
+    pool.release(pool.acquire(user, SERVICE_NAMES[0], models.HTTPMethod.GET, sim_clock))
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(N):
+        request = pool.acquire(
+            user, SERVICE_NAMES[i % 3], models.HTTPMethod.GET, sim_clock)
+        request.tcp_time = 0.01
+        pool.release(request)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / N
+
+
+def main():
+    sim_clock = clock.SimulatedClock()
+    results = {
+        "User (__dict__)": bytes_per_object(DictUser),
+        "User (__slots__)": bytes_per_object(models.User),
+        "Request (__dict__)": bytes_per_object(
+            lambda i: DictRequest(
+                DictUser(i), SERVICE_NAMES[i % 3], models.HTTPMethod.GET, sim_clock)),
+        "Request (__slots__)": bytes_per_object(
+            lambda i: models.Request(
+                models.User(i), SERVICE_NAMES[i % 3], models.HTTPMethod.GET, sim_clock)),
+        "Request (пул)": pooled_allocations(),
+    }
+    for name, size in results.items():
+        print(f"{name:<22} {size:8.1f} байт/объект")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,141 @@
+import argparse
 import asyncio
 from app.app import Application
+from app.balance_loader import strategies
+from app.clock import clock
+from app.load_generator import profiles
 from app.logger import logger as context_logger
+from app.metrics import export
 
-app = Application()
+parser = argparse.ArgumentParser(description="Имитационная модель веб-сервиса")
+parser.add_argument(
+    "--virtual-time",
+    action="store_true",
+    help="моделировать время виртуально, без реального ожидания задержек")
+parser.add_argument(
+    "--duration",
+    type=float,
+    default=None,
+    help="длительность моделирования в секундах")
+parser.add_argument(
+    "--profile",
+    choices=profiles.PROFILES,
+    default="poisson",
+    help="профиль входящей нагрузки")
+parser.add_argument(
+    "--rps",
+    type=float,
+    default=5,
+    help="средняя интенсивность входящего потока, запросов в секунду")
+parser.add_argument(
+    "--seed",
+    type=int,
+    default=None,
+    help="сид генераторов случайных чисел для воспроизводимого прогона")
+parser.add_argument(
+    "--topology",
+    default=None,
+    help="файл с описанием топологии (JSON, TOML или YAML)")
+parser.add_argument(
+    "--balancer",
+    choices=list(strategies.STRATEGIES),
+    default=None,
+    help="стратегия балансировки нагрузки")
+parser.add_argument(
+    "--zipf",
+    type=float,
+    default=0.0,
+    help="показатель закона Ципфа для популярности пользователей (0 — равномерно)")
+parser.add_argument(
+    "--broker-log",
+    default=None,
+    help="каталог журнала брокера: очереди хранятся на диске и переживают перезапуск")
+parser.add_argument(
+    "--replay",
+    action="store_true",
+    help="вместо моделирования повторить поток уведомлений из --broker-log")
+parser.add_argument(
+    "--metrics-port",
+    type=int,
+    default=None,
+    help="отдавать метрики в формате OpenMetrics на http://127.0.0.1:PORT/metrics")
+parser.add_argument(
+    "--results",
+    default=None,
+    help="каталог для потоковой выгрузки запросов и срезов метрик")
+parser.add_argument(
+    "--results-format",
+    choices=export.EXPORT_FORMATS,
+    default="auto",
+    help="формат выгрузки (auto — Parquet при установленном pyarrow, иначе CSV)")
+parser.add_argument(
+    "--report",
+    action="append",
+    default=None,
+    help="сохранить графики в файл (.png, .svg, .pdf); можно указать несколько раз")
+parser.add_argument(
+    "--no-plot",
+    action="store_true",
+    help="не показывать графики на экране (для запуска без дисплея)")
+parser.add_argument(
+    "--log-queue",
+    action="store_true",
+    help="форматировать и выводить лог в фоновом потоке, а не в цикле событий")
+parser.add_argument(
+    "--log-json",
+    default=None,
+    help="дублировать лог в файл JSON Lines")
+parser.add_argument(
+    "--log-rate",
+    type=float,
+    default=None,
+    help="не больше N сообщений лога каждого типа в секунду")
+parser.add_argument(
+    "--log-sample",
+    type=int,
+    default=1,
+    help="выводить каждое N-е сообщение каждого типа ниже WARNING")
+parser.add_argument(
+    "--request-log",
+    default=None,
+    help="сохранить колоночный журнал запросов в файл .npz")
+args = parser.parse_args()
+if args.replay and not args.broker_log:
+    parser.error("для --replay нужен --broker-log")
+
+model_clock = clock.SimulatedClock() if args.virtual_time else clock.MonotonicClock()
+app = Application(
+    clock=model_clock,
+    keep_requests=bool(args.request_log),
+    topology=args.topology,
+    seed=args.seed,
+    balancer_strategy=args.balancer,
+    popularity_skew=args.zipf,
+    broker_log=args.broker_log,
+    metrics_port=args.metrics_port,
+    plot=not args.no_plot,
+    results_dir=args.results,
+    results_format=args.results_format,
+    report=args.report)
+if args.duration is not None:
+    app.duration = args.duration
+app.load_profile = profiles.make_profile(args.profile, args.rps, app.duration)
 
 
 async def main():
-    async with context_logger.app_logger():
+    async with context_logger.app_logger(
+            queued=args.log_queue,
+            json_path=args.log_json,
+            rate=args.log_rate,
+            sample=args.log_sample):
+        if args.replay:
+            await app.replay_notifications()
+            return
         await app.run()
+    if args.request_log:
+        app.metrics_collector.request_log.save(args.request_log)
 
-asyncio.run(main())
\ No newline at end of file
+asyncio.run(
+    main(),
+    loop_factory=(lambda: clock.VirtualTimeEventLoop(model_clock))
+    if args.virtual_time else None)
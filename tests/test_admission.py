@@ -0,0 +1,136 @@
+import asyncio
+import unittest
+
+from app.clock import clock
+from app.metrics import metrics
+from app.models import models
+from app.services import admission
+
+
+class AdmissionQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.model_clock = clock.SimulatedClock()
+        self.collector = metrics.MetricsCollector(clock=self.model_clock)
+
+    def queue(self, policy: str, **kwargs) -> admission.AdmissionQueue:
+        return admission.AdmissionQueue(
+            "svc", 1, self.collector, policy=policy, clock=self.model_clock, **kwargs)
+
+    def request(self) -> models.Request:
+        return models.Request(models.User(1), "svc", models.HTTPMethod.GET, self.model_clock)
+
+    def shed(self) -> dict:
+        return dict(self.collector.admission_stats["svc"]["shed"])
+
+    def run_scenario(self, queue: admission.AdmissionQueue, steps) -> list[str]:
+        """Занимает обработчик, ставит в очередь запросы по шагам
+        (имя, задержка до следующего) и отдаёт обработчик по одному"""
+        served = []
+
+        async def waiter(name: str, request: models.Request):
+            try:
+                await queue.acquire(request)
+            except admission.RequestShed:
+                return
+            served.append(name)
+
+        async def scenario():
+            await queue.acquire(self.request())
+            tasks = []
+            for name, delay in steps:
+                tasks.append(asyncio.create_task(waiter(name, self.request())))
+                await asyncio.sleep(0)
+                self.model_clock.advance(delay)
+            for _ in steps:
+                queue.release()
+                await asyncio.sleep(0)
+            await asyncio.gather(*tasks)
+
+        asyncio.run(scenario())
+        return served
+
+    def test_free_worker_admits_immediately(self):
+        queue = self.queue("reject")
+
+        async def scenario():
+            await queue.acquire(self.request())
+            self.assertEqual(queue.busy, 1)
+            queue.release()
+
+        asyncio.run(scenario())
+        self.assertEqual(queue.busy, 0)
+
+    def test_reject_when_queue_full(self):
+        queue = self.queue("reject", queue_size=2)
+        served = self.run_scenario(queue, [("a", 0), ("b", 0), ("c", 0)])
+        self.assertEqual(served, ["a", "b"])
+        self.assertEqual(self.shed(), {"queue_full": 1})
+
+    def test_lifo_serves_newest_when_queue_is_late(self):
+        queue = self.queue("lifo", target=0.005)
+        served = self.run_scenario(queue, [("a", 0.0), ("b", 0.0), ("c", 0.01)])
+        # Старейший ждёт дольше target — сначала обслуживается самый свежий
+        self.assertEqual(served, ["c", "b", "a"])
+
+    def test_lifo_is_fifo_below_target(self):
+        queue = self.queue("lifo", target=1.0)
+        served = self.run_scenario(queue, [("a", 0.0), ("b", 0.0), ("c", 0.0)])
+        self.assertEqual(served, ["a", "b", "c"])
+
+    def test_lifo_evicts_oldest_when_full(self):
+        queue = self.queue("lifo", queue_size=2, target=1.0)
+        served = self.run_scenario(queue, [("a", 0), ("b", 0), ("c", 0)])
+        self.assertEqual(served, ["b", "c"])
+        self.assertEqual(self.shed(), {"queue_full": 1})
+
+    def test_deadline_sheds_expired_requests(self):
+        queue = self.queue("deadline", deadline=0.5)
+        served = self.run_scenario(queue, [("a", 0.4), ("b", 0.4), ("c", 0.0)])
+        # a ждёт 0.8 > 0.5, b — 0.4, c — 0
+        self.assertEqual(served, ["b", "c"])
+        self.assertEqual(self.shed(), {"deadline": 1})
+
+    def test_codel_drops_after_interval_above_target(self):
+        queue = self.queue("codel", target=0.005, interval=0.1)
+
+        async def scenario():
+            await queue.acquire(self.request())
+            tasks = [
+                asyncio.create_task(queue.acquire(self.request()))
+                for _ in range(6)
+            ]
+            await asyncio.sleep(0)
+            # Ожидание выше target, но ещё не дольше interval
+            self.model_clock.advance(0.05)
+            queue.release()
+            await asyncio.sleep(0)
+            self.assertEqual(self.shed(), {})
+            # Спустя interval CoDel начинает сбрасывать
+            self.model_clock.advance(0.2)
+            queue.release()
+            await asyncio.sleep(0)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run(scenario())
+        self.assertEqual(self.shed(), {"codel": 1})
+        self.assertTrue(queue.dropping)
+
+    def test_codel_leaves_dropping_state_below_target(self):
+        queue = self.queue("codel", target=0.005, interval=0.1)
+        self.model_clock.advance(1.0)
+        queue.dropping = True
+        queue.queue.append((None, self.model_clock.now(), 0.0))
+        self.assertFalse(queue._should_drop(self.model_clock.now(), 0.0))
+        self.assertFalse(queue.dropping)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            self.queue("random")
+        with self.assertRaises(ValueError):
+            admission.AdmissionQueue("svc", 0, self.collector)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import tempfile
+import unittest
+
+from app.broker import rabbitmq, segment_log, topics
+from app.clock import clock
+from app.logger import logger as context_logger
+from app.metrics import metrics
+from app.models import models
+from app.rng import streams
+
+
+class RabbitMQTest(unittest.TestCase):
+    def setUp(self):
+        self.model_clock = clock.SimulatedClock()
+        self.collector = metrics.MetricsCollector(clock=self.model_clock)
+
+    def broker(self, **kwargs) -> rabbitmq.RabbitMQ:
+        kwargs.setdefault("fail_prob", 0.0)
+        return rabbitmq.RabbitMQ(
+            "broker", self.collector, clock=self.model_clock,
+            rng=streams.StreamFactory(1).stream("broker"), **kwargs)
+
+    def message(self, number: int) -> models.Message:
+        return models.Message("topic", {"n": number}, self.model_clock)
+
+    def run_virtual(self, coro):
+        loop = clock.VirtualTimeEventLoop(self.model_clock)
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    @staticmethod
+    def contents(topic) -> list[int]:
+        return [msg.payload["n"] for msg in list(topic.queue._queue)]
+
+    def test_reject_publish(self):
+        broker = self.broker(queue_size=2, overflow="reject_publish")
+
+        async def scenario():
+            errors = [await broker.enqueue(self.message(i)) for i in range(3)]
+            self.assertEqual(errors[:2], [None, None])
+            self.assertIsInstance(errors[2], rabbitmq.PublishRejected)
+            self.assertEqual(self.contents(broker.queue("topic")), [0, 1])
+
+        asyncio.run(scenario())
+        self.assertEqual(self.collector.get_broker_stats()["messages_dropped"], 1)
+
+    def test_drop_head(self):
+        broker = self.broker(queue_size=2, overflow="drop_head")
+
+        async def scenario():
+            for i in range(4):
+                self.assertIsNone(await broker.enqueue(self.message(i)))
+            self.assertEqual(self.contents(broker.queue("topic")), [2, 3])
+
+        asyncio.run(scenario())
+        self.assertEqual(self.collector.get_broker_stats()["messages_dropped"], 2)
+
+    def test_backpressure_waits_for_room(self):
+        broker = self.broker(queue_size=2, overflow="backpressure")
+
+        async def scenario():
+            for i in range(2):
+                await broker.enqueue(self.message(i))
+            blocked = asyncio.create_task(broker.enqueue(self.message(2)))
+            await asyncio.sleep(0)
+            self.assertFalse(blocked.done())
+            queue = broker.queue("topic")
+            _, token = await queue.get(1)
+            queue.done(token)
+            self.assertIsNone(await blocked)
+            self.assertEqual(self.contents(queue), [1, 2])
+
+        asyncio.run(scenario())
+        self.assertEqual(self.collector.get_broker_stats()["messages_dropped"], 0)
+
+    def test_invalid_overflow(self):
+        with self.assertRaises(ValueError):
+            self.broker(overflow="drop_tail")
+
+    def test_publish_in_batches_and_deliver(self):
+        broker = self.broker(batch_size=10, channels=1, consumers=1, prefetch=5)
+        delivered = []
+
+        async def handler(msg: models.Message, delay: float):
+            delivered.append(msg.payload["n"])
+
+        async def scenario():
+            context_logger.logger_var.set(logging.getLogger("test"))
+            consumers = broker.subscribe("topic", handler)
+            await asyncio.gather(*(broker.publish(self.message(i)) for i in range(10)))
+            await broker.queue("topic").queue.join()
+            for task in consumers + broker.channel_tasks:
+                task.cancel()
+
+        self.run_virtual(scenario())
+        self.assertEqual(sorted(delivered), list(range(10)))
+        stats = self.collector.get_broker_stats()
+        self.assertEqual(stats["messages_sent"], 10)
+        self.assertEqual(stats["avg_batch"], 10)
+
+    def test_nack_raises(self):
+        broker = self.broker(fail_prob=1.0)
+
+        async def scenario():
+            with self.assertRaises(rabbitmq.PublishRejected):
+                await broker.publish(self.message(0))
+            for task in broker.channel_tasks:
+                task.cancel()
+
+        self.run_virtual(scenario())
+        self.assertEqual(self.collector.get_broker_stats()["messages_failed"], 1)
+
+    def test_durable_topic_replay(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        broker = self.broker(persistence={"path": directory.name, "fsync": "never"})
+        replayed = []
+
+        async def handler(msg: models.Message, delay: float):
+            replayed.append(msg.payload["n"])
+
+        async def scenario():
+            await asyncio.gather(*(broker.publish(self.message(i)) for i in range(5)))
+            for task in broker.channel_tasks:
+                task.cancel()
+            self.assertEqual(await broker.replay("topic", handler), 5)
+
+        self.run_virtual(scenario())
+        broker.close()
+        self.assertEqual(replayed, list(range(5)))
+        # Сообщения никто не прочитал — они остаются в очереди
+        self.assertEqual(broker.queue("topic").qsize(), 5)
+
+    def test_retention_moves_cursor_and_counts_lost_messages(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        log = segment_log.SegmentedLog(
+            directory.name, segment_bytes=200, retention_bytes=100, fsync="never")
+        topic = topics.DurableTopic(
+            "topic", log, maxsize=100, write_latency=0,
+            metrics_collector=self.collector, clock=self.model_clock)
+
+        async def scenario():
+            for i in range(20):
+                await topic.put(self.message(i))
+                await topic.flush()
+            batch, token = await topic.get(100)
+            topic.done(token)
+            return [msg.payload["n"] for msg in batch]
+
+        received = asyncio.run(scenario())
+        log.close()
+        dropped = self.collector.get_broker_stats()["messages_dropped"]
+        self.assertGreater(dropped, 0)
+        # Каждое сообщение либо доставлено, либо учтено как потерянное
+        self.assertEqual(received, list(range(dropped, 20)))
+        self.assertEqual(topic.qsize(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import time
+import unittest
+
+from app.clock import clock
+
+
+async def scenario(model_clock: clock.Clock) -> list[tuple[str, float]]:
+    """Задачи с разными задержками; результат — порядок завершения и
+    время завершения от начала по часам модели"""
+    start = model_clock.now()
+    finished = []
+
+    async def worker(name: str, delays: list[float]):
+        for delay in delays:
+            await asyncio.sleep(delay)
+        finished.append((name, model_clock.now() - start))
+
+    async def timeout():
+        try:
+            await asyncio.wait_for(asyncio.sleep(1.0), 0.05)
+        except TimeoutError:
+            finished.append(("timeout", model_clock.now() - start))
+
+    await asyncio.gather(
+        worker("a", [0.03, 0.03]),
+        worker("b", [0.01]),
+        worker("c", [0.02, 0.06]),
+        timeout())
+    return finished
+
+
+class VirtualTimeTest(unittest.TestCase):
+    def setUp(self):
+        self.model_clock = clock.SimulatedClock()
+
+    def run_virtual(self, coroutine):
+        loop = clock.VirtualTimeEventLoop(self.model_clock)
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    def test_same_results_as_real_time(self):
+        real = asyncio.run(scenario(clock.default_clock))
+        virtual = self.run_virtual(scenario(self.model_clock))
+        self.assertEqual([name for name, _ in virtual], [name for name, _ in real])
+        for (_, expected), (_, actual) in zip(real, virtual):
+            self.assertAlmostEqual(actual, expected, delta=0.02)
+
+    def test_virtual_durations_are_exact(self):
+        virtual = self.run_virtual(scenario(self.model_clock))
+        expected = [("b", 0.01), ("timeout", 0.05), ("a", 0.06), ("c", 0.08)]
+        self.assertEqual([name for name, _ in virtual], [name for name, _ in expected])
+        for (_, elapsed), (_, exact) in zip(virtual, expected):
+            self.assertAlmostEqual(elapsed, exact, places=9)
+
+    def test_simulated_clock_moves_only_explicitly(self):
+        model_clock = clock.SimulatedClock(10.0)
+        self.assertEqual(model_clock.now(), 10.0)
+        model_clock.advance(2.5)
+        self.assertEqual(model_clock.now(), 12.5)
+
+    def test_no_real_waiting(self):
+        async def long_sleep():
+            await asyncio.sleep(3600)
+            return self.model_clock.now()
+
+        started = time.monotonic()
+        self.assertEqual(self.run_virtual(long_sleep()), 3600)
+        self.assertLess(time.monotonic() - started, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import unittest
+
+from app.clock import clock
+from app.logger import logger as context_logger
+from app.metrics import metrics
+from app.rng import streams
+from app.store import cluster
+from app.store.database import db
+
+
+class DBClusterTest(unittest.TestCase):
+    def setUp(self):
+        self.model_clock = clock.SimulatedClock()
+        self.collector = metrics.MetricsCollector(clock=self.model_clock)
+        factory = streams.StreamFactory(1)
+        self.nodes = [
+            db.Database(
+                name, self.collector, latency=0.001, fail_prob=0.0, available=True,
+                rng=factory.stream(name), clock=self.model_clock)
+            for name in ("master", "replica1", "replica2")]
+
+        self.logger = logging.getLogger("tests.cluster")
+        self.logger.addHandler(logging.NullHandler())
+        self.logger.propagate = False
+
+    def cluster(self, mode: str) -> cluster.DBCluster:
+        return cluster.DBCluster(
+            "cluster", self.nodes[0], self.nodes[1:], replication_delay=0.01,
+            mode=mode, metrics_collector=self.collector, clock=self.model_clock,
+            rng=streams.StreamFactory(1).stream("cluster"))
+
+    def run_virtual(self, coro):
+        loop = clock.VirtualTimeEventLoop(self.model_clock)
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def test_recovered_master_is_not_duplicated(self):
+        group = self.cluster("sync")
+        old_master = self.nodes[0]
+
+        async def scenario():
+            context_logger.logger_var.set(self.logger)
+            await group.write("a", 1)
+            old_master.available = False
+            await group.write("b", 2)
+            old_master.available = True
+            # Один цикл мониторинга возвращает старый master в реплики
+            with self.assertRaises(TimeoutError):
+                await asyncio.wait_for(group.monitor_master(interval=1.0), 1.5)
+            names = [replica.name for replica in group.replicas]
+            self.assertEqual(len(names), len(set(names)))
+            self.assertIn(old_master.name, names)
+            # Синхронная запись ждёт каждую реплику один раз и успевает
+            lsn = await group.write("c", 3)
+            self.assertEqual(min(group.log.applied.values()), lsn)
+            for task in [group.committer, *group.streamers.values()]:
+                task.cancel()
+
+        self.run_virtual(scenario())
+
+    def test_sync_write_waits_for_all_replicas(self):
+        group = self.cluster("sync")
+
+        async def scenario():
+            context_logger.logger_var.set(self.logger)
+            lsn = await group.write("a", 1)
+            self.assertEqual(group.log.applied, {"replica1": lsn, "replica2": lsn})
+            for task in [group.committer, *group.streamers.values()]:
+                task.cancel()
+
+        self.run_virtual(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
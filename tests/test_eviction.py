@@ -0,0 +1,93 @@
+import unittest
+
+from app.store.database.redis import eviction
+
+
+class LRUTest(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        policy = eviction.LRU(2)
+        self.assertEqual(policy.insert("a"), [])
+        self.assertEqual(policy.insert("b"), [])
+        policy.access("a")
+        self.assertEqual(policy.insert("c"), ["b"])
+
+    def test_remove(self):
+        policy = eviction.LRU(2)
+        policy.insert("a")
+        policy.insert("b")
+        policy.remove("a")
+        policy.remove("missing")
+        self.assertEqual(policy.insert("c"), [])
+
+
+class LFUTest(unittest.TestCase):
+    def test_evicts_least_frequent_then_oldest(self):
+        policy = eviction.LFU(3)
+        for key in "abc":
+            policy.insert(key)
+        policy.access("a")
+        policy.access("a")
+        policy.access("c")
+        # b и d встречались по разу, b старше
+        self.assertEqual(policy.insert("d"), ["b"])
+        self.assertEqual(policy.insert("e"), ["d"])
+
+    def test_remove_updates_min_frequency(self):
+        policy = eviction.LFU(2)
+        policy.insert("a")
+        policy.insert("b")
+        policy.access("b")
+        policy.remove("a")
+        self.assertEqual(policy.min_freq, 2)
+        self.assertEqual(policy.insert("c"), [])
+        self.assertEqual(policy.insert("d"), ["c"])
+
+
+class WTinyLFUTest(unittest.TestCase):
+    def test_size_never_exceeds_capacity(self):
+        policy = eviction.WTinyLFU(100)
+        cached = set()
+        for i in range(5000):
+            key = f"k{(i * 7919) % 400}"
+            if key in cached:
+                policy.access(key)
+                continue
+            cached.add(key)
+            cached.difference_update(policy.insert(key))
+            self.assertLessEqual(len(cached), 100)
+        segments = len(policy.window) + len(policy.probation) + len(policy.protected)
+        self.assertEqual(segments, len(cached))
+
+    def test_frequent_keys_survive_scan(self):
+        def hot_hits(policy: eviction.EvictionPolicy) -> int:
+            cached = set()
+            hits = 0
+            for i in range(3000):
+                # Между обращениями к горячему ключу проходит больше
+                # уникальных ключей, чем помещается в кэш
+                for key in (f"hot{i % 20}", f"scan{2 * i}", f"scan{2 * i + 1}"):
+                    if key in cached:
+                        policy.access(key)
+                        hits += key.startswith("hot")
+                    else:
+                        cached.add(key)
+                        cached.difference_update(policy.insert(key))
+            return hits
+
+        self.assertEqual(hot_hits(eviction.LRU(50)), 0)
+        self.assertGreater(hot_hits(eviction.WTinyLFU(50)), 2900)
+
+    def test_remove(self):
+        policy = eviction.WTinyLFU(10)
+        policy.insert("a")
+        policy.remove("a")
+        self.assertNotIn("a", policy.window)
+
+    def test_invalid_capacity(self):
+        for policy in eviction.POLICIES.values():
+            with self.assertRaises(ValueError):
+                policy(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import unittest
+
+from app.clock import clock
+from app.logger import logger as context_logger
+from app.metrics import exposition, metrics
+from app.models import models
+
+
+class OpenMetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.model_clock = clock.SimulatedClock()
+        self.collector = metrics.MetricsCollector(clock=self.model_clock)
+
+    def record(self, service: str, duration: float, success: bool = True):
+        request = models.Request(
+            models.User(1), service, models.HTTPMethod.GET, self.model_clock)
+        request.end_time = request.start_time + duration
+        request.success = success
+        self.collector.record(request)
+
+    def render(self, renderer: exposition.OpenMetricsRenderer | None = None) -> list[str]:
+        renderer = renderer or exposition.OpenMetricsRenderer(self.collector)
+        return renderer.render().decode().splitlines()
+
+    def test_labels_are_escaped(self):
+        self.assertEqual(
+            exposition.labels(service='a"b\\c\nd', le=0.5),
+            '{service="a\\"b\\\\c\\nd",le="0.5"}')
+        self.assertEqual(exposition.labels(), "")
+
+    def test_ends_with_eof(self):
+        lines = self.render()
+        self.assertEqual(lines[-1], "# EOF")
+        self.assertEqual(lines.count("# EOF"), 1)
+
+    def test_request_counters(self):
+        self.record("auth", 0.01)
+        self.record("auth", 0.02, success=False)
+        lines = self.render()
+        self.assertIn('webservice_requests_total{service="auth",outcome="success"} 1', lines)
+        self.assertIn('webservice_requests_total{service="auth",outcome="error"} 1', lines)
+        self.assertIn("# TYPE webservice_requests counter", lines)
+
+    def test_histogram_buckets_are_cumulative(self):
+        for duration in (0.003, 0.02, 0.02, 0.3, 20.0):
+            self.record("auth", duration)
+        lines = self.render()
+        prefix = 'webservice_response_seconds_bucket{service="auth",le="'
+        buckets = {
+            line[len(prefix):].split('"', 1)[0]: int(line.rsplit(" ", 1)[1])
+            for line in lines if line.startswith(prefix)}
+        self.assertEqual(buckets["0.005"], 1)
+        self.assertEqual(buckets["0.01"], 1)
+        self.assertEqual(buckets["0.025"], 3)
+        self.assertEqual(buckets["0.5"], 4)
+        self.assertEqual(buckets["10.0"], 4)
+        self.assertEqual(buckets["+Inf"], 5)
+        counts = list(buckets.values())
+        self.assertEqual(counts, sorted(counts))
+        self.assertIn('webservice_response_seconds_count{service="auth"} 5', lines)
+        sample_sum = next(
+            line for line in lines
+            if line.startswith('webservice_response_seconds_sum{service="auth"}'))
+        self.assertAlmostEqual(float(sample_sum.rsplit(" ", 1)[1]), 20.343)
+
+    def test_histogram_cache_follows_count(self):
+        renderer = exposition.OpenMetricsRenderer(self.collector)
+        self.record("auth", 0.01)
+        self.render(renderer)
+        self.record("auth", 0.01)
+        self.assertIn('webservice_response_seconds_count{service="auth"} 2', self.render(renderer))
+
+    def test_server_responds(self):
+        server = exposition.MetricsServer(
+            exposition.OpenMetricsRenderer(self.collector), port=0)
+
+        async def fetch(path: str) -> bytes:
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: test\r\n\r\n".encode())
+            response = await reader.read()
+            writer.close()
+            return response
+
+        async def scenario():
+            context_logger.logger_var.set(logging.getLogger("test"))
+            await server.start()
+            try:
+                return await fetch("/metrics"), await fetch("/other")
+            finally:
+                server.close()
+
+        found, missing = asyncio.run(scenario())
+        self.assertTrue(found.startswith(b"HTTP/1.1 200 OK"))
+        self.assertIn(exposition.CONTENT_TYPE.encode(), found)
+        self.assertTrue(found.endswith(b"# EOF\n"))
+        self.assertTrue(missing.startswith(b"HTTP/1.1 404"))
+
+
+if __name__ == "__main__":
+    unittest.main()
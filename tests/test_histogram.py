@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+from app.metrics.histogram import LatencyHistogram
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def setUp(self):
+        self.values = np.random.default_rng(1).lognormal(-3, 1, 10_000)
+
+    def filled(self, values) -> LatencyHistogram:
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(float(value))
+        return histogram
+
+    def test_quantiles_within_precision(self):
+        histogram = self.filled(self.values)
+        for q, value in zip([0.5, 0.9, 0.99], histogram.quantiles([0.5, 0.9, 0.99])):
+            expected = np.quantile(self.values, q)
+            self.assertAlmostEqual(value / expected, 1, delta=2 * histogram.precision)
+
+    def test_quantiles_clamped_to_min_max(self):
+        histogram = self.filled([0.25, 0.25, 0.25])
+        self.assertEqual(histogram.quantiles([0, 1]), [0.25, 0.25])
+
+    def test_empty(self):
+        histogram = LatencyHistogram()
+        self.assertEqual(histogram.quantiles([0.5, 0.99]), [0, 0])
+        self.assertEqual(histogram.mean, 0)
+
+    def test_mean_and_buckets(self):
+        histogram = self.filled([0.1, 0.1, 0.4])
+        self.assertAlmostEqual(histogram.mean, 0.2)
+        values, counts = histogram.buckets()
+        self.assertEqual(counts.tolist(), [2, 1])
+        self.assertAlmostEqual(values[0], 0.1, delta=0.1 * histogram.precision)
+
+    def test_merge_equals_single_histogram(self):
+        left = self.filled(self.values[:4000])
+        right = self.filled(self.values[4000:])
+        left.merge(right)
+        whole = self.filled(self.values)
+        np.testing.assert_array_equal(left.counts, whole.counts)
+        self.assertEqual(left.count, whole.count)
+        self.assertAlmostEqual(left.total, whole.total)
+        self.assertEqual((left.min, left.max), (whole.min, whole.max))
+
+    def test_subtract_undoes_merge(self):
+        whole = self.filled(self.values[:4000])
+        right = self.filled(self.values[4000:])
+        whole.merge(right)
+        whole.subtract(right)
+        left = self.filled(self.values[:4000])
+        np.testing.assert_array_equal(whole.counts, left.counts)
+        self.assertEqual(whole.count, left.count)
+        self.assertAlmostEqual(whole.total, left.total)
+
+    def test_subtract_to_empty_resets(self):
+        histogram = self.filled([0.1, 0.2])
+        histogram.subtract(self.filled([0.1, 0.2]))
+        self.assertEqual(histogram.count, 0)
+        self.assertEqual(histogram.quantiles([0.5]), [0])
+        histogram.record(0.3)
+        self.assertEqual((histogram.min, histogram.max), (0.3, 0.3))
+
+    def test_cumulative(self):
+        histogram = self.filled([0.003, 0.02, 0.02, 0.3])
+        self.assertEqual(histogram.cumulative([0.001, 0.01, 0.025, 1.0]), [0, 1, 3, 4])
+        self.assertEqual(LatencyHistogram().cumulative([0.1, 1.0]), [0, 0])
+
+    def test_merge_rejects_other_parameters(self):
+        with self.assertRaises(ValueError):
+            LatencyHistogram().merge(LatencyHistogram(precision=0.05))
+
+    def test_invalid_precision(self):
+        with self.assertRaises(ValueError):
+            LatencyHistogram(precision=1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import json
+import logging
+import unittest
+
+from app.logger import logger
+
+
+def record(msg: str, *args, level: int = logging.INFO, **extra) -> logging.LogRecord:
+    entry = logging.LogRecord("test", level, __file__, 1, msg, args, None)
+    entry.__dict__.update(extra)
+    return entry
+
+
+class EventFilterTest(unittest.TestCase):
+    def test_sampling_by_template(self):
+        event_filter = logger.EventFilter(sample=3)
+        passed = [event_filter.filter(record("Запрос %s", i)) for i in range(6)]
+        self.assertEqual(passed, [True, False, False, True, False, False])
+        self.assertEqual(event_filter.suppressed, {"Запрос %s": 4})
+
+    def test_warnings_are_not_sampled(self):
+        event_filter = logger.EventFilter(sample=10)
+        self.assertTrue(all(
+            event_filter.filter(record("Сбой", level=logging.WARNING)) for _ in range(5)))
+
+    def test_rate_limit_per_event(self):
+        event_filter = logger.EventFilter(rate=2)
+        passed = [event_filter.filter(record("a")) for _ in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        self.assertTrue(event_filter.filter(record("b")))
+        self.assertTrue(event_filter.filter(record("x", event="c")))
+
+    def test_event_table_is_bounded(self):
+        event_filter = logger.EventFilter(sample=2, max_events=3)
+        for i in range(100):
+            event_filter.filter(record(f"Уникальное сообщение {i}"))
+        self.assertEqual(len(event_filter.events), 3)
+        self.assertLessEqual(len(event_filter.seen), 4)
+        self.assertEqual(event_filter.suppressed[logger.OTHER_EVENTS], 48)
+
+
+class JsonLinesFormatterTest(unittest.TestCase):
+    def test_format(self):
+        entry = json.loads(logger.JsonLinesFormatter().format(
+            record("Ответ %s за %.1f с", "auth", 0.25, event="response")))
+        self.assertEqual(entry["event"], "response")
+        self.assertEqual(entry["message"], "Ответ auth за 0.2 с")
+        self.assertEqual(entry["args"], ["auth", 0.25])
+        self.assertEqual(entry["level"], "INFO")
+
+
+if __name__ == "__main__":
+    unittest.main()
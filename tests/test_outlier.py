@@ -0,0 +1,146 @@
+import unittest
+
+from app.balance_loader import outlier, strategies
+from app.clock import clock
+from app.metrics import metrics
+from app.rng import streams
+
+
+class Instance:
+    def __init__(self, name: str):
+        self.name = name
+        self.available = True
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_consecutive_failures(self):
+        breaker = outlier.CircuitBreaker(consecutive_failures=3, min_requests=100)
+        for _ in range(2):
+            breaker.record(0.0, False)
+        self.assertFalse(breaker.tripped(0.0))
+        breaker.record(0.0, True)
+        for _ in range(2):
+            breaker.record(0.0, False)
+        self.assertFalse(breaker.tripped(0.0))
+        breaker.record(0.0, False)
+        self.assertTrue(breaker.tripped(0.0))
+
+    def test_error_rate_over_window(self):
+        breaker = outlier.CircuitBreaker(
+            consecutive_failures=100, error_rate=0.5, min_requests=10, window=10)
+        for i in range(10):
+            breaker.record(float(i), i % 2 == 0)
+        self.assertTrue(breaker.tripped(9.0))
+        # Через window секунд старые корзины выпадают из окна
+        self.assertFalse(breaker.tripped(25.0))
+
+
+class OutlierDetectorTest(unittest.TestCase):
+    def setUp(self):
+        self.model_clock = clock.SimulatedClock()
+        self.collector = metrics.MetricsCollector(clock=self.model_clock)
+        self.instances = [Instance(name) for name in "abcd"]
+        self.strategy = strategies.WeightedRandom(
+            self.instances, [1] * 4, streams.StreamFactory(1).stream("test"))
+
+    def detector(self, **kwargs) -> outlier.OutlierDetector:
+        return outlier.OutlierDetector(
+            "svc", self.instances, self.strategy, self.collector, self.model_clock,
+            consecutive_failures=2, base_ejection_time=5.0, **kwargs)
+
+    def fail_requests(self, detector: outlier.OutlierDetector, instance: Instance, times: int = 2):
+        for _ in range(times):
+            detector.record(instance, False)
+
+    def test_eject_and_restore(self):
+        detector = self.detector()
+        a = self.instances[0]
+        self.fail_requests(detector, a)
+        self.assertIn(id(a), detector.ejected)
+        self.assertEqual(self.strategy.tree.weights, [0, 1, 1, 1])
+        self.model_clock.advance(4.9)
+        detector.refresh(self.model_clock.now())
+        self.assertIn(id(a), detector.ejected)
+        self.model_clock.advance(0.1)
+        detector.refresh(self.model_clock.now())
+        self.assertNotIn(id(a), detector.ejected)
+        self.assertEqual(detector.breakers[id(a)].state, outlier.HALF_OPEN)
+        self.assertEqual(self.collector.get_outlier_stats(), {"a": {"eject": 1, "restore": 1}})
+
+    def test_half_open_gets_reduced_weight_until_success(self):
+        detector = self.detector(half_open_weight=0.25)
+        a = self.instances[0]
+        self.fail_requests(detector, a)
+        self.model_clock.advance(5.0)
+        detector.refresh(self.model_clock.now())
+        self.assertEqual(self.strategy.tree.weights, [0.25, 1, 1, 1])
+        detector.record(a, True)
+        self.assertEqual(detector.breakers[id(a)].state, outlier.CLOSED)
+        self.assertEqual(self.strategy.tree.weights, [1, 1, 1, 1])
+
+    def test_half_open_failure_ejects_for_longer(self):
+        detector = self.detector()
+        a = self.instances[0]
+        self.fail_requests(detector, a)
+        self.model_clock.advance(5.0)
+        self.fail_requests(detector, a, times=1)
+        breaker = detector.breakers[id(a)]
+        self.assertEqual(breaker.state, outlier.OPEN)
+        self.assertEqual(breaker.open_until, 15.0)
+
+    def test_ejection_multiplier_decays_while_healthy(self):
+        detector = self.detector(decay_interval=10.0)
+        a = self.instances[0]
+        breaker = detector.breakers[id(a)]
+        for _ in range(3):
+            self.fail_requests(detector, a)
+            self.model_clock.advance(breaker.open_until - self.model_clock.now())
+        self.assertEqual(breaker.ejections, 3)
+        detector.record(a, True)
+        # Два полных интервала в состоянии closed снимают два исключения
+        self.model_clock.advance(25.0)
+        self.fail_requests(detector, a)
+        self.assertEqual(breaker.ejections, 2)
+        self.assertEqual(breaker.open_until - self.model_clock.now(), 10.0)
+
+    def test_ejection_time_is_capped(self):
+        detector = self.detector(max_ejection_time=12.0)
+        a = self.instances[0]
+        for _ in range(5):
+            self.fail_requests(detector, a)
+            self.model_clock.advance(detector.breakers[id(a)].open_until - self.model_clock.now())
+        breaker = detector.breakers[id(a)]
+        self.assertLessEqual(breaker.open_until - self.model_clock.now(), 12.0)
+
+    def test_max_ejection_percent(self):
+        detector = self.detector(max_ejection_percent=50)
+        for instance in self.instances:
+            self.fail_requests(detector, instance)
+        self.assertEqual(len(detector.ejected), 2)
+        self.assertEqual(sum(self.strategy.tree.weights), 2)
+
+    def test_last_usable_instance_is_kept(self):
+        detector = self.detector(max_ejection_percent=100)
+        for instance in self.instances:
+            self.fail_requests(detector, instance)
+        self.assertEqual(len(detector.ejected), 3)
+        self.assertTrue(self.strategy.has_available())
+
+    def test_event_timeline_is_bounded(self):
+        collector = metrics.MetricsCollector(clock=self.model_clock, max_outlier_events=3)
+        for i in range(10):
+            collector.record_outlier_event("svc", "a", "eject", float(i))
+        self.assertEqual([event[0] for event in collector.outlier_events], [7.0, 8.0, 9.0])
+        self.assertEqual(collector.get_outlier_stats(), {"a": {"eject": 10, "restore": 0}})
+
+    def test_panic_restores_all(self):
+        detector = self.detector()
+        for instance in self.instances[:2]:
+            self.fail_requests(detector, instance)
+        detector.refresh(self.model_clock.now(), panic=True)
+        self.assertEqual(detector.ejected, {})
+        self.assertEqual(self.strategy.tree.weights, [0.1, 0.1, 1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import math
+import unittest
+
+from app.load_generator import profiles
+from app.rng import streams
+
+
+class ProfilesTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = streams.StreamFactory(1).stream("test")
+
+    def arrivals(self, profile: profiles.ArrivalProfile, duration: float) -> int:
+        t = 0.0
+        count = 0
+        while True:
+            t += profile.next_interval(t, self.rng, horizon=duration)
+            if t >= duration:
+                return count
+            count += 1
+
+    def test_zero_rate_never_arrives(self):
+        for profile in (profiles.Poisson(0), profiles.ConstantRate(0),
+                        profiles.MMPP([0, 0], [1, 1])):
+            self.assertEqual(profile.next_interval(0.0, self.rng), math.inf)
+
+    def test_step_to_zero_is_idle(self):
+        profile = profiles.Step([(0, 10), (5, 0)])
+        self.assertFalse(profile.idle_from(4.9))
+        self.assertTrue(profile.idle_from(5.0))
+        # Без horizon поиск прихода тоже завершается
+        self.assertEqual(profile.next_interval(6.0, self.rng), math.inf)
+        self.assertLess(self.arrivals(profile, 100), 100)
+
+    def test_horizon_stops_search(self):
+        profile = profiles.DiurnalRamp(base_rps=0, peak_rps=10, period=100)
+        # В начале периода интенсивность близка к нулю
+        self.assertEqual(profile.next_interval(0.0, self.rng, horizon=0.01), math.inf)
+
+    def test_mmpp_with_zero_rate_state_reaches_horizon(self):
+        profile = profiles.MMPP([0, 10], [1, 1])
+        interval = profile.next_interval(0.0, self.rng, horizon=50)
+        self.assertGreater(interval, 0)
+        self.assertEqual(profile.next_interval(50.0, self.rng, horizon=50), math.inf)
+
+    def test_mean_rate_matches_rps(self):
+        duration = 2000
+        for name in ("poisson", "diurnal", "step"):
+            count = self.arrivals(profiles.make_profile(name, 5, duration), duration)
+            self.assertAlmostEqual(count / duration, 5, delta=0.3, msg=name)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            profiles.make_profile("burst", 1, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
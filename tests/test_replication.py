@@ -0,0 +1,80 @@
+import asyncio
+import unittest
+
+from app.store.replication import ReplicationLog
+
+
+class ReplicationLogTest(unittest.TestCase):
+    def test_append_assigns_increasing_lsn(self):
+        log = ReplicationLog()
+        self.assertEqual([log.append(f"k{i}", i, float(i)) for i in range(3)], [1, 2, 3])
+
+    def test_read_from_last_applied(self):
+        log = ReplicationLog()
+        log.follow("r1")
+        for i in range(5):
+            log.append(f"k{i}", i, float(i))
+        self.assertEqual([entry.lsn for entry in log.read("r1", 2)], [1, 2])
+        log.ack("r1", 2)
+        self.assertEqual([entry.lsn for entry in log.read("r1", 10)], [3, 4, 5])
+
+    def test_trim_keeps_entries_of_slowest_replica(self):
+        log = ReplicationLog()
+        log.follow("r1")
+        log.follow("r2")
+        for i in range(5):
+            log.append(f"k{i}", i, float(i))
+        log.ack("r1", 5)
+        log.ack("r2", 3)
+        self.assertEqual([entry.lsn for entry in log.entries], [4, 5])
+        log.unfollow("r2")
+        self.assertEqual(len(log.entries), 0)
+
+    def test_retention_forces_resync(self):
+        log = ReplicationLog(retention=3)
+        log.follow("r1")
+        for i in range(6):
+            log.append(f"k{i}", i, float(i))
+        self.assertEqual([entry.lsn for entry in log.read("r1", 10)], [4, 5, 6])
+        self.assertEqual(log.resyncs["r1"], 1)
+
+    def test_lag(self):
+        log = ReplicationLog()
+        log.follow("r1")
+        log.append("a", 1, 1.0)
+        log.append("b", 2, 4.0)
+        self.assertEqual(log.lag("r1", 10.0), (9.0, 2))
+        log.ack("r1", 1)
+        self.assertEqual(log.lag("r1", 10.0), (6.0, 1))
+        log.ack("r1", 2)
+        self.assertEqual(log.lag("r1", 10.0), (0.0, 0))
+
+    def test_lag_of_unfollowed_replica(self):
+        log = ReplicationLog()
+        log.append("a", 1, 1.0)
+        self.assertEqual(log.lag("unknown", 10.0), (0.0, 0))
+
+    def test_ack_for_unknown_replica_is_ignored(self):
+        log = ReplicationLog()
+        log.append("a", 1, 0.0)
+        log.ack("promoted", 1)
+        self.assertNotIn("promoted", log.applied)
+
+    def test_wait_replicated(self):
+        async def scenario():
+            log = ReplicationLog()
+            log.follow("r1")
+            log.follow("r2")
+            lsn = log.append("a", 1, 0.0)
+            future = log.wait_replicated(lsn, 2)
+            log.ack("r1", lsn)
+            self.assertFalse(future.done())
+            log.ack("r2", lsn)
+            self.assertTrue(future.done())
+            self.assertEqual(log.waiters, [])
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import math
+import statistics
+import unittest
+
+from app.experiments import replications
+
+
+class StudentTTest(unittest.TestCase):
+    def test_cdf_known_values(self):
+        # Распределение Коши (df = 1) и df = 2 имеют явный вид
+        for t in (-3.0, -0.5, 0.0, 1.0, 4.0):
+            self.assertAlmostEqual(
+                replications.student_t_cdf(t, 1), 0.5 + math.atan(t) / math.pi)
+            self.assertAlmostEqual(
+                replications.student_t_cdf(t, 2), 0.5 + t / (2 * math.sqrt(2 + t * t)))
+
+    def test_small_df_quantiles(self):
+        for df, expected in ((1, 12.706), (2, 4.303), (3, 3.182), (10, 2.228), (30, 2.042)):
+            self.assertAlmostEqual(
+                replications.student_t_quantile(0.975, df), expected, places=3)
+
+    def test_quantile_is_symmetric(self):
+        for df in (1, 4, 9):
+            self.assertAlmostEqual(
+                replications.student_t_quantile(0.1, df),
+                -replications.student_t_quantile(0.9, df))
+
+    def test_confidence_interval(self):
+        values = [1.0, 2.0, 3.0, 4.0]
+        mean, low, high = replications.confidence_interval(values)
+        half = 3.182 * statistics.stdev(values) / 2
+        self.assertEqual(mean, 2.5)
+        self.assertAlmostEqual(low, mean - half, places=2)
+        self.assertAlmostEqual(high, mean + half, places=2)
+        self.assertEqual(replications.confidence_interval([5.0]), (5.0, 5.0, 5.0))
+
+    def test_seed_stream_is_deterministic(self):
+        seeds = replications.seed_stream(7, 5)
+        self.assertEqual(seeds, replications.seed_stream(7, 5))
+        self.assertEqual(len(set(seeds)), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
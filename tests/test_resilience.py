@@ -0,0 +1,57 @@
+import unittest
+
+from app.network import resilience
+from app.rng import streams
+
+
+class RetryBudgetTest(unittest.TestCase):
+    def test_reserve_is_capped(self):
+        budget = resilience.RetryBudget(ratio=0.5, max_tokens=3)
+        for _ in range(100):
+            budget.deposit()
+        self.assertEqual(budget.tokens, 3)
+        self.assertEqual(sum(budget.withdraw() for _ in range(10)), 3)
+        self.assertFalse(budget.withdraw())
+
+    def test_steady_state_retries_follow_ratio(self):
+        budget = resilience.RetryBudget(ratio=0.1, max_tokens=10)
+        while budget.withdraw():
+            pass
+        retries = 0
+        for _ in range(1000):
+            budget.deposit()
+            # Каждый запрос хочет повтор, но бюджет пропускает лишь долю ratio
+            retries += budget.withdraw()
+        self.assertAlmostEqual(retries, 100, delta=1)
+
+
+class RoutePolicyTest(unittest.TestCase):
+    def policy(self, **kwargs) -> resilience.RoutePolicy:
+        return resilience.RoutePolicy(
+            rng=streams.StreamFactory(1).stream("test"), **kwargs)
+
+    def test_backoff_is_bounded(self):
+        policy = self.policy(backoff=0.05, max_backoff=0.3)
+        for retry in range(1, 10):
+            limit = min(0.3, 0.05 * 2 ** (retry - 1))
+            for _ in range(50):
+                delay = policy.backoff_delay(retry)
+                self.assertGreaterEqual(delay, 0)
+                self.assertLessEqual(delay, limit)
+
+    def test_hedge_delay_after_min_samples(self):
+        policy = self.policy(hedge=True, hedge_quantile=0.9, hedge_min_samples=10)
+        for i in range(9):
+            policy.observe(0.01 * (i + 1))
+        self.assertIsNone(policy.hedge_delay())
+        policy.observe(0.1)
+        self.assertAlmostEqual(policy.hedge_delay(), 0.09, delta=0.01)
+
+    def test_no_hedge_when_disabled(self):
+        policy = self.policy(hedge_min_samples=1)
+        policy.observe(0.1)
+        self.assertIsNone(policy.hedge_delay())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+
+from app.broker.segment_log import RECORD_HEADER, SegmentedLog
+
+
+class SegmentedLogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open(self, **kwargs) -> SegmentedLog:
+        return SegmentedLog(self.path, fsync="never", **kwargs)
+
+    def test_append_and_read(self):
+        log = self.open()
+        last = log.append([(1.0, 1.5, {"n": 1}), (2.0, 2.5, {"n": 2})])
+        self.assertEqual(last, 1)
+        self.assertEqual(log.read(0, 10), [(0, 1.0, 1.5, {"n": 1}), (1, 2.0, 2.5, {"n": 2})])
+        self.assertEqual(log.read(1, 10), [(1, 2.0, 2.5, {"n": 2})])
+        log.close()
+
+    def test_roll_segments(self):
+        log = self.open(segment_bytes=200)
+        for i in range(20):
+            log.append([(float(i), float(i), {"n": i})])
+        self.assertGreater(len(log.segments), 1)
+        self.assertEqual([offset for offset, *_ in log.read(0, 100)], list(range(20)))
+        self.assertEqual([offset for offset, *_ in log.read(13, 3)], [13, 14, 15])
+        log.close()
+
+    def test_recovery_after_reopen(self):
+        log = self.open(segment_bytes=200)
+        for i in range(10):
+            log.append([(float(i), float(i), {"n": i})])
+        log.commit("group", 4)
+        log.close()
+        log = self.open(segment_bytes=200)
+        self.assertEqual(log.end_offset, 10)
+        self.assertEqual(log.committed, {"group": 4})
+        self.assertEqual(log.read(9, 1), [(9, 9.0, 9.0, {"n": 9})])
+        log.close()
+
+    def test_torn_tail_is_truncated(self):
+        log = self.open()
+        log.append([(0.0, 0.0, {"n": 0}), (1.0, 1.0, {"n": 1})])
+        log.close()
+        segment = log.segments[-1].path
+        with open(segment, "ab") as f:
+            f.write(RECORD_HEADER.pack(2, 2.0, 2.0, 100, 0) + b"{\"n\"")
+        log = self.open()
+        self.assertEqual(log.end_offset, 2)
+        self.assertEqual(os.path.getsize(segment), log.segments[-1].size)
+        self.assertEqual(log.append([(2.0, 2.0, {"n": 2})]), 2)
+        log.close()
+
+    def test_corrupted_record_is_truncated(self):
+        log = self.open()
+        log.append([(0.0, 0.0, {"n": 0}), (1.0, 1.0, {"n": 1})])
+        log.close()
+        segment = log.segments[-1].path
+        with open(segment, "r+b") as f:
+            f.seek(-2, os.SEEK_END)
+            f.write(b"xx")
+        log = self.open()
+        self.assertEqual([offset for offset, *_ in log.read(0, 10)], [0])
+        log.close()
+
+    def test_compaction_keeps_latest_per_key(self):
+        log = self.open(segment_bytes=300, compact_key="key", min_dirty_ratio=0)
+        latest = {}
+        for i in range(60):
+            key = f"k{i % 4}"
+            latest[key] = log.append([(float(i), float(i), {"key": key, "n": i})])
+        log.append([(60.0, 60.0, {"n": 60})])
+        active = log.segments[-1].base_offset
+        closed = [record for record in log.read(0, 1000) if record[0] < active]
+        keys = [payload["key"] for _, _, _, payload in closed if "key" in payload]
+        self.assertEqual(len(keys), len(set(keys)))
+        self.assertTrue(set(latest.values()) <= {offset for offset, *_ in log.read(0, 1000)})
+        log.close()
+
+    def test_compaction_index_survives_reopen(self):
+        log = self.open(segment_bytes=300, compact_key="key")
+        for i in range(30):
+            log.append([(float(i), float(i), {"key": f"k{i % 3}", "n": i})])
+        latest = dict(log.latest)
+        log.close()
+        log = self.open(segment_bytes=300, compact_key="key")
+        self.assertEqual(log.latest, latest)
+        log.close()
+
+    def test_min_dirty_ratio_skips_clean_segments(self):
+        log = self.open(segment_bytes=300, compact_key="key", min_dirty_ratio=1.0)
+        for i in range(40):
+            log.append([(float(i), float(i), {"key": f"k{i}", "n": i})])
+        log.append([(40.0, 40.0, {"key": "k0", "n": 40})])
+        self.assertEqual(len(log.read(0, 1000)), 41)
+        log.close()
+
+    def test_retention(self):
+        log = self.open(segment_bytes=200, retention_bytes=600)
+        for i in range(50):
+            log.append([(float(i), float(i), {"n": i})])
+        self.assertLessEqual(log.size - log.segments[-1].size, 600)
+        self.assertGreater(log.start_offset, 0)
+        self.assertEqual(log.read(0, 1)[0][0], log.start_offset)
+        log.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
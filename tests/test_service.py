@@ -0,0 +1,80 @@
+import logging
+import unittest
+
+from app.clock import clock
+from app.logger import logger as context_logger
+from app.metrics import metrics
+from app.models import models
+from app.rng import streams
+from app.services import service
+
+
+class Cluster:
+    """Заглушка DBCluster с хранилищем в словаре"""
+
+    name = "cluster"
+
+    def __init__(self, data: dict):
+        self.data = data
+
+    async def read(self, key: str, session=None):
+        return self.data.get(key)
+
+    async def write(self, key: str, value, session=None):
+        self.data[key] = value
+
+
+class Cache:
+    """Заглушка Redis, запоминающая записи"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key: str):
+        return self.data.get(key)
+
+    async def put(self, key: str, value):
+        self.data[key] = value
+
+    async def delete(self, key: str):
+        self.data.pop(key, None)
+
+
+class CacheAsideTest(unittest.TestCase):
+    def setUp(self):
+        self.model_clock = clock.SimulatedClock()
+        self.logger = logging.getLogger("tests.service")
+        self.logger.addHandler(logging.NullHandler())
+        self.logger.propagate = False
+
+    def read(self, db_data: dict, user_id: int) -> Cache:
+        cache = Cache()
+        instance = service.Service(
+            "svc", metrics.MetricsCollector(clock=self.model_clock), Cluster(db_data),
+            cache=cache, fail_prob=0.0, clock=self.model_clock,
+            rng=streams.StreamFactory(1).stream("svc"))
+        request = models.Request(
+            models.User(user_id), "svc", models.HTTPMethod.GET, self.model_clock)
+
+        async def scenario():
+            context_logger.logger_var.set(self.logger)
+            await instance.process(request)
+
+        loop = clock.VirtualTimeEventLoop(self.model_clock)
+        try:
+            loop.run_until_complete(scenario())
+        finally:
+            loop.close()
+        return cache
+
+    def test_miss_populates_cache(self):
+        cache = self.read({"key-1": "value-1"}, 1)
+        self.assertEqual(cache.data, {"user:1": "value-1"})
+
+    def test_missing_record_is_not_cached(self):
+        cache = self.read({}, 1)
+        self.assertEqual(cache.data, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+from collections import Counter
+
+from app.balance_loader import strategies
+from app.rng import streams
+
+
+class Instance:
+    def __init__(self, name: str):
+        self.name = name
+        self.available = True
+
+
+class Load:
+    """Заглушка MetricsCollector: только число запросов в обработке"""
+
+    def __init__(self, active: dict[str, int]):
+        self.load_stats = {name: {"active": count} for name, count in active.items()}
+
+
+class WeightTreeTest(unittest.TestCase):
+    def test_prefix_sums(self):
+        tree = strategies.WeightTree([7, 3, 0, 5])
+        self.assertEqual(tree.total, 15)
+        self.assertEqual([tree.find(point) for point in (0, 6.9, 7, 9.9, 10, 14.9)],
+                         [0, 0, 1, 1, 3, 3])
+
+    def test_set_updates_total_and_search(self):
+        tree = strategies.WeightTree([1, 1, 1])
+        tree.set(1, 0)
+        self.assertEqual(tree.total, 2)
+        self.assertEqual([tree.find(0.5), tree.find(1.5)], [0, 2])
+        tree.set(1, 4)
+        self.assertEqual(tree.total, 6)
+        self.assertEqual(tree.find(3), 1)
+
+    def test_matches_linear_scan(self):
+        weights = [3, 0, 8, 1, 0, 0, 5, 2, 9, 4, 7]
+        tree = strategies.WeightTree(weights)
+        for point in range(sum(weights)):
+            expected = next(
+                i for i in range(len(weights)) if point < sum(weights[:i + 1]))
+            self.assertEqual(tree.find(point + 0.5), expected)
+
+
+class StrategyTest(unittest.TestCase):
+    def setUp(self):
+        self.instances = [Instance("a"), Instance("b"), Instance("c")]
+
+    def group(self, name: str, weights: list[int], load=None) -> strategies.Strategy:
+        return strategies.STRATEGIES[name](
+            self.instances, weights, streams.StreamFactory(1).stream("test"), load)
+
+    def test_unavailable_instance_is_skipped(self):
+        for name in strategies.STRATEGIES:
+            group = self.group(name, [1, 1, 1])
+            self.instances[1].available = False
+            group.on_availability(self.instances[1])
+            picks = {group.select().name for _ in range(200)}
+            self.assertNotIn("b", picks, name)
+            self.instances[1].available = True
+            group.on_availability(self.instances[1])
+            self.assertEqual(group.tree.weights, [1, 1, 1])
+
+    def test_has_available(self):
+        group = self.group("weighted", [1, 1, 1])
+        for instance in self.instances:
+            instance.available = False
+            group.on_availability(instance)
+        self.assertFalse(group.has_available())
+
+    def test_weighted_random_follows_weights(self):
+        group = self.group("weighted", [6, 3, 1])
+        picks = Counter(group.select().name for _ in range(10_000))
+        self.assertAlmostEqual(picks["a"] / 10_000, 0.6, delta=0.03)
+        self.assertAlmostEqual(picks["c"] / 10_000, 0.1, delta=0.02)
+
+    def test_smooth_round_robin_sequence(self):
+        group = self.group("swrr", [5, 1, 1])
+        # Последовательность nginx для весов 5, 1, 1
+        self.assertEqual(
+            "".join(group.select().name for _ in range(7)), "aabacaa")
+
+    def test_least_outstanding(self):
+        group = self.group("least_outstanding", [1, 1, 1], Load({"a": 3, "b": 0, "c": 1}))
+        self.assertEqual(group.select().name, "b")
+
+    def test_ewma_prefers_faster_instance(self):
+        group = self.group("ewma", [1, 1, 1], Load({}))
+        for instance, latency in zip(self.instances, (0.5, 0.01, 0.5)):
+            group.on_result(instance, latency)
+        picks = Counter(group.select().name for _ in range(1000))
+        self.assertEqual(picks.most_common(1)[0][0], "b")
+
+    def test_probing_instance_gets_share_of_weight(self):
+        group = self.group("weighted", [4, 4, 2])
+        group.set_probing(self.instances[0], 0.5)
+        self.assertEqual(group.tree.weights, [2, 4, 2])
+        group.set_ejected(self.instances[0], True)
+        group.set_ejected(self.instances[0], False)
+        self.assertEqual(group.tree.weights, [2, 4, 2])
+        group.set_probing(self.instances[0], None)
+        self.assertEqual(group.tree.weights, [4, 4, 2])
+
+    def test_select_excluding(self):
+        for name in strategies.STRATEGIES:
+            group = self.group(name, [7, 3, 7], Load({"a": 0, "b": 5, "c": 5}))
+            picks = {group.select_excluding("a").name for _ in range(200)}
+            self.assertNotIn("a", picks, name)
+            self.assertEqual(group.tree.weights, [7, 3, 7], name)
+
+    def test_select_excluding_only_instance(self):
+        group = self.group("weighted", [5, 0, 0])
+        self.assertEqual(group.select_excluding("a").name, "a")
+        self.assertEqual(group.select_excluding(None).name, "a")
+
+
+if __name__ == "__main__":
+    unittest.main()
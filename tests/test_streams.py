@@ -0,0 +1,47 @@
+import unittest
+
+from app.rng import streams
+
+
+class StreamFactoryTest(unittest.TestCase):
+    def draws(self, stream: streams.RandomStream, count: int = 5) -> list[float]:
+        return [stream.random() for _ in range(count)]
+
+    def test_same_name_is_reproducible(self):
+        first = streams.StreamFactory(42).stream("nginx")
+        second = streams.StreamFactory(42).stream("nginx")
+        self.assertEqual(self.draws(first), self.draws(second))
+
+    def test_order_of_creation_does_not_matter(self):
+        factory = streams.StreamFactory(42)
+        factory.stream("other")
+        late = factory.stream("nginx")
+        self.assertEqual(self.draws(late), self.draws(streams.StreamFactory(42).stream("nginx")))
+
+    def test_distinct_names_differ(self):
+        factory = streams.StreamFactory(42)
+        names = ["auth", "auth/failures", "db-1", "db-10", "db1", "ba", "ab", "a" * 100]
+        sequences = {tuple(self.draws(factory.stream(name))) for name in names}
+        self.assertEqual(len(sequences), len(names))
+
+    def test_spawn_key_is_fixed_size(self):
+        factory = streams.StreamFactory(42)
+        for name in ("a", "PaymentService-1000/failures" * 10):
+            key = factory.stream(name).seed_sequence.spawn_key
+            self.assertEqual(len(key), 4)
+            self.assertTrue(all(0 <= word < 2 ** 32 for word in key))
+
+    def test_generator_is_created_on_first_draw(self):
+        stream = streams.StreamFactory(42).stream("nginx")
+        self.assertIsNone(stream._generator)
+        stream.random()
+        self.assertIsNotNone(stream._generator)
+
+    def test_seed_changes_streams(self):
+        self.assertNotEqual(
+            self.draws(streams.StreamFactory(1).stream("nginx")),
+            self.draws(streams.StreamFactory(2).stream("nginx")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from app.app import Application
+from app.experiments import sweep
+from app.topology import builder
+
+
+class SweepCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.topology = os.path.join(directory.name, "topology.json")
+        shutil.copy(builder.DEFAULT_TOPOLOGY, self.topology)
+
+    def test_same_point_same_hash(self):
+        point = {"topology": self.topology, "rps": 10}
+        self.assertEqual(
+            sweep.config_hash(point, 60, 1), sweep.config_hash(dict(point), 60, 1))
+        self.assertNotEqual(
+            sweep.config_hash(point, 60, 1), sweep.config_hash(point, 60, 2))
+
+    def test_topology_contents_change_hash(self):
+        point = {"topology": self.topology}
+        before = sweep.config_hash(point, 60, 1)
+        with open(self.topology, "a", encoding="utf-8") as f:
+            f.write("\n")
+        self.assertNotEqual(sweep.config_hash(point, 60, 1), before)
+
+    def test_inline_topology_has_no_digest(self):
+        self.assertIsNone(sweep.topology_digest({"topology": {"services": []}}))
+
+
+class InstanceCountTest(unittest.TestCase):
+    def test_matches_built_application(self):
+        for point in ({}, {"payment_count": 3, "data_count": 1}, {"public_count": 5}):
+            self.assertEqual(
+                sweep.instance_count(point),
+                len(Application(plot=False, **point).services), point)
+
+    def test_count_knob_changes_count(self):
+        self.assertEqual(
+            sweep.instance_count({"payment_count": 5})
+            - sweep.instance_count({"payment_count": 2}), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
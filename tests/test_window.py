@@ -0,0 +1,126 @@
+import unittest
+
+import numpy as np
+from app.metrics import histogram, window
+
+
+class RollingWindowsTest(unittest.TestCase):
+    def test_counts_completed_seconds_only(self):
+        windows = window.RollingWindows((1, 10))
+        for _ in range(5):
+            windows.record(0.5, True, 0.1)
+        # Секунда 0 ещё не завершилась
+        self.assertEqual(windows.get(1, 0.9)["rps"], 0)
+        self.assertEqual(windows.get(1, 1.0)["rps"], 5)
+        self.assertEqual(windows.get(10, 1.0)["rps"], 0.5)
+
+    def test_window_rolls_over(self):
+        windows = window.RollingWindows((1, 10))
+        for second in range(30):
+            for _ in range(second % 3 + 1):
+                windows.record(second + 0.5, True, 0.1)
+        live = windows.get(10, 30.0)
+        # В десятисекундное окно входят завершённые секунды 20..29
+        expected = sum(second % 3 + 1 for second in range(20, 30))
+        self.assertAlmostEqual(live["rps"], expected / 10)
+        self.assertEqual(windows.get(1, 30.0)["rps"], 29 % 3 + 1)
+
+    def test_subtraction_keeps_latency_quantiles_of_window(self):
+        windows = window.RollingWindows((1, 10))
+        for second in range(10):
+            windows.record(second + 0.5, True, 1.0)
+        for second in range(10, 20):
+            windows.record(second + 0.5, True, 0.01)
+        live = windows.get(10, 20.0)
+        # Медленные запросы первых десяти секунд вычтены из окна
+        self.assertAlmostEqual(live["p99"], 0.01, delta=0.002)
+        self.assertEqual(windows.totals[10]["latencies"].count, 10)
+
+    def test_quantiles_match_plain_histogram(self):
+        windows = window.RollingWindows((10,))
+        plain = histogram.LatencyHistogram(precision=windows.precision)
+        for i, value in enumerate(np.random.default_rng(1).lognormal(-3, 1, 2000)):
+            windows.record(i / 200, True, float(value))
+            plain.record(float(value))
+        live = windows.get(10, 10.0)
+        p50, p99 = plain.quantiles([0.5, 0.99])
+        self.assertAlmostEqual(live["p50"] / p50, 1, delta=windows.precision)
+        self.assertAlmostEqual(live["p99"] / p99, 1, delta=windows.precision)
+
+    def test_error_rate(self):
+        windows = window.RollingWindows((10,))
+        for i in range(20):
+            windows.record(i * 0.25, i % 4 != 0, 0.05)
+        self.assertAlmostEqual(windows.get(10, 5.0)["error_rate"], 0.25)
+
+    def test_long_gap_clears_windows(self):
+        windows = window.RollingWindows((1, 10))
+        windows.record(0.5, False, 0.0)
+        windows.record(100.5, True, 0.1)
+        live = windows.get(10, 101.0)
+        self.assertEqual(live["rps"], 0.1)
+        self.assertEqual(live["error_rate"], 0.0)
+
+    def test_idle_window_is_empty(self):
+        windows = window.RollingWindows((1, 10))
+        windows.record(0.5, True, 0.1)
+        self.assertEqual(windows.get(10, 15.0), {
+            "rps": 0.0, "error_rate": 0.0, "p50": 0, "p99": 0})
+
+
+class DownsampledSeriesTest(unittest.TestCase):
+    def test_coarsens_when_full(self):
+        series = window.DownsampledSeries(max_points=4)
+        for second in range(8):
+            series.add(second + 0.5, True)
+        self.assertEqual(series.resolution, 2)
+        times, rps, errors = series.series()
+        self.assertEqual(times, [0, 2, 4, 6])
+        self.assertEqual(rps, [1.0] * 4)
+        self.assertEqual(errors, [0.0] * 4)
+
+    def test_merge_different_resolutions(self):
+        fine = window.DownsampledSeries(max_points=8)
+        coarse = window.DownsampledSeries(max_points=4)
+        for second in range(8):
+            fine.add(second, True)
+            coarse.add(second, second % 2 == 0)
+        fine.merge(coarse)
+        self.assertEqual(fine.resolution, 2)
+        self.assertEqual(int(fine.counts.sum()), 16)
+        self.assertEqual(fine.series()[2], [0.5] * 4)
+
+    def test_active_seconds(self):
+        series = window.DownsampledSeries()
+        series.add(0, True)
+        series.add(5, False)
+        self.assertEqual(series.active_seconds(), 2)
+
+
+class DownsampledMaxTest(unittest.TestCase):
+    def test_keeps_maximum_when_coarsening(self):
+        series = window.DownsampledMax(max_points=4)
+        for second, depth in enumerate([3, 7, 1, 0, 5, 2]):
+            series.add(second, depth)
+        self.assertEqual(series.resolution, 2)
+        self.assertEqual(series.series(), ([0, 2, 4], [7, 1, 5]))
+        self.assertEqual(series.counts.shape, (1, 4))
+
+    def test_skips_intervals_without_observations(self):
+        series = window.DownsampledMax()
+        series.add(0.5, 0)
+        series.add(3.5, 4)
+        self.assertEqual(series.series(), ([0, 3], [0, 4]))
+
+    def test_merge(self):
+        left = window.DownsampledMax()
+        right = window.DownsampledMax()
+        left.add(0, 2)
+        right.add(0, 5)
+        right.add(2, 1)
+        left.merge(right)
+        self.assertEqual(left.series(), ([0, 2], [5, 1]))
+
+
+if __name__ == "__main__":
+    unittest.main()